@@ -5,13 +5,17 @@ from litestar.app import Litestar
 from litestar.openapi import OpenAPIConfig
 from litestar.openapi.plugins import ScalarRenderPlugin, SwaggerRenderPlugin
 
+from app.cache import ResponseCacheMiddleware, response_cache
 from app.config import settings
 from app.controllers.auth import AuthController
 from app.controllers.book import BookController
 from app.controllers.loan import LoanController
+from app.controllers.metrics import MetricsController
 from app.controllers.review import ReviewController
 from app.controllers.user import UserController
-from app.db import sqlalchemy_plugin
+from app.db import ReplicaRoutingMiddleware, replica_router, sqlalchemy_plugin
+from app.passwords import password_pool
+from app.scheduler import scheduler
 from app.security import oauth2_auth
 
 openapi_config = OpenAPIConfig(
@@ -31,9 +35,15 @@ app = Litestar(
         AuthController,
         CategoryController,
         ReviewController,
+        MetricsController,
     ],
     openapi_config=openapi_config,
     debug=settings.debug,
     plugins=[sqlalchemy_plugin],
+    middleware=[ReplicaRoutingMiddleware(), ResponseCacheMiddleware()],
+    stores={response_cache.store_name: response_cache.store},
+    response_cache_config=response_cache.config(),
+    on_startup=[replica_router.start, response_cache.start, scheduler.start],
+    on_shutdown=[scheduler.stop, response_cache.stop, replica_router.stop, password_pool.shutdown],
     #on_app_init=[oauth2_auth.on_app_init],
 )
@@ -0,0 +1,264 @@
+"""Caches shared by controllers.
+
+``auth_user_cache`` lives in each worker's memory. ``response_cache`` backs
+Litestar's response cache with a store from ``settings`` (memory, file or
+Redis) and adds tag-based invalidation: GET routes name the tags they depend on
+in ``opt["cache_tags"]`` and write routes the tags they change in
+``opt["invalidates"]``. Every tag has a version token kept in the same store and
+prepended to the cache keys, so invalidating a tag is a single write that
+orphans its entries (they expire with their TTL) in every worker; memory and
+file stores drop expired entries in a background sweep.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+from litestar import Request
+from litestar.config.response_cache import ResponseCacheConfig, default_cache_key_builder
+from litestar.middleware import ASGIMiddleware
+from litestar.stores.base import Store
+from litestar.stores.file import FileStore
+from litestar.stores.memory import MemoryStore
+from litestar.enums import ScopeType
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from litestar.utils.scope.state import ScopeState
+
+from app.config import settings
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters of a cache."""
+
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class TTLCache(Generic[K, T]):
+    """LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``ttl <= 0`` disables the cache: ``get`` always misses.
+    """
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[K, tuple[float, T]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> T | None:
+        """Return the cached value for ``key``, or ``None`` if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or self.ttl <= 0:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: T) -> None:
+        """Store ``value`` for ``ttl`` seconds, evicting the least recently used entry."""
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: K) -> None:
+        """Remove ``key`` if present."""
+        self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[T], bool]) -> None:
+        """Remove every entry whose value matches ``predicate``."""
+        for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+            del self._entries[key]
+
+    def stats(self) -> CacheStats:
+        """Snapshot of the hit/miss counters."""
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self._entries),
+            maxsize=self.maxsize,
+        )
+
+
+auth_user_cache: TTLCache[str, User] = TTLCache(
+    ttl=settings.auth_user_cache_ttl,
+    maxsize=settings.auth_user_cache_size,
+)
+"""Users resolved from JWT subjects; invalidated when the user is modified."""
+
+
+@dataclass
+class RouteCacheStats:
+    """Response cache hits/misses of one GET route in this worker."""
+
+    route: str
+    hits: int
+    misses: int
+    hit_ratio: float | None
+
+
+def _build_store() -> Store:
+    if settings.response_cache_backend == "file":
+        return FileStore(Path(settings.response_cache_path), create_directories=True)
+    if settings.response_cache_backend == "redis":
+        # Requiere el paquete redis (no es dependencia obligatoria)
+        from litestar.stores.redis import RedisStore
+
+        return RedisStore.with_client(url=settings.response_cache_redis_url)
+    return MemoryStore()
+
+
+class ResponseCache:
+    """Tag-versioned response cache over a Litestar store."""
+
+    store_name = "response_cache"
+
+    def __init__(self, store: Store) -> None:
+        self.store = store
+        self._task: asyncio.Task | None = None
+        self._hits: defaultdict[str, int] = defaultdict(int)
+        self._misses: defaultdict[str, int] = defaultdict(int)
+
+    def config(self) -> ResponseCacheConfig:
+        """``response_cache_config`` for the app (register ``store`` as ``store_name``)."""
+        return ResponseCacheConfig(store=self.store_name, key_builder=self.key_builder)
+
+    @staticmethod
+    def key_builder(request: Request[Any, Any, Any]) -> str:
+        """Default Litestar key prefixed with the versions of the route's tags.
+
+        Conditional requests get their own keys, so they reach the handler's
+        cheap 304 check instead of replaying a full cached body.
+        """
+        versions = request.scope["state"].get("cache_tag_versions", "")
+        key = f"{versions}:{default_cache_key_builder(request)}"
+        conditional = [
+            request.headers.get(name) or "" for name in ("if-none-match", "if-modified-since")
+        ]
+        if any(conditional):
+            key += ":" + "|".join(conditional)
+        return key
+
+    async def tag_versions(self, tags: list[str]) -> str:
+        """Current version token of each tag (``0`` until first invalidated)."""
+        versions = []
+        for tag in tags:
+            version = await self.store.get(f"tag:{tag}")
+            versions.append(f"{tag}={(version or b'0').decode()}")
+        return ",".join(versions)
+
+    async def invalidate(self, *tags: str) -> None:
+        """Give ``tags`` a new version so no cached response that depends on them is served."""
+        token = uuid.uuid4().hex
+        for tag in tags:
+            await self.store.set(f"tag:{tag}", token)
+
+    async def _sweep(self, delete_expired: Callable[[], Any]) -> None:
+        while True:
+            await asyncio.sleep(settings.response_cache_sweep_interval)
+            try:
+                await delete_expired()
+            except Exception:
+                logger.warning("Response cache sweep failed", exc_info=True)
+
+    async def start(self) -> None:
+        """Start sweeping expired entries (app startup hook); Redis expires them by itself."""
+        # Las entradas huérfanas vencen solas; en memoria/archivo hay que barrerlas
+        delete_expired = getattr(self.store, "delete_expired", None)
+        if delete_expired is not None and settings.response_cache_sweep_interval > 0:
+            self._task = asyncio.create_task(self._sweep(delete_expired), name="response-cache-sweep")
+
+    async def stop(self) -> None:
+        """Stop the sweep (app shutdown hook)."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def record(self, route: str, hit: bool) -> None:
+        if hit:
+            self._hits[route] += 1
+        else:
+            self._misses[route] += 1
+
+    def stats(self) -> list[RouteCacheStats]:
+        """Hit ratio of every cached route seen by this worker."""
+        stats = []
+        for route in sorted(self._hits.keys() | self._misses.keys()):
+            hits, misses = self._hits[route], self._misses[route]
+            stats.append(
+                RouteCacheStats(
+                    route=route,
+                    hits=hits,
+                    misses=misses,
+                    hit_ratio=hits / (hits + misses) if hits + misses else None,
+                )
+            )
+        return stats
+
+
+response_cache = ResponseCache(_build_store())
+"""Response cache of the read endpoints; write endpoints invalidate its tags."""
+
+
+class ResponseCacheMiddleware(ASGIMiddleware):
+    """Resolve tag versions before cached GETs and invalidate tags after successful writes."""
+
+    scopes = (ScopeType.HTTP,)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        handler = scope["route_handler"]
+        cache_tags = handler.opt.get("cache_tags")
+        invalidates = handler.opt.get("invalidates")
+
+        if cache_tags and handler.cache and scope["method"] == "GET":
+            scope["state"]["cache_tag_versions"] = await response_cache.tag_versions(cache_tags)
+            await next_app(scope, receive, send)
+            route = f"GET {scope['path_template']}"
+            response_cache.record(route, hit=ScopeState.from_scope(scope).is_cached is True)
+            return
+
+        if not invalidates:
+            await next_app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await next_app(scope, receive, send_wrapper)
+        # Con la respuesta enviada la escritura ya está confirmada: invalidar recién
+        # ahora evita que otra request vuelva a cachear el estado anterior
+        if status_code < 400:
+            await response_cache.invalidate(*invalidates)
@@ -0,0 +1,195 @@
+"""Delta sync feeds (``GET /<resource>/changes?since=<watermark>``).
+
+A feed returns the rows whose ``updated_at`` moved past the client's
+watermark, in ``(updated_at, id)`` order (``ix_<table>_updated_at_id``), plus
+the ids deleted since then, read from ``tombstones`` (written by an
+``AFTER DELETE`` trigger in the same transaction as the DELETE, cascades and
+bulk deletes included). Every response
+carries the next watermark: clients keep it and send it back as ``since``.
+
+``updated_at`` is set when a row is flushed, not when its transaction
+commits, so each poll only reads up to ``now - changes_settle_seconds``: a
+transaction that commits a little later is picked up by the next poll
+instead of landing behind a watermark already handed out.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Any, Generic, TypeVar
+
+from litestar.params import Parameter
+from sqlalchemy import Delete, Select, delete, select, tuple_
+
+from app.config import settings
+from app.models import Tombstone
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+T = TypeVar("T")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_WATERMARK_COLUMNS = (Tombstone.deleted_at, Tombstone.id, Tombstone.deleted_at, Tombstone.id)
+
+
+class InvalidWatermarkError(ValueError):
+    """``since`` is neither a watermark issued by the server nor an ISO 8601 timestamp."""
+
+
+class ExpiredWatermarkError(Exception):
+    """The tombstones needed to catch up from ``since`` were already purged."""
+
+
+@dataclass
+class ChangeSet(Generic[T]):
+    """Rows changed and ids deleted after a watermark."""
+
+    items: list[T]
+    deleted: list[int]
+    next_since: str
+    # Quedan cambios anteriores a la ventana actual: pedir de nuevo con next_since
+    has_more: bool
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """Position of a client in a feed: last ``(updated_at, id)`` and ``(deleted_at, id)`` seen."""
+
+    updated_at: datetime
+    row_id: int
+    deleted_at: datetime
+    tombstone_id: int
+
+    @classmethod
+    def parse(cls, since: str | None, now: datetime) -> "Watermark":
+        """Read ``since``; without it the client starts a full sync.
+
+        A full sync needs no deletions before ``now`` (the client has nothing
+        yet), so its tombstone position starts there.
+        """
+        if since is None:
+            return cls(_EPOCH, 0, now, 0)
+        try:
+            timestamp = datetime.fromisoformat(since)
+        except ValueError:
+            try:
+                return cls(*decode_cursor(since, _WATERMARK_COLUMNS))
+            except InvalidCursorError as e:
+                raise InvalidWatermarkError(since) from e
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return cls(timestamp, 0, timestamp, 0)
+
+    def encode(self) -> str:
+        """Opaque token for ``next_since``."""
+        return encode_cursor([self.updated_at, self.row_id, self.deleted_at, self.tombstone_id])
+
+
+@dataclass
+class ChangeParams:
+    """Delta sync parameters parsed from the query string."""
+
+    watermark: Watermark
+    limit: int
+    # Límite superior (excluido) de la ventana de esta consulta
+    until: datetime
+
+
+async def provide_change_params(
+    since: str | None = None,
+    limit: Annotated[int | None, Parameter(ge=1, le=settings.page_size_max)] = None,
+) -> ChangeParams:
+    """Read ``since`` and ``limit`` from the query string."""
+    now = datetime.now(timezone.utc)
+    until = now - timedelta(seconds=settings.changes_settle_seconds)
+    watermark = Watermark.parse(since, until)
+    retention = settings.tombstone_retention_days
+    if retention and watermark.deleted_at < now - timedelta(days=retention):
+        raise ExpiredWatermarkError(since)
+    return ChangeParams(watermark=watermark, limit=limit or settings.page_size_default, until=until)
+
+
+def changed_rows_stmt(model: type[Any], params: ChangeParams) -> Select[Any]:
+    """Rows after the watermark, oldest change first (one extra row detects ``has_more``)."""
+    position = (params.watermark.updated_at, params.watermark.row_id)
+    return (
+        select(model)
+        .where(
+            tuple_(model.updated_at, model.id) > tuple_(*position),
+            model.updated_at < params.until,
+        )
+        .order_by(model.updated_at, model.id)
+        .limit(params.limit + 1)
+    )
+
+
+def _next_position(
+    rows: Sequence[Any],
+    timestamp: str,
+    limit: int,
+    until: datetime,
+    current: tuple[datetime, int],
+) -> tuple[datetime, int]:
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        return getattr(last, timestamp), last.id
+    # Ventana completa: se avanza hasta su límite aunque no haya filas, nunca hacia atrás
+    return max(current, (until, 0))
+
+
+def deletions_until(rows: Sequence[Any], params: ChangeParams) -> datetime:
+    """Upper bound of the tombstones that go with ``rows``.
+
+    When the rows are cut by ``limit`` the deletions stop at the last row
+    returned, so an update sent in a later page never arrives after the
+    deletion of the same row.
+    """
+    watermark = params.watermark
+    current = (watermark.updated_at, watermark.row_id)
+    return _next_position(rows, "updated_at", params.limit, params.until, current)[0]
+
+
+def tombstones_stmt(table_name: str, params: ChangeParams, until: datetime) -> Select[Any]:
+    """Tombstones of ``table_name`` after the watermark and before ``until``."""
+    position = (params.watermark.deleted_at, params.watermark.tombstone_id)
+    return (
+        select(Tombstone.id, Tombstone.row_id, Tombstone.deleted_at)
+        .where(
+            Tombstone.table_name == table_name,
+            tuple_(Tombstone.deleted_at, Tombstone.id) > tuple_(*position),
+            Tombstone.deleted_at < until,
+        )
+        .order_by(Tombstone.deleted_at, Tombstone.id)
+        .limit(params.limit + 1)
+    )
+
+
+def build_change_set(
+    rows: Sequence[Any],
+    tombstones: Sequence[Any],
+    params: ChangeParams,
+    deleted_until: datetime,
+) -> ChangeSet[Any]:
+    """Trim the extra rows fetched by both queries and issue the next watermark."""
+    limit = params.limit
+    watermark = params.watermark
+    updated_at, row_id = _next_position(
+        rows, "updated_at", limit, params.until, (watermark.updated_at, watermark.row_id)
+    )
+    deleted_at, tombstone_id = _next_position(
+        tombstones,
+        "deleted_at",
+        limit,
+        deleted_until,
+        (watermark.deleted_at, watermark.tombstone_id),
+    )
+    return ChangeSet(
+        items=list(rows[:limit]),
+        deleted=[tombstone.row_id for tombstone in tombstones[:limit]],
+        next_since=Watermark(updated_at, row_id, deleted_at, tombstone_id).encode(),
+        has_more=len(rows) > limit or len(tombstones) > limit,
+    )
+
+
+def prune_tombstones_stmt(before: datetime) -> Delete:
+    """Tombstones older than ``before`` (a watermark that old gets a 410)."""
+    return delete(Tombstone).where(Tombstone.deleted_at < before)
@@ -0,0 +1,189 @@
+"""Conditional GET (ETag / Last-Modified) for read endpoints.
+
+A ``Validator`` is computed with one aggregate query (row counts and
+``max(updated_at)``) over the rows an endpoint would return and the related
+rows its read DTO embeds. Handlers call ``check_conditional`` before loading
+anything: if the client's ``If-None-Match`` / ``If-Modified-Since`` still
+match, ``NotModifiedError`` turns into an empty 304 (collections only honor
+``If-None-Match``); otherwise
+``ValidatedResponse`` adds the ``ETag``/``Last-Modified`` headers to the
+handler's response.
+"""
+
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+from litestar import Request, Response
+from litestar.response.base import ASGIResponse
+from litestar.config.response_cache import default_cache_key_builder
+from sqlalchemy import ColumnElement, FromClause, Select, func, null, select
+
+_STATE_KEY = "validator_headers"
+
+
+class NotModifiedError(Exception):
+    """The representation cached by the client is still current (HTTP 304)."""
+
+    def __init__(self, headers: dict[str, str]) -> None:
+        super().__init__("Not modified")
+        self.headers = headers
+
+
+@dataclass(frozen=True)
+class Related:
+    """Rows embedded by a read DTO that must change the validator when they change."""
+
+    # Columna del relacionado que referencia a ``source`` (p. ej. Loan.book_id)
+    key: ColumnElement[Any]
+    # Columna del modelo listado (p. ej. Book.id, o Loan.book_id para un muchos-a-uno)
+    source: ColumnElement[Any]
+    updated_at: ColumnElement[Any] | None = None
+    # (tabla, condición) cuando ``key`` está en una tabla de asociación
+    join: tuple[FromClause | type[Any], ColumnElement[bool]] | None = None
+
+
+@dataclass(frozen=True)
+class Validator:
+    """Row counts and latest ``updated_at`` of what an endpoint returns."""
+
+    counts: tuple[int, ...]
+    last_modified: datetime | None
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "Validator":
+        """Build from ``validator_stmt``'s row: counts and maxima interleaved."""
+        counts = tuple(row[0::2])
+        timestamps = [
+            value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+            for value in row[1::2]
+            if value is not None
+        ]
+        return cls(counts=counts, last_modified=max(timestamps, default=None))
+
+    @property
+    def exists(self) -> bool:
+        return self.counts[0] > 0
+
+    def etag(self, variant: str) -> str:
+        """Weak ETag of this state of the rows for one URL (``variant``)."""
+        stamp = self.last_modified.isoformat() if self.last_modified else ""
+        raw = f"{variant}|{self.counts}|{stamp}".encode()
+        return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def validator_stmt(
+    model: type[Any],
+    filters: Sequence[ColumnElement[bool]],
+    related: Sequence[Related] = (),
+    order_by: Sequence[ColumnElement[Any]] = (),
+    limit: int | None = None,
+    total_filters: Sequence[ColumnElement[bool]] | None = None,
+) -> Select[Any]:
+    """One SELECT with count and ``max(updated_at)`` of the rows and of each ``related``.
+
+    ``order_by``/``limit`` restrict it to one page, so a poll costs an index
+    range scan instead of aggregating the whole table; ``total_filters`` adds
+    the count of every matching row (for ``with_total``).
+    """
+    sources = [item.source.label(f"source_{index}") for index, item in enumerate(related)]
+    rows = select(model.id, model.updated_at, *sources).where(*filters)
+    if order_by:
+        rows = rows.order_by(*order_by)
+    if limit is not None:
+        rows = rows.limit(limit)
+    scope = rows.cte("validator_scope")
+
+    columns = [
+        select(func.count()).select_from(scope).scalar_subquery(),
+        select(func.max(scope.c.updated_at)).scalar_subquery(),
+    ]
+    for index, item in enumerate(related):
+        base = select().select_from(item.key.table)
+        if item.join is not None:
+            base = base.join(*item.join)
+        base = base.where(item.key.in_(select(scope.c[f"source_{index}"])))
+        columns.append(base.add_columns(func.count()).scalar_subquery())
+        if item.updated_at is not None:
+            columns.append(base.add_columns(func.max(item.updated_at)).scalar_subquery())
+        else:
+            columns.append(null())
+    if total_filters is not None:
+        columns.append(select(func.count(model.id)).where(*total_filters).scalar_subquery())
+        columns.append(null())
+    return select(*columns)
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Comparación débil: se ignora el prefijo W/
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def _not_modified_since(header: str, last_modified: datetime | None) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # Last-Modified tiene resolución de segundos
+    return last_modified.replace(microsecond=0) <= since
+
+
+def check_conditional(
+    request: Request[Any, Any, Any],
+    validator: Validator,
+    collection: bool = False,
+) -> None:
+    """Raise ``NotModifiedError`` if the client's copy is current, else keep the validators for the response.
+
+    A missing single resource never matches (not even ``*``), so the handler's
+    404 stays as is; an empty ``collection`` is a valid representation. A
+    collection only honors ``If-None-Match``: deleting a row does not move
+    ``max(updated_at)``, only the counts in the ETag.
+    """
+    etag = validator.etag(default_cache_key_builder(request))
+    headers = {"etag": etag}
+    if validator.last_modified is not None:
+        headers["last-modified"] = _http_date(validator.last_modified)
+    request.state[_STATE_KEY] = headers
+
+    if not (collection or validator.exists):
+        return
+
+    # If-None-Match tiene prioridad: If-Modified-Since solo se usa si no viene
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            raise NotModifiedError(headers)
+        return
+
+    if collection:
+        return
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and _not_modified_since(if_modified_since, validator.last_modified):
+        raise NotModifiedError(headers)
+
+
+class ValidatedResponse(Response[Any]):
+    """``response_class`` that adds the validators set by ``check_conditional``.
+
+    It runs inside the route, so the response cache also stores the headers.
+    """
+
+    def to_asgi_response(self, app: Any, request: Request[Any, Any, Any], **kwargs: Any) -> ASGIResponse:
+        validators = request.state.get(_STATE_KEY)
+        if validators and self.status_code < 300:
+            self.headers.update(validators)
+        return super().to_asgi_response(app, request, **kwargs)
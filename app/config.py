@@ -1,5 +1,7 @@
 """Application configuration using Pydantic Settings."""
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +10,69 @@ class Settings(BaseSettings):
     debug: bool = False
     jwt_secret_key: str  = "secret123"
     database_url: str = "postgresql+psycopg:///bd2_library_db"
+    # Usa AsyncSession/SQLAlchemyAsyncRepository para no bloquear el event loop
+    database_async: bool = False
+    # Pool de conexiones de cada worker: tamaño, conexiones extra en picos (overflow),
+    # segundos de espera por una conexión, reciclado en segundos (-1 nunca) y pre-ping
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = False
+    # Límites por conexión de PostgreSQL en milisegundos (0 los desactiva)
+    db_statement_timeout_ms: int = 0
+    db_idle_in_transaction_timeout_ms: int = 0
+    # Réplicas de lectura (lista JSON de URLs): los GET leen de una cuyo retraso no supere
+    # replica_max_lag_seconds (medido cada replica_lag_check_interval); si no hay, del primario
+    replica_database_urls: list[str] = []
+    replica_max_lag_seconds: float = 5
+    replica_lag_check_interval: float = 2
+    # Segundos que un cliente lee del primario después de escribir (read-your-writes)
+    replica_read_your_writes_seconds: float = 5
+    # Paginación por cursor de los endpoints de listado
+    page_size_default: int = 50
+    page_size_max: int = 500
+    # Listados (/books/, /loans/, /reviews/, /users/) armados como msgspec.Struct desde las
+    # filas y codificados sin pasar por el DTO; sin fields/include incluyen las relaciones resumidas
+    fast_list_serialization: bool = False
+    # Segundos que se cachea GET /books/stats (0 desactiva el caché)
+    book_stats_cache_ttl: int = 60
+    # Caché de respuestas HTTP: backend (memory, file o redis) y su ubicación
+    response_cache_backend: Literal["memory", "file", "redis"] = "memory"
+    response_cache_path: str = ".response_cache"
+    response_cache_redis_url: str = "redis://localhost:6379/0"
+    # Segundos entre barridos de las respuestas vencidas en memory/file (0 = nunca)
+    response_cache_sweep_interval: float = 60
+    # Segundos que se cachean las lecturas de libros y de categorías (0 desactiva)
+    books_cache_ttl: int = 30
+    categories_cache_ttl: int = 300
+    # Pool donde se ejecuta Argon2 (hash/verify) fuera del event loop
+    password_hashing_executor: Literal["process", "thread"] = "process"
+    password_hashing_workers: int = 2
+    # Caché de usuarios autenticados (por "sub" del JWT)
+    auth_user_cache_ttl: float = 60
+    auth_user_cache_size: int = 1024
+    # Idiomas (ISO 639-1) con que se interpreta /books/search cuando no se indica uno
+    search_languages: list[str] = ["es", "en"]
+    # Umbral de similitud (pg_trgm word_similarity) por defecto de las búsquedas difusas
+    trigram_similarity_threshold: float = 0.3
+    # Segundos entre barridos de préstamos vencidos (0 desactiva el barrido)
+    overdue_sweep_interval: float = 300
+    # Segundos entre reconciliaciones de los contadores de reseñas de books (0 la desactiva)
+    review_stats_reconcile_interval: float = 3600
+    # Sincronización incremental (/changes): segundos de margen para las transacciones
+    # en curso, días que se conservan las tombstones (0 = siempre) y segundos entre purgas
+    changes_settle_seconds: float = 5
+    tombstone_retention_days: int = 30
+    tombstone_prune_interval: float = 3600
+    # Filas que se leen por vuelta del cursor del servidor (y por chunk) en las exportaciones
+    export_batch_size: int = 5000
+    # Filas por lote (COPY + upsert) en la importación masiva de libros
+    book_import_batch_size: int = 5000
+    # Máximo de filas rechazadas que se detallan en el reporte de importación
+    book_import_max_rejects: int = 1000
+    # Tamaño máximo (bytes) del archivo aceptado por POST /books/import
+    book_import_max_body_size: int = 1024 * 1024 * 1024
 
     model_config = SettingsConfigDict(
         env_file=".env",
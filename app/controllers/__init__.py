@@ -5,6 +5,11 @@ from typing import Any
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from litestar import Request, Response
 
+from app.changes import ExpiredWatermarkError, InvalidWatermarkError
+from app.conditional import NotModifiedError
+from app.pagination import InvalidCursorError
+from app.projections import InvalidFieldsError
+
 
 def not_found_error_handler(_: Request[Any, Any, Any], __: NotFoundError) -> Response[Any]:
     """Handle not found errors."""
@@ -20,3 +25,40 @@ def duplicate_error_handler(_: Request[Any, Any, Any], __: DuplicateKeyError) ->
         status_code=404,
         content={"status_code": 404, "detail": "Already exists"},
     )
+
+
+def invalid_cursor_error_handler(_: Request[Any, Any, Any], __: InvalidCursorError) -> Response[Any]:
+    """Handle malformed pagination cursors."""
+    return Response(
+        status_code=400,
+        content={"status_code": 400, "detail": "Invalid cursor"},
+    )
+
+
+def invalid_fields_error_handler(_: Request[Any, Any, Any], exc: InvalidFieldsError) -> Response[Any]:
+    """Handle unknown names in ``fields``/``include``."""
+    return Response(
+        status_code=400,
+        content={"status_code": 400, "detail": f"Unknown fields: {exc}"},
+    )
+
+
+def not_modified_error_handler(_: Request[Any, Any, Any], exc: NotModifiedError) -> Response[Any]:
+    """Answer conditional GETs whose validators still match (no body)."""
+    return Response(content=b"", status_code=304, headers=exc.headers)
+
+
+def invalid_watermark_error_handler(_: Request[Any, Any, Any], __: InvalidWatermarkError) -> Response[Any]:
+    """Handle a ``since`` that is neither a watermark nor an ISO 8601 timestamp."""
+    return Response(
+        status_code=400,
+        content={"status_code": 400, "detail": "Invalid since"},
+    )
+
+
+def expired_watermark_error_handler(_: Request[Any, Any, Any], __: ExpiredWatermarkError) -> Response[Any]:
+    """Ask the client for a full resync: the tombstones it needs were purged."""
+    return Response(
+        status_code=410,
+        content={"status_code": 410, "detail": "Watermark expired, sync again without since"},
+    )
@@ -11,7 +11,9 @@ from litestar.security.jwt import OAuth2Login
 
 from app.dtos.user import UserLoginDTO
 from app.models import User
-from app.repositories.user import UserRepository, password_hasher, provide_user_repo
+from app.passwords import password_pool
+from app.repositories import resolve
+from app.repositories.user import AnyUserRepository, provide_user_repo
 from app.security import oauth2_auth
 
 
@@ -29,13 +31,18 @@ class AuthController(Controller):
     async def login(
         self,
         data: Annotated[User, Body(media_type=RequestEncodingType.URL_ENCODED)],
-        users_repo: UserRepository,
+        users_repo: AnyUserRepository,
     ) -> Response[OAuth2Login]:
         """Authenticate user and generate OAuth2 token."""
-        user = users_repo.get_one_or_none(username=data.username)
+        user = await resolve(users_repo.get_one_or_none(username=data.username))
 
         if user is not None:
-            if password_hasher.verify(data.password, user.password):
+            valid, new_hash = await password_pool.verify_and_update(data.password, user.password)
+            if valid:
+                # Rehash transparente si cambiaron los parámetros de Argon2
+                if new_hash is not None:
+                    user.password = new_hash
+                    await resolve(users_repo.update(user))
                 return oauth2_auth.login(identifier=user.username)
 
         raise HTTPException(status_code=401, detail="Usuario o contraseña incorrectos")
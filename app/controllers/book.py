@@ -1,19 +1,49 @@
 """Controller for Book endpoints."""
 
-from typing import Annotated, Sequence
+import tempfile
+from typing import Annotated, Literal, Sequence
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from advanced_alchemy.filters import LimitOffset
-from litestar import Controller, delete, get, patch, post
+from litestar import Controller, Request, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
 from litestar.params import Parameter
+from litestar.response import Stream
 
-from app.controllers import duplicate_error_handler, not_found_error_handler
-from app.dtos.book import BookCreateDTO, BookReadDTO, BookUpdateDTO
-from app.models import Book, BookStats
-from app.repositories.book import BookRepository, provide_book_repo
+from app.changes import (
+    ChangeParams,
+    ChangeSet,
+    ExpiredWatermarkError,
+    InvalidWatermarkError,
+    provide_change_params,
+)
+from app.config import settings
+from app.controllers import (
+    duplicate_error_handler,
+    expired_watermark_error_handler,
+    invalid_cursor_error_handler,
+    invalid_fields_error_handler,
+    invalid_watermark_error_handler,
+    not_found_error_handler,
+    not_modified_error_handler,
+)
+from app.conditional import NotModifiedError, ValidatedResponse, check_conditional
+from app.dtos.book import (
+    BOOK_PROJECTION,
+    BookChangesDTO,
+    BookCreateDTO,
+    BookReadDTO,
+    BookUpdateDTO,
+)
+from app.exporter import BOOK_EXPORT_COLUMNS, ExportFormat, book_export_filters, stream_export
+from app.importer import ImportFormat, import_books
+from app.models import Book, BookImportReport, BookStats
+from app.pagination import CursorPage, InvalidCursorError, PageParams, provide_page_params
+from app.projections import InvalidFieldsError
+from app.repositories import resolve
+from app.repositories.book import AnyBookRepository, provide_book_repo
 
 
 class BookController(Controller):
@@ -21,28 +51,68 @@ class BookController(Controller):
 
     path = "/books"
     tags = ["books"]
+    response_class = ValidatedResponse
     return_dto = BookReadDTO
-    dependencies = {"books_repo": Provide(provide_book_repo)}
+    dependencies = {
+        "books_repo": Provide(provide_book_repo),
+        "page": Provide(provide_page_params),
+        "changes": Provide(provide_change_params),
+    }
     exception_handlers = {
         NotFoundError: not_found_error_handler,
         DuplicateKeyError: duplicate_error_handler,
+        InvalidCursorError: invalid_cursor_error_handler,
+        NotModifiedError: not_modified_error_handler,
+        InvalidWatermarkError: invalid_watermark_error_handler,
+        ExpiredWatermarkError: expired_watermark_error_handler,
+        InvalidFieldsError: invalid_fields_error_handler,
     }
 
-    @get("/")
-    async def list_books(self, books_repo: BookRepository) -> Sequence[Book]:
-        """Get all books."""
-        return books_repo.list()
+    @get("/", cache=settings.books_cache_ttl, opt={"cache_tags": ["books"]})
+    async def list_books(
+        self,
+        request: Request,
+        books_repo: AnyBookRepository,
+        page: PageParams,
+        fields: str | None = None,
+        include: str | None = None,
+    ) -> CursorPage[Book]:
+        """
+        Get a page of books; ``fields`` and ``include`` (comma separated) return a slim projection.
+        Supports conditional GET (``If-None-Match`` / ``If-Modified-Since``).
+        """
+        sparse = BOOK_PROJECTION.parse(fields, include)
+        validator = await resolve(books_repo.get_page_validator(page=page))
+        check_conditional(request, validator, collection=True)
+        if settings.fast_list_serialization:
+            return await resolve(
+                books_repo.list_encoded(
+                    page=page, projection=BOOK_PROJECTION, sparse=sparse or BOOK_PROJECTION.everything()
+                )
+            )
+        if sparse:
+            return await resolve(
+                books_repo.list_projected(page=page, projection=BOOK_PROJECTION, sparse=sparse)
+            )
+        return await resolve(books_repo.list_page(page=page))
 
-    @get("/{id:int}")
-    async def get_book(self, id: int, books_repo: BookRepository) -> Book:
-        """Get a book by ID."""
-        return books_repo.get(id)
+    @get("/{id:int}", cache=settings.books_cache_ttl, opt={"cache_tags": ["books"]})
+    async def get_book(
+        self,
+        request: Request,
+        id: int,
+        books_repo: AnyBookRepository,
+    ) -> Book:
+        """Get a book by ID (supports conditional GET)."""
+        validator = await resolve(books_repo.get_validator(Book.id == id))
+        check_conditional(request, validator)
+        return await resolve(books_repo.get(id))
 
-    @post("/", dto=BookCreateDTO)
+    @post("/", dto=BookCreateDTO, opt={"invalidates": ["books"]})
     async def create_book(
         self,
         data: DTOData[Book],
-        books_repo: BookRepository,
+        books_repo: AnyBookRepository,
     ) -> Book:
         """Create a new book."""
         payload = data.as_builtins()
@@ -70,14 +140,38 @@ class BookController(Controller):
                 detail="El language debe ser un código ISO 639-1 de 2 letras (ej: 'es', 'en', 'fr', 'de', 'it', etc.)",
             )
 
-        return books_repo.add(data.create_instance())
+        return await resolve(books_repo.add(data.create_instance()))
 
-    @patch("/{id:int}", dto=BookUpdateDTO)
+    @post(
+        "/import",
+        return_dto=None,
+        status_code=200,
+        request_max_body_size=settings.book_import_max_body_size,
+        opt={"invalidates": ["books"]},
+    )
+    async def import_books(
+        self,
+        request: Request,
+        books_repo: AnyBookRepository,
+        format: ImportFormat = "csv",
+    ) -> BookImportReport:
+        """
+        Bulk insert/update books (by isbn) from a CSV or NDJSON body.
+        Invalid rows are skipped and reported; the rest is loaded in batches.
+        """
+        # El cuerpo se vuelca a disco a medida que llega (no queda entero en memoria)
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as upload:
+            async for chunk in request.stream():
+                upload.write(chunk)
+            upload.seek(0)
+            return await import_books(books_repo, upload, format)
+
+    @patch("/{id:int}", dto=BookUpdateDTO, opt={"invalidates": ["books"]})
     async def update_book(
         self,
         id: int,
         data: DTOData[Book],
-        books_repo: BookRepository,
+        books_repo: AnyBookRepository,
     ) -> Book:
         """Update a book by ID."""
         payload = data.as_builtins()
@@ -98,70 +192,128 @@ class BookController(Controller):
                     detail="El language debe ser un código ISO 639-1 de 2 letras (ej: 'es', 'en', 'fr', 'de', 'it', etc.)",
                 )
 
-        book, _ = books_repo.get_and_update(match_fields="id", id=id, **payload)
+        book, _ = await resolve(books_repo.get_and_update(match_fields="id", id=id, **payload))
 
         return book
 
-    @delete("/{id:int}")
-    async def delete_book(self, id: int, books_repo: BookRepository) -> None:
+    @delete("/{id:int}", opt={"invalidates": ["books"]})
+    async def delete_book(self, id: int, books_repo: AnyBookRepository) -> None:
         """Delete a book by ID."""
-        books_repo.delete(id)
+        await resolve(books_repo.delete(id))
 
-    @get("/search/")
-    async def search_book_by_title(
+    @get("/changes", return_dto=BookChangesDTO, opt={"read_primary": True})
+    async def list_book_changes(
         self,
-        title: str,
-        books_repo: BookRepository,
-    ) -> Sequence[Book]:
-        """Search books by title."""
-        return books_repo.list(Book.title.ilike(f"%{title}%"))
+        books_repo: AnyBookRepository,
+        changes: ChangeParams,
+    ) -> ChangeSet[Book]:
+        """
+        Get the books changed and the ids deleted after ``since`` (delta sync).
+        Send ``next_since`` back as ``since``; repeat while ``has_more``.
+        Without ``since`` it starts a full sync.
+        """
+        return await resolve(books_repo.list_changes(changes))
+
+    @get("/export", return_dto=None)
+    async def export_books(
+        self,
+        format: ExportFormat = "ndjson",
+        language: str | None = None,
+        year_from: Annotated[int | None, Parameter(ge=0)] = None,
+        year_to: Annotated[int | None, Parameter(ge=0)] = None,
+    ) -> Stream:
+        """Stream every matching book as NDJSON (default) or CSV, in id order."""
+        filters = book_export_filters(language, year_from, year_to)
+        return stream_export(BOOK_EXPORT_COLUMNS, filters, format, "books")
+
+    @get("/search")
+    async def search_books(
+        self,
+        books_repo: AnyBookRepository,
+        page: PageParams,
+        q: str | None = None,
+        language: str | None = None,
+        title: str | None = None,
+        mode: Literal["fulltext", "fuzzy"] = "fulltext",
+        field: Literal["title", "author"] | None = None,
+        threshold: Annotated[float | None, Parameter(ge=0, le=1)] = None,
+    ) -> CursorPage[Book]:
+        """
+        Full-text search over title, author, description and publisher,
+        ordered by relevance. ``title`` keeps the old substring search by title.
+
+        ``mode=fuzzy`` tolerates typos: trigram similarity of ``q`` against the
+        title and author (or only ``field``), above ``threshold``.
+        """
+        if q and mode == "fuzzy":
+            return await resolve(
+                books_repo.fuzzy_search(
+                    q,
+                    page=page,
+                    threshold=threshold if threshold is not None else settings.trigram_similarity_threshold,
+                    fields=(field,) if field else ("title", "author"),
+                )
+            )
+
+        if q:
+            if language is not None and (len(language) != 2 or not language.isalpha()):
+                raise HTTPException(
+                    status_code=400,
+                    detail="El language debe ser un código ISO 639-1 de 2 letras (ej: 'es', 'en', 'fr', 'de', 'it', etc.)",
+                )
+            return await resolve(books_repo.full_text_search(q, page=page, language=language))
+
+        if title:
+            return await resolve(books_repo.list_page(Book.title.ilike(f"%{title}%"), page=page))
+
+        raise HTTPException(status_code=400, detail="Debe indicar q o title")
 
     @get("/filter")
     async def filter_books_by_year(
         self,
         year_from: Annotated[int, Parameter(query="from")],
         to: int,
-        books_repo: BookRepository,
+        books_repo: AnyBookRepository,
     ) -> Sequence[Book]:
         """Filter books by published year."""
-        return books_repo.list(Book.published_year.between(year_from, to))
+        return await resolve(books_repo.list(Book.published_year.between(year_from, to)))
 
     @get("/recent")
     async def get_recent_books(
         self,
         limit: Annotated[int, Parameter(query="limit", default=10, ge=1, le=50)],
-        books_repo: BookRepository,
+        books_repo: AnyBookRepository,
     ) -> Sequence[Book]:
         """Get most recent books."""
-        return books_repo.list(
-            LimitOffset(offset=0, limit=limit),
-            order_by=Book.created_at.desc(),
+        return await resolve(
+            books_repo.list(
+                LimitOffset(offset=0, limit=limit),
+                order_by=Book.created_at.desc(),
+            )
         )
 
-    @get("/stats")
+    @get("/top", cache=settings.books_cache_ttl, opt={"cache_tags": ["books"]})
+    async def get_top_books(
+        self,
+        books_repo: AnyBookRepository,
+        by: Literal["reviews", "rating"] = "reviews",
+        limit: Annotated[int, Parameter(query="limit", default=10, ge=1, le=50)] = 10,
+        min_reviews: Annotated[int, Parameter(query="min_reviews", default=1, ge=1)] = 1,
+    ) -> Sequence[Book]:
+        """Most reviewed or best rated books (``min_reviews`` only applies to ``by=rating``)."""
+        if by == "rating":
+            return await resolve(books_repo.get_best_rated_books(limit=limit, min_reviews=min_reviews))
+        return await resolve(books_repo.get_most_reviewed_books(limit=limit))
+
+    @get(
+        "/stats",
+        return_dto=None,
+        cache=settings.book_stats_cache_ttl,
+        opt={"cache_tags": ["books"]},
+    )
     async def get_book_stats(
         self,
-        books_repo: BookRepository,
+        books_repo: AnyBookRepository,
     ) -> BookStats:
         """Get statistics about books."""
-        total_books = books_repo.count()
-        if total_books == 0:
-            return BookStats(
-                total_books=0,
-                average_pages=0,
-                oldest_publication_year=None,
-                newest_publication_year=None,
-            )
-
-        books = books_repo.list()
-
-        average_pages = sum(book.pages for book in books) / total_books
-        oldest_year = min(book.published_year for book in books)
-        newest_year = max(book.published_year for book in books)
-
-        return BookStats(
-            total_books=total_books,
-            average_pages=average_pages,
-            oldest_publication_year=oldest_year,
-            newest_publication_year=newest_year,
-        )
+        return await resolve(books_repo.get_stats())
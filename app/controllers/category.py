@@ -1,17 +1,37 @@
 """Controller for Category endpoints."""
 
-from typing import Sequence
+from typing import Annotated
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
-from litestar import Controller, delete, get, patch, post
+from litestar import Controller, Request, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
+from litestar.params import Parameter
 
-from app.controllers import duplicate_error_handler, not_found_error_handler
+from app.changes import (
+    ChangeParams,
+    ChangeSet,
+    ExpiredWatermarkError,
+    InvalidWatermarkError,
+    provide_change_params,
+)
+from app.config import settings
+from app.controllers import (
+    duplicate_error_handler,
+    expired_watermark_error_handler,
+    invalid_cursor_error_handler,
+    invalid_watermark_error_handler,
+    not_found_error_handler,
+    not_modified_error_handler,
+)
+from app.conditional import NotModifiedError, ValidatedResponse, check_conditional
+from app.dtos.book import BookReadDTO
 from app.dtos.category import CategoryCreateDTO, CategoryReadDTO, CategoryUpdateDTO
-from app.models import Book, Category
-from app.repositories.book import BookRepository, provide_book_repo
-from app.repositories.category import CategoryRepository, provide_category_repo
+from app.models import Book, BookIds, Category, CategoryMembershipResult
+from app.pagination import CursorPage, InvalidCursorError, PageParams, provide_page_params
+from app.repositories import resolve
+from app.repositories.book import AnyBookRepository, BookSort, provide_book_repo
+from app.repositories.category import AnyCategoryRepository, provide_category_repo
 
 
 class CategoryController(Controller):
@@ -19,92 +39,197 @@ class CategoryController(Controller):
 
     path = "/categories"
     tags = ["categories"]
+    response_class = ValidatedResponse
     return_dto = CategoryReadDTO
     dependencies = {
         "categories_repo": Provide(provide_category_repo),
         "books_repo": Provide(provide_book_repo),
+        "page": Provide(provide_page_params),
+        "changes": Provide(provide_change_params),
     }
     exception_handlers = {
         NotFoundError: not_found_error_handler,
         DuplicateKeyError: duplicate_error_handler,
+        InvalidCursorError: invalid_cursor_error_handler,
+        NotModifiedError: not_modified_error_handler,
+        InvalidWatermarkError: invalid_watermark_error_handler,
+        ExpiredWatermarkError: expired_watermark_error_handler,
     }
 
-    @get("/")
-    async def list_categories(self, categories_repo: CategoryRepository) -> Sequence[Category]:
-        """Get all categories."""
-        return categories_repo.list()
+    @get("/", cache=settings.categories_cache_ttl, opt={"cache_tags": ["categories"]})
+    async def list_categories(
+        self,
+        request: Request,
+        categories_repo: AnyCategoryRepository,
+        page: PageParams,
+    ) -> CursorPage[Category]:
+        """Get a page of categories (supports conditional GET)."""
+        validator = await resolve(categories_repo.get_page_validator(page=page))
+        check_conditional(request, validator, collection=True)
+        return await resolve(categories_repo.list_page(page=page))
 
-    @get("/{id:int}")
-    async def get_category(self, id: int, categories_repo: CategoryRepository) -> Category:
-        """Get a category by ID."""
-        return categories_repo.get(id)
+    @get("/{id:int}", cache=settings.categories_cache_ttl, opt={"cache_tags": ["categories"]})
+    async def get_category(
+        self,
+        request: Request,
+        id: int,
+        categories_repo: AnyCategoryRepository,
+    ) -> Category:
+        """Get a category by ID (supports conditional GET)."""
+        validator = await resolve(categories_repo.get_validator(Category.id == id))
+        check_conditional(request, validator)
+        return await resolve(categories_repo.get(id))
 
-    @post("/", dto=CategoryCreateDTO)
+    @post("/", dto=CategoryCreateDTO, opt={"invalidates": ["categories"]})
     async def create_category(
         self,
         data: DTOData[Category],
-        categories_repo: CategoryRepository,
+        categories_repo: AnyCategoryRepository,
     ) -> Category:
         """Create a new category."""
-        return categories_repo.add(data.create_instance())
+        return await resolve(categories_repo.add(data.create_instance()))
 
-    @patch("/{id:int}", dto=CategoryUpdateDTO)
+    @patch("/{id:int}", dto=CategoryUpdateDTO, opt={"invalidates": ["categories", "books"]})
     async def update_category(
         self,
         id: int,
         data: DTOData[Category],
-        categories_repo: CategoryRepository,
+        categories_repo: AnyCategoryRepository,
     ) -> Category:
         """Update a category by ID."""
-        category, _ = categories_repo.get_and_update(
-            match_fields="id",
-            id=id,
-            **data.as_builtins(),
+        category, _ = await resolve(
+            categories_repo.get_and_update(
+                match_fields="id",
+                id=id,
+                **data.as_builtins(),
+            )
         )
 
         return category
 
-    @delete("/{id:int}")
-    async def delete_category(self, id: int, categories_repo: CategoryRepository) -> None:
+    @delete("/{id:int}", opt={"invalidates": ["categories", "books"]})
+    async def delete_category(self, id: int, categories_repo: AnyCategoryRepository) -> None:
         """Delete a category by ID."""
-        categories_repo.delete(id)
+        await resolve(categories_repo.delete(id))
 
-    @get("/{category_id:int}/books")
+    @get("/changes", opt={"read_primary": True})
+    async def list_category_changes(
+        self,
+        categories_repo: AnyCategoryRepository,
+        changes: ChangeParams,
+    ) -> ChangeSet[Category]:
+        """
+        Get the categories changed and the ids deleted after ``since`` (delta sync).
+        Send ``next_since`` back as ``since``; repeat while ``has_more``.
+        Without ``since`` it starts a full sync.
+        """
+        return await resolve(categories_repo.list_changes(changes))
+
+    @get(
+        "/{category_id:int}/books",
+        return_dto=BookReadDTO,
+        cache=settings.books_cache_ttl,
+        opt={"cache_tags": ["books"]},
+    )
     async def get_books_by_category(
         self,
         category_id: int,
-        categories_repo: CategoryRepository,
-    ) -> Sequence[Book]:
-        """Get all books in a category."""
-        category = categories_repo.get(category_id)
-        return category.books
+        categories_repo: AnyCategoryRepository,
+        books_repo: AnyBookRepository,
+        page: PageParams,
+        available: bool = False,
+        language: str | None = None,
+        year_from: Annotated[int | None, Parameter(ge=0)] = None,
+        year_to: Annotated[int | None, Parameter(ge=0)] = None,
+        sort: BookSort = "id",
+    ) -> CursorPage[Book]:
+        """
+        Get a page of the books in a category.
+        ``available`` keeps only books with stock; ``sort`` accepts id, title,
+        published_year or -published_year.
+        """
+        books = await resolve(
+            books_repo.find_by_category(
+                category_id,
+                page=page,
+                available=available,
+                language=language,
+                year_from=year_from,
+                year_to=year_to,
+                sort=sort,
+            )
+        )
+        if not books.items and page.cursor is None:
+            await resolve(categories_repo.get(category_id))  # NotFoundError -> 404
 
-    @post("/{category_id:int}/books/{book_id:int}")
+        return books
+
+    @post("/{category_id:int}/books/{book_id:int}", opt={"invalidates": ["books"]})
     async def add_book_to_category(
         self,
         category_id: int,
         book_id: int,
-        categories_repo: CategoryRepository,
-        books_repo: BookRepository,
+        categories_repo: AnyCategoryRepository,
+        books_repo: AnyBookRepository,
     ) -> Category:
         """Add a book to a category."""
-        category = categories_repo.get(category_id)
-        book = books_repo.get(book_id)
-        
-        if book not in category.books:
-            category.books.append(book)
-            categories_repo.update(category)
-        
+        category = await resolve(categories_repo.get(category_id))
+        added = await resolve(categories_repo.add_books(category_id, [book_id]))
+        if not added:
+            await resolve(books_repo.get(book_id))  # NotFoundError -> 404; si existe, ya estaba
+
         return category
 
-    @delete("/{category_id:int}/books/{book_id:int}")
+    @delete("/{category_id:int}/books/{book_id:int}", opt={"invalidates": ["books"]})
     async def remove_book_from_category(
         self,
         category_id: int,
         book_id: int,
-        categories_repo: CategoryRepository,
+        categories_repo: AnyCategoryRepository,
     ) -> None:
         """Remove a book from a category."""
-        category = categories_repo.get(category_id)
-        category.books = [b for b in category.books if b.id != book_id]
-        categories_repo.update(category)
+        removed = await resolve(categories_repo.remove_books(category_id, [book_id]))
+        if not removed:
+            await resolve(categories_repo.get(category_id))  # NotFoundError -> 404
+
+    @post(
+        "/{category_id:int}/books",
+        return_dto=None,
+        status_code=200,
+        opt={"invalidates": ["books"]},
+    )
+    async def add_books_to_category(
+        self,
+        category_id: int,
+        data: BookIds,
+        categories_repo: AnyCategoryRepository,
+    ) -> CategoryMembershipResult:
+        """Add many books to a category in one statement (unknown IDs are ignored)."""
+        await resolve(categories_repo.get(category_id))
+        added = await resolve(categories_repo.add_books(category_id, data.book_ids))
+        return CategoryMembershipResult(
+            category_id=category_id,
+            requested=len(data.book_ids),
+            changed=added,
+        )
+
+    @post(
+        "/{category_id:int}/books/remove",
+        return_dto=None,
+        status_code=200,
+        opt={"invalidates": ["books"]},
+    )
+    async def remove_books_from_category(
+        self,
+        category_id: int,
+        data: BookIds,
+        categories_repo: AnyCategoryRepository,
+    ) -> CategoryMembershipResult:
+        """Remove many books from a category in one statement."""
+        await resolve(categories_repo.get(category_id))
+        removed = await resolve(categories_repo.remove_books(category_id, data.book_ids))
+        return CategoryMembershipResult(
+            category_id=category_id,
+            requested=len(data.book_ids),
+            changed=removed,
+        )
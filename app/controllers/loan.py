@@ -1,19 +1,47 @@
 """Controller for Loan endpoints."""
 
-from datetime import timedelta
+from datetime import date, timedelta
 from decimal import Decimal
-from typing import Sequence
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
-from litestar import Controller, delete, get, patch, post
+from litestar import Controller, Request, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
-
-from app.controllers import duplicate_error_handler, not_found_error_handler
-from app.dtos.loan import LoanCreateDTO, LoanReadDTO, LoanUpdateDTO
+from litestar.response import Stream
+
+from app.changes import (
+    ChangeParams,
+    ChangeSet,
+    ExpiredWatermarkError,
+    InvalidWatermarkError,
+    provide_change_params,
+)
+from app.config import settings
+from app.controllers import (
+    duplicate_error_handler,
+    expired_watermark_error_handler,
+    invalid_cursor_error_handler,
+    invalid_fields_error_handler,
+    invalid_watermark_error_handler,
+    not_found_error_handler,
+    not_modified_error_handler,
+)
+from app.conditional import NotModifiedError, ValidatedResponse, check_conditional
+from app.dtos.loan import (
+    LOAN_PROJECTION,
+    LoanChangesDTO,
+    LoanCreateDTO,
+    LoanReadDTO,
+    LoanUpdateDTO,
+)
+from app.exporter import LOAN_EXPORT_COLUMNS, ExportFormat, loan_export_filters, stream_export
 from app.models import Loan, LoanStatus
-from app.repositories.loan import LoanRepository, provide_loan_repo
+from app.pagination import CursorPage, InvalidCursorError, PageParams, provide_page_params
+from app.projections import InvalidFieldsError
+from app.repositories import resolve
+from app.repositories.book import AnyBookRepository, provide_book_repo
+from app.repositories.loan import AnyLoanRepository, provide_loan_repo
 
 
 class LoanController(Controller):
@@ -21,30 +49,72 @@ class LoanController(Controller):
 
     path = "/loans"
     tags = ["loans"]
+    response_class = ValidatedResponse
     return_dto = LoanReadDTO
-    dependencies = {"loans_repo": Provide(provide_loan_repo)}
+    dependencies = {
+        "loans_repo": Provide(provide_loan_repo),
+        "books_repo": Provide(provide_book_repo),
+        "page": Provide(provide_page_params),
+        "changes": Provide(provide_change_params),
+    }
     exception_handlers = {
         NotFoundError: not_found_error_handler,
         DuplicateKeyError: duplicate_error_handler,
+        InvalidCursorError: invalid_cursor_error_handler,
+        NotModifiedError: not_modified_error_handler,
+        InvalidWatermarkError: invalid_watermark_error_handler,
+        ExpiredWatermarkError: expired_watermark_error_handler,
+        InvalidFieldsError: invalid_fields_error_handler,
     }
 
     @get("/")
-    async def list_loans(self, loans_repo: LoanRepository) -> Sequence[Loan]:
-        """Get all loans."""
-        return loans_repo.list()
+    async def list_loans(
+        self,
+        request: Request,
+        loans_repo: AnyLoanRepository,
+        page: PageParams,
+        fields: str | None = None,
+        include: str | None = None,
+    ) -> CursorPage[Loan]:
+        """
+        Get a page of loans; ``fields`` and ``include`` (comma separated) return a slim projection.
+        Supports conditional GET (``If-None-Match`` / ``If-Modified-Since``).
+        """
+        sparse = LOAN_PROJECTION.parse(fields, include)
+        validator = await resolve(loans_repo.get_page_validator(page=page))
+        check_conditional(request, validator, collection=True)
+        if settings.fast_list_serialization:
+            return await resolve(
+                loans_repo.list_encoded(
+                    page=page, projection=LOAN_PROJECTION, sparse=sparse or LOAN_PROJECTION.everything()
+                )
+            )
+        if sparse:
+            return await resolve(
+                loans_repo.list_projected(page=page, projection=LOAN_PROJECTION, sparse=sparse)
+            )
+        return await resolve(loans_repo.list_page(page=page))
 
     @get("/{id:int}")
-    async def get_loan(self, id: int, loans_repo: LoanRepository) -> Loan:
-        """Get a loan by ID."""
-        return loans_repo.get(id)
+    async def get_loan(
+        self,
+        request: Request,
+        id: int,
+        loans_repo: AnyLoanRepository,
+    ) -> Loan:
+        """Get a loan by ID (supports conditional GET)."""
+        validator = await resolve(loans_repo.get_validator(Loan.id == id))
+        check_conditional(request, validator)
+        return await resolve(loans_repo.get(id))
 
-    @post("/", dto=LoanCreateDTO)
+    @post("/", dto=LoanCreateDTO, opt={"invalidates": ["books"]})
     async def create_loan(
         self,
         data: DTOData[Loan],
-        loans_repo: LoanRepository,
+        loans_repo: AnyLoanRepository,
+        books_repo: AnyBookRepository,
     ) -> Loan:
-        """Create a new loan."""
+        """Create a new loan, reserving one copy of the book."""
         loan = data.create_instance()
 
         if loan.loan_dt is None:
@@ -59,52 +129,122 @@ class LoanController(Controller):
         # la multa se calcula después, así que por ahora None
         loan.fine_amount = None
 
-        return loans_repo.add(loan)
+        # Reserva atómica del ejemplar; se confirma en el mismo commit que el préstamo
+        stock = await resolve(books_repo.reserve_copy(loan.book_id))
+        if stock is None:
+            await resolve(books_repo.get(loan.book_id))  # NotFoundError -> 404
+            raise HTTPException(status_code=409, detail="El libro no tiene stock disponible")
+
+        return await resolve(loans_repo.add(loan))
 
-    @patch("/{id:int}", dto=LoanUpdateDTO)
+    @patch("/{id:int}", dto=LoanUpdateDTO, opt={"invalidates": ["books"]})
     async def update_loan(
         self,
         id: int,
         data: DTOData[Loan],
-        loans_repo: LoanRepository,
+        loans_repo: AnyLoanRepository,
     ) -> Loan:
-        """Update a loan by ID."""
-        loan, _ = loans_repo.get_and_update(match_fields="id", id=id, **data.as_builtins())
-
+        """
+        Update a loan by ID.
+        Moving to or from RETURNED goes through the return / a new reservation, so the
+        book's stock follows the loan (409 if already returned or out of stock).
+        """
+        status = data.as_builtins().get("status")
+        loan = await resolve(loans_repo.get(id))
+        if status is None or status == loan.status:
+            return loan
+
+        if status == LoanStatus.RETURNED:
+            returned = await resolve(loans_repo.return_book(loan_id=id))
+            if returned is None:
+                raise HTTPException(status_code=409, detail="El préstamo ya fue devuelto")
+            return returned
+
+        if loan.status == LoanStatus.RETURNED:
+            reopened = await resolve(loans_repo.reopen_loan(loan_id=id, status=status))
+            if reopened is None:
+                raise HTTPException(status_code=409, detail="El libro no tiene stock disponible")
+            return reopened
+
+        loan, _ = await resolve(loans_repo.get_and_update(match_fields="id", id=id, status=status))
         return loan
 
-    @delete("/{id:int}")
-    async def delete_loan(self, id: int, loans_repo: LoanRepository) -> None:
+    @delete("/{id:int}", opt={"invalidates": ["books"]})
+    async def delete_loan(self, id: int, loans_repo: AnyLoanRepository) -> None:
         """Delete a loan by ID."""
-        loans_repo.delete(id)
+        await resolve(loans_repo.delete_loan(id))
+
+    @get("/changes", return_dto=LoanChangesDTO, opt={"read_primary": True})
+    async def list_loan_changes(
+        self,
+        loans_repo: AnyLoanRepository,
+        changes: ChangeParams,
+    ) -> ChangeSet[Loan]:
+        """
+        Get the loans changed and the ids deleted after ``since`` (delta sync).
+        Send ``next_since`` back as ``since``; repeat while ``has_more``.
+        Without ``since`` it starts a full sync.
+        """
+        return await resolve(loans_repo.list_changes(changes))
+
+    @get("/export", return_dto=None)
+    async def export_loans(
+        self,
+        format: ExportFormat = "ndjson",
+        date_from: date | None = None,
+        date_to: date | None = None,
+        status: LoanStatus | None = None,
+        user_id: int | None = None,
+        book_id: int | None = None,
+    ) -> Stream:
+        """
+        Stream every matching loan as NDJSON (default) or CSV, in id order.
+        ``date_from``/``date_to`` filter by ``loan_dt`` (inclusive).
+        """
+        filters = loan_export_filters(date_from, date_to, status, user_id, book_id)
+        return stream_export(LOAN_EXPORT_COLUMNS, filters, format, "loans")
 
     @get("/active")
-    async def get_active_loans(self, loans_repo: LoanRepository) -> list[Loan]:
+    async def get_active_loans(self, loans_repo: AnyLoanRepository) -> list[Loan]:
         """Listar préstamos activos."""
-        return list(loans_repo.get_active_loans())
+        return list(await resolve(loans_repo.get_active_loans()))
 
     @get("/overdue")
-    async def get_overdue_loans(self, loans_repo: LoanRepository) -> list[Loan]:
+    async def get_overdue_loans(self, loans_repo: AnyLoanRepository, page: PageParams) -> CursorPage[Loan]:
         """
-        Listar préstamos vencidos.
-        Esta operación también actualiza el status a OVERDUE en la base de datos.
+        Listar préstamos vencidos (paginado).
+        El status OVERDUE lo actualiza el barrido periódico (app.scheduler), no esta consulta.
         """
-        return list(loans_repo.get_overdue_loans())
+        return await resolve(loans_repo.get_overdue_loans(page=page))
 
     @get("/user/{user_id:int}")
-    async def get_user_loan_history(self, user_id: int, loans_repo: LoanRepository) -> list[Loan]:
-        """Historial de préstamos de un usuario."""
-        return list(loans_repo.get_user_loan_history(user_id=user_id))
-
-    @post("/{loan_id:int}/return")
-    async def return_loan(self, loan_id: int, loans_repo: LoanRepository) -> Loan:
+    async def get_user_loan_history(
+        self,
+        request: Request,
+        user_id: int,
+        loans_repo: AnyLoanRepository,
+        page: PageParams,
+    ) -> CursorPage[Loan]:
+        """Historial de préstamos de un usuario (con GET condicional para el polling)."""
+        validator = await resolve(
+            loans_repo.get_user_loan_history_validator(user_id=user_id, page=page)
+        )
+        check_conditional(request, validator, collection=True)
+        history = await resolve(loans_repo.get_user_loan_history(user_id=user_id, page=page))
+        return history
+
+    @post("/{loan_id:int}/return", opt={"invalidates": ["books"]})
+    async def return_loan(self, loan_id: int, loans_repo: AnyLoanRepository) -> Loan:
         """Procesar devolución de un préstamo."""
-        return loans_repo.return_book(loan_id=loan_id)
+        loan = await resolve(loans_repo.return_book(loan_id=loan_id))
+        if loan is None:
+            raise HTTPException(status_code=409, detail="El préstamo ya fue devuelto")
+        return loan
 
     @get("/{loan_id:int}/fine", return_dto=None)
-    async def get_loan_fine(self, loan_id: int, loans_repo: LoanRepository) -> dict:
+    async def get_loan_fine(self, loan_id: int, loans_repo: AnyLoanRepository) -> dict:
         """Calcular y mostrar la multa de un préstamo."""
-        fine: Decimal = loans_repo.calculate_fine(loan_id=loan_id)
+        fine: Decimal = await resolve(loans_repo.calculate_fine(loan_id=loan_id))
         return {
             "loan_id": loan_id,
             "fine_amount": str(fine),
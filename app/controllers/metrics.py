@@ -0,0 +1,29 @@
+"""Controller for runtime metrics endpoints."""
+
+from typing import Any
+
+from litestar import Controller, get
+
+from app.cache import auth_user_cache, response_cache
+from app.db import pool_stats, replica_router
+from app.passwords import password_pool
+from app.scheduler import scheduler
+
+
+class MetricsController(Controller):
+    """Controller exposing in-process performance counters."""
+
+    path = "/metrics"
+    tags = ["metrics"]
+
+    @get("/")
+    async def get_metrics(self) -> dict[str, Any]:
+        """Get queue, cache and connection pool counters of this worker."""
+        return {
+            "password_hashing": password_pool.stats(),
+            "auth_user_cache": auth_user_cache.stats(),
+            "response_cache": response_cache.stats(),
+            "scheduler": scheduler.stats(),
+            "db_pool": pool_stats(),
+            "db_replicas": replica_router.stats(),
+        }
@@ -1,17 +1,30 @@
 """Controller for Review endpoints."""
 
-from typing import Sequence
+from datetime import date
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
-from litestar import Controller, delete, get, patch, post
+from litestar import Controller, Request, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
+from litestar.response import Stream
 
-from app.controllers import duplicate_error_handler, not_found_error_handler
-from app.dtos.review import ReviewCreateDTO, ReviewReadDTO, ReviewUpdateDTO
+from app.config import settings
+from app.controllers import (
+    duplicate_error_handler,
+    invalid_cursor_error_handler,
+    invalid_fields_error_handler,
+    not_found_error_handler,
+    not_modified_error_handler,
+)
+from app.conditional import NotModifiedError, ValidatedResponse, check_conditional
+from app.dtos.review import REVIEW_PROJECTION, ReviewCreateDTO, ReviewReadDTO, ReviewUpdateDTO
+from app.exporter import REVIEW_EXPORT_COLUMNS, ExportFormat, review_export_filters, stream_export
 from app.models import Review
-from app.repositories.review import ReviewRepository, provide_review_repo
+from app.pagination import CursorPage, InvalidCursorError, PageParams, provide_page_params
+from app.projections import InvalidFieldsError
+from app.repositories import resolve
+from app.repositories.review import AnyReviewRepository, provide_review_repo
 
 
 class ReviewController(Controller):
@@ -19,28 +32,81 @@ class ReviewController(Controller):
 
     path = "/reviews"
     tags = ["reviews"]
+    response_class = ValidatedResponse
     return_dto = ReviewReadDTO
-    dependencies = {"reviews_repo": Provide(provide_review_repo)}
+    dependencies = {
+        "reviews_repo": Provide(provide_review_repo),
+        "page": Provide(provide_page_params),
+    }
     exception_handlers = {
         NotFoundError: not_found_error_handler,
         DuplicateKeyError: duplicate_error_handler,
+        InvalidCursorError: invalid_cursor_error_handler,
+        NotModifiedError: not_modified_error_handler,
+        InvalidFieldsError: invalid_fields_error_handler,
     }
 
     @get("/")
-    async def list_reviews(self, reviews_repo: ReviewRepository) -> Sequence[Review]:
-        """Get all reviews."""
-        return reviews_repo.list()
+    async def list_reviews(
+        self,
+        request: Request,
+        reviews_repo: AnyReviewRepository,
+        page: PageParams,
+        fields: str | None = None,
+        include: str | None = None,
+    ) -> CursorPage[Review]:
+        """
+        Get a page of reviews; ``fields`` and ``include`` (comma separated) return a slim projection.
+        Supports conditional GET (``If-None-Match`` / ``If-Modified-Since``).
+        """
+        sparse = REVIEW_PROJECTION.parse(fields, include)
+        validator = await resolve(reviews_repo.get_page_validator(page=page))
+        check_conditional(request, validator, collection=True)
+        if settings.fast_list_serialization:
+            return await resolve(
+                reviews_repo.list_encoded(
+                    page=page, projection=REVIEW_PROJECTION, sparse=sparse or REVIEW_PROJECTION.everything()
+                )
+            )
+        if sparse:
+            return await resolve(
+                reviews_repo.list_projected(page=page, projection=REVIEW_PROJECTION, sparse=sparse)
+            )
+        return await resolve(reviews_repo.list_page(page=page))
 
     @get("/{id:int}")
-    async def get_review(self, id: int, reviews_repo: ReviewRepository) -> Review:
-        """Get a review by ID."""
-        return reviews_repo.get(id)
+    async def get_review(
+        self,
+        request: Request,
+        id: int,
+        reviews_repo: AnyReviewRepository,
+    ) -> Review:
+        """Get a review by ID (supports conditional GET)."""
+        validator = await resolve(reviews_repo.get_validator(Review.id == id))
+        check_conditional(request, validator)
+        return await resolve(reviews_repo.get(id))
+
+    @get("/export", return_dto=None)
+    async def export_reviews(
+        self,
+        format: ExportFormat = "ndjson",
+        date_from: date | None = None,
+        date_to: date | None = None,
+        user_id: int | None = None,
+        book_id: int | None = None,
+    ) -> Stream:
+        """
+        Stream every matching review as NDJSON (default) or CSV, in id order.
+        ``date_from``/``date_to`` filter by ``review_date`` (inclusive).
+        """
+        filters = review_export_filters(date_from, date_to, user_id, book_id)
+        return stream_export(REVIEW_EXPORT_COLUMNS, filters, format, "reviews")
 
-    @post("/", dto=ReviewCreateDTO)
+    @post("/", dto=ReviewCreateDTO, opt={"invalidates": ["books"]})
     async def create_review(
         self,
         data: DTOData[Review],
-        reviews_repo: ReviewRepository,
+        reviews_repo: AnyReviewRepository,
     ) -> Review:
         """Create a new review."""
         payload = data.as_builtins()
@@ -52,14 +118,14 @@ class ReviewController(Controller):
                 status_code=400,
             )
 
-        return reviews_repo.add(data.create_instance())
+        return await resolve(reviews_repo.add_review(data.create_instance()))
 
-    @patch("/{id:int}", dto=ReviewUpdateDTO)
+    @patch("/{id:int}", dto=ReviewUpdateDTO, opt={"invalidates": ["books"]})
     async def update_review(
         self,
         id: int,
         data: DTOData[Review],
-        reviews_repo: ReviewRepository,
+        reviews_repo: AnyReviewRepository,
     ) -> Review:
         """Update a review by ID."""
         # Si viene rating en el patch, validamos también
@@ -71,14 +137,9 @@ class ReviewController(Controller):
                 status_code=400,
             )
 
-        review, _ = reviews_repo.get_and_update(
-            match_fields="id",
-            id=id,
-            **payload,
-        )
-        return review
+        return await resolve(reviews_repo.update_review(id, payload))
 
-    @delete("/{id:int}")
-    async def delete_review(self, id: int, reviews_repo: ReviewRepository) -> None:
+    @delete("/{id:int}", opt={"invalidates": ["books"]})
+    async def delete_review(self, id: int, reviews_repo: AnyReviewRepository) -> None:
         """Delete a review by ID."""
-        reviews_repo.delete(id)
+        await resolve(reviews_repo.delete_review(id))
@@ -1,18 +1,30 @@
 """Controller for User endpoints."""
 
 import re
-from typing import Sequence
+from typing import Annotated
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from litestar import Controller, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
-
-from app.controllers import duplicate_error_handler, not_found_error_handler
-from app.dtos.user import UserCreateDTO, UserReadDTO, UserUpdateDTO
+from litestar.params import Parameter
+
+from app.cache import auth_user_cache
+from app.config import settings
+from app.controllers import (
+    duplicate_error_handler,
+    invalid_cursor_error_handler,
+    invalid_fields_error_handler,
+    not_found_error_handler,
+)
+from app.dtos.user import USER_PROJECTION, UserCreateDTO, UserReadDTO, UserUpdateDTO
 from app.models import PasswordUpdate, User
-from app.repositories.user import UserRepository, provide_user_repo
+from app.pagination import CursorPage, InvalidCursorError, PageParams, provide_page_params
+from app.projections import InvalidFieldsError
+from app.passwords import password_pool
+from app.repositories import resolve
+from app.repositories.user import AnyUserRepository, provide_user_repo
 
 
 EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
@@ -24,27 +36,65 @@ class UserController(Controller):
     path = "/users"
     tags = ["users"]
     return_dto = UserReadDTO
-    dependencies = {"users_repo": Provide(provide_user_repo)}
+    dependencies = {
+        "users_repo": Provide(provide_user_repo),
+        "page": Provide(provide_page_params),
+    }
     exception_handlers = {
         NotFoundError: not_found_error_handler,
         DuplicateKeyError: duplicate_error_handler,
+        InvalidCursorError: invalid_cursor_error_handler,
+        InvalidFieldsError: invalid_fields_error_handler,
     }
 
     @get("/")
-    async def list_users(self, users_repo: UserRepository) -> Sequence[User]:
-        """Get all users."""
-        return users_repo.list()
+    async def list_users(
+        self,
+        users_repo: AnyUserRepository,
+        page: PageParams,
+        fields: str | None = None,
+    ) -> CursorPage[User]:
+        """Get a page of users; ``fields`` (comma separated) returns a slim projection."""
+        sparse = USER_PROJECTION.parse(fields, None)
+        if settings.fast_list_serialization:
+            return await resolve(
+                users_repo.list_encoded(
+                    page=page, projection=USER_PROJECTION, sparse=sparse or USER_PROJECTION.everything()
+                )
+            )
+        if sparse:
+            return await resolve(
+                users_repo.list_projected(page=page, projection=USER_PROJECTION, sparse=sparse)
+            )
+        return await resolve(users_repo.list_page(page=page))
+
+    @get("/search")
+    async def search_users(
+        self,
+        users_repo: AnyUserRepository,
+        page: PageParams,
+        q: str,
+        threshold: Annotated[float | None, Parameter(ge=0, le=1)] = None,
+    ) -> CursorPage[User]:
+        """Fuzzy search of users by username or full name, most similar first."""
+        return await resolve(
+            users_repo.fuzzy_search(
+                q,
+                page=page,
+                threshold=threshold if threshold is not None else settings.trigram_similarity_threshold,
+            )
+        )
 
     @get("/{id:int}")
-    async def get_user(self, id: int, users_repo: UserRepository) -> User:
+    async def get_user(self, id: int, users_repo: AnyUserRepository) -> User:
         """Get a user by ID."""
-        return users_repo.get(id)
+        return await resolve(users_repo.get(id))
 
     @post("/", dto=UserCreateDTO)
     async def create_user(
         self,
         data: DTOData[User],
-        users_repo: UserRepository,
+        users_repo: AnyUserRepository,
     ) -> User:
         """Create a new user."""
         payload = data.as_builtins()
@@ -56,17 +106,22 @@ class UserController(Controller):
                 detail="El email no tiene un formato válido",
             )
 
-        return users_repo.add_with_hashed_password(data)
+        hashed_password = await password_pool.hash(payload["password"])
+
+        return await resolve(users_repo.add_with_hashed_password(data, hashed_password))
 
-    @patch("/{id:int}", dto=UserUpdateDTO)
+    @patch("/{id:int}", dto=UserUpdateDTO, opt={"invalidates": ["books"]})
     async def update_user(
         self,
         id: int,
         data: DTOData[User],
-        users_repo: UserRepository,
+        users_repo: AnyUserRepository,
     ) -> User:
         """Update a user by ID."""
-        user, _ = users_repo.get_and_update(match_fields="id", id=id, **data.as_builtins())
+        user, _ = await resolve(
+            users_repo.get_and_update(match_fields="id", id=id, **data.as_builtins())
+        )
+        auth_user_cache.discard_where(lambda cached: cached.id == id)
 
         return user
 
@@ -75,21 +130,24 @@ class UserController(Controller):
         self,
         id: int,
         data: PasswordUpdate,
-        users_repo: UserRepository,
+        users_repo: AnyUserRepository,
     ) -> None:
         """Update a user's password."""
-        user = users_repo.get(id)
+        user = await resolve(users_repo.get(id))
 
-        if user.password != data.current_password:
+        valid, _ = await password_pool.verify_and_update(data.current_password, user.password)
+        if not valid:
             raise HTTPException(
                 detail="Contraseña incorrecta",
                 status_code=401,
             )
 
-        user.password = data.new_password
-        users_repo.update(user)
+        user.password = await password_pool.hash(data.new_password)
+        await resolve(users_repo.update(user))
+        auth_user_cache.discard_where(lambda cached: cached.id == id)
 
-    @delete("/{id:int}")
-    async def delete_user(self, id: int, users_repo: UserRepository) -> None:
+    @delete("/{id:int}", opt={"invalidates": ["books"]})
+    async def delete_user(self, id: int, users_repo: AnyUserRepository) -> None:
         """Delete a user by ID."""
-        users_repo.delete(id)
+        await resolve(users_repo.delete(id))
+        auth_user_cache.discard_where(lambda cached: cached.id == id)
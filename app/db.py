@@ -1,9 +1,339 @@
-"""Database configuration with SQLAlchemy."""
+"""Database configuration with SQLAlchemy.
 
-from advanced_alchemy.extensions.litestar import SQLAlchemyPlugin, SQLAlchemySyncConfig
+With ``replica_database_urls`` set, sessions are ``RoutingSession``: the safe
+GET/HEAD requests marked by ``ReplicaRoutingMiddleware`` read from a replica
+whose lag (measured in the background by ``replica_router``) is within
+``replica_max_lag_seconds``; writes, flushes, every other request and the
+requests of a client that has just written stay on the primary.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from typing import Any
+
+from advanced_alchemy.extensions.litestar import (
+    AsyncSessionConfig,
+    EngineConfig,
+    SQLAlchemyAsyncConfig,
+    SQLAlchemyPlugin,
+    SQLAlchemySyncConfig,
+    SyncSessionConfig,
+)
+from litestar.enums import ScopeType
+from litestar.middleware import ASGIMiddleware
+from litestar.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import Delete, Engine, Insert, Update, create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, PoolMetrics, PoolStats
+
+logger = logging.getLogger(__name__)
+
+# Cookie con el instante (epoch) hasta el que el cliente lee del primario
+PRIMARY_COOKIE = "db_primary_until"
+
+_SAFE_METHODS = ("GET", "HEAD")
+
+# True mientras se atiende una request que puede leer de una réplica
+_read_from_replica: ContextVar[bool] = ContextVar("read_from_replica", default=False)
+
+# Segundos de retraso de una réplica: 0 si ya aplicó todo lo recibido
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+def _connect_args(url: str) -> dict[str, Any]:
+    """statement_timeout / idle_in_transaction_session_timeout de cada conexión (libpq ``options``)."""
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+    options = [
+        f"-c {name}={value}"
+        for name, value in (
+            ("statement_timeout", settings.db_statement_timeout_ms),
+            ("idle_in_transaction_session_timeout", settings.db_idle_in_transaction_timeout_ms),
+        )
+        if value
+    ]
+    return {"options": " ".join(options)} if options else {}
+
+
+def _pool_options(metrics: PoolMetrics) -> dict[str, Any]:
+    # Cada engine (primario y réplicas) cuenta sus checkouts en su propio PoolMetrics
+    poolclass = InstrumentedAsyncQueuePool if settings.database_async else InstrumentedQueuePool
+    return {
+        "poolclass": poolclass.with_metrics(metrics),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+@dataclass
+class ReplicaStats:
+    """Health and usage of one read replica in this worker."""
+
+    url: str
+    healthy: bool
+    lag_seconds: float | None
+    checked_at: datetime | None
+    sessions: int
+    errors: int
+    pool: PoolStats
+
+
+class Replica:
+    """Engine de una réplica y su último retraso medido."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.pool_metrics = PoolMetrics()
+        if settings.database_async:
+            self.engine: Engine | AsyncEngine = create_async_engine(
+                url, connect_args=_connect_args(url), **_pool_options(self.pool_metrics)
+            )
+            self.sync_engine = self.engine.sync_engine
+        else:
+            self.engine = self.sync_engine = create_engine(
+                url, connect_args=_connect_args(url), **_pool_options(self.pool_metrics)
+            )
+        # Hasta la primera medición no se usa
+        self.healthy = False
+        self.lag_seconds: float | None = None
+        self.checked_at: datetime | None = None
+        self.sessions = 0
+        self.errors = 0
+        event.listen(self.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context: Any) -> None:
+        # Conexión caída: se deja de usar hasta que la próxima medición la vea sana
+        if context.is_disconnect:
+            self.healthy = False
+
+    def _lag_stmt(self):
+        if self.sync_engine.dialect.name != "postgresql":
+            return text("SELECT 0")
+        return _REPLICA_LAG_SQL
+
+    def _measure_sync(self) -> float:
+        with self.sync_engine.connect() as conn:
+            return float(conn.scalar(self._lag_stmt()) or 0)
+
+    async def _measure(self) -> float:
+        if isinstance(self.engine, AsyncEngine):
+            async with self.engine.connect() as conn:
+                return float(await conn.scalar(self._lag_stmt()) or 0)
+        return await asyncio.to_thread(self._measure_sync)
+
+    async def check(self) -> None:
+        """Medir el retraso; una réplica que no responde queda fuera de la rotación."""
+        try:
+            self.lag_seconds = await self._measure()
+            self.healthy = True
+        except Exception:
+            self.errors += 1
+            self.healthy = False
+            self.lag_seconds = None
+            logger.warning("Read replica %s is unavailable", self.display_url, exc_info=True)
+        self.checked_at = datetime.now(timezone.utc)
+
+    @property
+    def usable(self) -> bool:
+        return (
+            self.healthy
+            and self.lag_seconds is not None
+            and self.lag_seconds <= settings.replica_max_lag_seconds
+        )
+
+    @property
+    def display_url(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+    def stats(self) -> ReplicaStats:
+        return ReplicaStats(
+            url=self.display_url,
+            healthy=self.healthy,
+            lag_seconds=self.lag_seconds,
+            checked_at=self.checked_at,
+            sessions=self.sessions,
+            errors=self.errors,
+            pool=self.pool_metrics.stats(self.sync_engine.pool),
+        )
+
+
+class ReplicaRouter:
+    """Réplicas de lectura con su retraso medido cada ``replica_lag_check_interval`` segundos."""
+
+    def __init__(self, urls: list[str]) -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+        self._task: asyncio.Task | None = None
+        self.primary_fallbacks = 0
 
-sqlalchemy_config = SQLAlchemySyncConfig(connection_string=settings.database_url)
+    def choose(self) -> Engine | None:
+        """Engine (síncrono) de la próxima réplica utilizable; ``None`` si hay que leer del primario."""
+        usable = [replica for replica in self.replicas if replica.usable]
+        if not usable:
+            self.primary_fallbacks += 1
+            return None
+        replica = usable[next(self._next) % len(usable)]
+        replica.sessions += 1
+        return replica.sync_engine
+
+    async def check(self) -> None:
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def _loop(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(settings.replica_lag_check_interval)
+
+    async def start(self) -> None:
+        """Empezar a medir el retraso (hook de inicio de la app)."""
+        if self.replicas:
+            self._task = asyncio.create_task(self._loop(), name="replica-lag")
+
+    async def stop(self) -> None:
+        """Detener la medición y cerrar los engines (hook de cierre de la app)."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.replicas:
+            if isinstance(replica.engine, AsyncEngine):
+                await replica.engine.dispose()
+            else:
+                replica.engine.dispose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "replicas": [replica.stats() for replica in self.replicas],
+            "primary_fallbacks": self.primary_fallbacks,
+        }
+
+
+replica_router = ReplicaRouter(settings.replica_database_urls)
+
+
+class RoutingSession(Session):
+    """Session que lee de una réplica si la request lo permite; todo lo demás va al primario.
+
+    La réplica elegida se mantiene durante toda la sesión, así las consultas de
+    una request ven un mismo estado.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if (
+            not _read_from_replica.get()
+            or self._flushing
+            or isinstance(clause, (Insert, Update, Delete))
+        ):
+            return primary
+        if "replica" not in self.info:
+            self.info["replica"] = replica_router.choose()
+        return self.info["replica"] or primary
+
+
+def _primary_until(scope: Scope) -> float:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(PRIMARY_COOKIE)
+            if morsel is not None:
+                try:
+                    return float(morsel.value)
+                except ValueError:
+                    return 0
+    return 0
+
+
+class ReplicaRoutingMiddleware(ASGIMiddleware):
+    """Marcar las lecturas que pueden ir a una réplica y fijar al primario a quien acaba de escribir.
+
+    Un handler GET que deba leer del primario declara ``opt={"read_primary": True}``. Los
+    cacheados (``opt["cache_tags"]``) también leen del primario: una respuesta leída de una
+    réplica atrasada justo después de una invalidación quedaría en el caché todo el TTL,
+    para todos los clientes.
+    """
+
+    scopes = (ScopeType.HTTP,)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        if not replica_router.replicas:
+            await next_app(scope, receive, send)
+            return
+
+        if scope["method"] in _SAFE_METHODS:
+            opt = scope["route_handler"].opt
+            replica = not (opt.get("read_primary") or opt.get("cache_tags")) and (
+                _primary_until(scope) < time.time()
+            )
+            token = _read_from_replica.set(replica)
+            try:
+                await next_app(scope, receive, send)
+            finally:
+                _read_from_replica.reset(token)
+            return
+
+        window = settings.replica_read_your_writes_seconds
+
+        async def send_wrapper(message: Message) -> None:
+            # Tras una escritura el cliente lee del primario hasta que las réplicas la tengan
+            if message["type"] == "http.response.start" and message["status"] < 400 and window > 0:
+                cookie = (
+                    f"{PRIMARY_COOKIE}={time.time() + window:.3f}; Max-Age={int(window) + 1}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await next_app(scope, receive, send_wrapper)
+
+
+primary_pool_metrics = PoolMetrics()
+
+engine_config = EngineConfig(
+    connect_args=_connect_args(settings.database_url),
+    **_pool_options(primary_pool_metrics),
+)
+
+if settings.database_async:
+    # expire_on_commit=False: en modo async no se puede hacer lazy load al serializar
+    sqlalchemy_config = SQLAlchemyAsyncConfig(
+        connection_string=settings.database_url,
+        session_config=AsyncSessionConfig(
+            expire_on_commit=False,
+            sync_session_class=RoutingSession,
+        ),
+        engine_config=engine_config,
+    )
+else:
+    sqlalchemy_config = SQLAlchemySyncConfig(
+        connection_string=settings.database_url,
+        session_config=SyncSessionConfig(class_=RoutingSession),
+        engine_config=engine_config,
+    )
 
 sqlalchemy_plugin = SQLAlchemyPlugin(config=sqlalchemy_config)
+
+
+def pool_stats() -> PoolStats:
+    """Estado y métricas de checkout del pool del primario (las réplicas, en replica_router.stats)."""
+    return primary_pool_metrics.stats(sqlalchemy_config.get_engine().pool)
@@ -2,13 +2,20 @@
 
 from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
 
-from app.models import Book
+from app.models import Book, Category, Loan, Review, book_categories
+from app.projections import Projection, ProjectedPageDTOMixin, ToMany, model_fields
 
 
-class BookReadDTO(SQLAlchemyDTO[Book]):
+class BookReadDTO(ProjectedPageDTOMixin, SQLAlchemyDTO[Book]):
     """DTO for reading book data."""
 
-    config = SQLAlchemyDTOConfig()
+    config = SQLAlchemyDTOConfig(exclude={"search_vector"})
+
+
+class BookChangesDTO(SQLAlchemyDTO[Book]):
+    """DTO for the rows of GET /books/changes (columns only, no relationships)."""
+
+    config = SQLAlchemyDTOConfig(exclude={"search_vector", "loans", "reviews", "categories"})
 
 
 class BookCreateDTO(SQLAlchemyDTO[Book]):
@@ -22,6 +29,10 @@ class BookCreateDTO(SQLAlchemyDTO[Book]):
             "loans",
             "reviews",
             "categories",
+            "search_vector",
+            "review_count",
+            "rating_sum",
+            "avg_rating",
         },
     )
 
@@ -37,6 +48,36 @@ class BookUpdateDTO(SQLAlchemyDTO[Book]):
             "loans",
             "reviews",
             "categories",
+            "search_vector",
+            "review_count",
+            "rating_sum",
+            "avg_rating",
         },
         partial=True,
     )
+
+
+BOOK_PROJECTION = Projection(
+    model=Book,
+    fields=model_fields(Book, exclude={"search_vector"}),
+    relations={
+        "categories": ToMany(
+            target=Category,
+            parent_key=book_categories.c.book_id,
+            fields=("id", "name"),
+            secondary=(book_categories, book_categories.c.category_id == Category.id),
+        ),
+        "loans": ToMany(
+            target=Loan,
+            parent_key=Loan.book_id,
+            fields=("id", "user_id", "status", "loan_dt", "due_date", "return_dt"),
+        ),
+        "reviews": ToMany(
+            target=Review,
+            parent_key=Review.book_id,
+            fields=("id", "user_id", "rating", "review_date"),
+        ),
+    },
+    default_includes=("categories", "loans", "reviews"),
+)
+"""Sparse fieldsets of ``GET /books/`` (``?fields=title,author&include=categories``)."""
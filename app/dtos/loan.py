@@ -2,12 +2,19 @@
 
 from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
 
-from app.models import Loan
+from app.models import Book, Loan, User
+from app.projections import Projection, ProjectedPageDTOMixin, ToOne, model_fields
 
 
-class LoanReadDTO(SQLAlchemyDTO[Loan]):
+class LoanReadDTO(ProjectedPageDTOMixin, SQLAlchemyDTO[Loan]):
     config = SQLAlchemyDTOConfig(
-        exclude={"created_at", "updated_at"},
+        exclude={"created_at", "updated_at", "book.search_vector", "user.password"},
+    )
+
+
+class LoanChangesDTO(SQLAlchemyDTO[Loan]):
+    config = SQLAlchemyDTOConfig(
+        exclude={"created_at", "updated_at", "user", "book"},
     )
 
 
@@ -32,3 +39,15 @@ class LoanUpdateDTO(SQLAlchemyDTO[Loan]):
         include={"status"},
         partial=True,
     )
+
+
+LOAN_PROJECTION = Projection(
+    model=Loan,
+    fields=model_fields(Loan, exclude={"created_at", "updated_at"}),
+    relations={
+        "user": ToOne(target=User, foreign_key=Loan.user_id, fields=("id", "username", "fullname")),
+        "book": ToOne(target=Book, foreign_key=Loan.book_id, fields=("id", "title", "author")),
+    },
+    default_includes=("user", "book"),
+)
+"""Sparse fieldsets of ``GET /loans/`` (``?fields=status,due_date&include=book``)."""
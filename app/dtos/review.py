@@ -2,13 +2,14 @@
 
 from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
 
-from app.models import Review
+from app.models import Book, Review, User
+from app.projections import Projection, ProjectedPageDTOMixin, ToOne, model_fields
 
 
-class ReviewReadDTO(SQLAlchemyDTO[Review]):
+class ReviewReadDTO(ProjectedPageDTOMixin, SQLAlchemyDTO[Review]):
     """DTO for reading review data."""
 
-    config = SQLAlchemyDTOConfig()
+    config = SQLAlchemyDTOConfig(exclude={"book.search_vector", "user.password"})
 
 
 class ReviewCreateDTO(SQLAlchemyDTO[Review]):
@@ -38,3 +39,15 @@ class ReviewUpdateDTO(SQLAlchemyDTO[Review]):
         },
         partial=True,
     )
+
+
+REVIEW_PROJECTION = Projection(
+    model=Review,
+    fields=model_fields(Review),
+    relations={
+        "user": ToOne(target=User, foreign_key=Review.user_id, fields=("id", "username", "fullname")),
+        "book": ToOne(target=Book, foreign_key=Review.book_id, fields=("id", "title", "author")),
+    },
+    default_includes=("user", "book"),
+)
+"""Sparse fieldsets of ``GET /reviews/`` (``?fields=rating&include=book``)."""
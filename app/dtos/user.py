@@ -3,9 +3,10 @@
 from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
 
 from app.models import User
+from app.projections import Projection, ProjectedPageDTOMixin, model_fields
 
 
-class UserReadDTO(SQLAlchemyDTO[User]):
+class UserReadDTO(ProjectedPageDTOMixin, SQLAlchemyDTO[User]):
     """DTO para leer usuarios (respuesta)."""
 
     config = SQLAlchemyDTOConfig(
@@ -54,3 +55,10 @@ class UserLoginDTO(SQLAlchemyDTO[User]):
     """DTO for user login."""
 
     config = SQLAlchemyDTOConfig(include={"username", "password"})
+
+
+USER_PROJECTION = Projection(
+    model=User,
+    fields=model_fields(User, exclude={"password", "created_at", "updated_at"}),
+)
+"""Sparse fieldsets of ``GET /users/`` (``?fields=username,fullname``)."""
@@ -0,0 +1,216 @@
+"""Streaming exports of books, loans and reviews as NDJSON or CSV.
+
+Rows are read through a server-side cursor (``yield_per``) in a session of
+their own, because the response body is sent after the request's session is
+closed. Each batch of ``settings.export_batch_size`` rows is encoded into one
+chunk of the ``Stream`` response, so memory stays flat whatever the size of
+the export and the first chunk goes out as soon as the first batch arrives.
+Only plain columns are selected: no ORM entity is built per row.
+"""
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Iterator, Sequence
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Literal
+
+from litestar.response import Stream
+from sqlalchemy import ColumnElement, Select, select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.config import settings
+from app.models import Book, Loan, LoanStatus, Review
+
+ExportFormat = Literal["csv", "ndjson"]
+
+_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Columnas exportadas (el id va primero: es el orden del recorrido)
+BOOK_EXPORT_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.author,
+    Book.isbn,
+    Book.pages,
+    Book.published_year,
+    Book.stock,
+    Book.description,
+    Book.language,
+    Book.publisher,
+    Book.review_count,
+    Book.avg_rating,
+    Book.created_at,
+    Book.updated_at,
+)
+LOAN_EXPORT_COLUMNS = (
+    Loan.id,
+    Loan.user_id,
+    Loan.book_id,
+    Loan.loan_dt,
+    Loan.due_date,
+    Loan.return_dt,
+    Loan.status,
+    Loan.fine_amount,
+    Loan.created_at,
+    Loan.updated_at,
+)
+REVIEW_EXPORT_COLUMNS = (
+    Review.id,
+    Review.user_id,
+    Review.book_id,
+    Review.rating,
+    Review.comment,
+    Review.review_date,
+    Review.created_at,
+    Review.updated_at,
+)
+
+
+def book_export_filters(
+    language: str | None,
+    year_from: int | None,
+    year_to: int | None,
+) -> list[ColumnElement[bool]]:
+    """Optional filters of ``GET /books/export``."""
+    filters = []
+    if language is not None:
+        filters.append(Book.language == language)
+    if year_from is not None:
+        filters.append(Book.published_year >= year_from)
+    if year_to is not None:
+        filters.append(Book.published_year <= year_to)
+    return filters
+
+
+def loan_export_filters(
+    date_from: date | None,
+    date_to: date | None,
+    status: LoanStatus | None,
+    user_id: int | None,
+    book_id: int | None,
+) -> list[ColumnElement[bool]]:
+    """Optional filters of ``GET /loans/export`` (the date range applies to ``loan_dt``)."""
+    filters = []
+    if date_from is not None:
+        filters.append(Loan.loan_dt >= date_from)
+    if date_to is not None:
+        filters.append(Loan.loan_dt <= date_to)
+    if status is not None:
+        filters.append(Loan.status == status)
+    if user_id is not None:
+        filters.append(Loan.user_id == user_id)
+    if book_id is not None:
+        filters.append(Loan.book_id == book_id)
+    return filters
+
+
+def review_export_filters(
+    date_from: date | None,
+    date_to: date | None,
+    user_id: int | None,
+    book_id: int | None,
+) -> list[ColumnElement[bool]]:
+    """Optional filters of ``GET /reviews/export`` (the date range applies to ``review_date``)."""
+    filters = []
+    if date_from is not None:
+        filters.append(Review.review_date >= date_from)
+    if date_to is not None:
+        filters.append(Review.review_date <= date_to)
+    if user_id is not None:
+        filters.append(Review.user_id == user_id)
+    if book_id is not None:
+        filters.append(Review.book_id == book_id)
+    return filters
+
+
+def export_stmt(
+    columns: Sequence[InstrumentedAttribute[Any]],
+    filters: Sequence[ColumnElement[bool]],
+) -> Select[Any]:
+    """Rows to export in id order, fetched ``export_batch_size`` at a time."""
+    return (
+        select(*columns)
+        .where(*filters)
+        .order_by(columns[0])
+        .execution_options(yield_per=settings.export_batch_size)
+    )
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # Como texto, para no perder precisión en JSON
+        return str(value)
+    return value
+
+
+def encode_header(names: Sequence[str], format: ExportFormat) -> bytes:
+    """First chunk: the CSV header (NDJSON has none)."""
+    if format == "ndjson":
+        return b""
+    return encode_rows(names, [names], format)
+
+
+def encode_rows(names: Sequence[str], rows: Sequence[Sequence[Any]], format: ExportFormat) -> bytes:
+    """Encode one batch of rows as a chunk of the response."""
+    if format == "ndjson":
+        lines = (
+            json.dumps(dict(zip(names, map(_plain, row))), ensure_ascii=False, separators=(",", ":"))
+            for row in rows
+        )
+        return "".join(f"{line}\n" for line in lines).encode()
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _iter_export(stmt: Select[Any], names: Sequence[str], format: ExportFormat) -> Iterator[bytes]:
+    # Litestar llama a cada next() en un thread: no bloquea el event loop
+    from app.db import sqlalchemy_config
+
+    with sqlalchemy_config.get_session() as session:
+        yield encode_header(names, format)
+        for batch in session.execute(stmt).partitions():
+            yield encode_rows(names, batch, format)
+
+
+async def _iter_export_async(
+    stmt: Select[Any],
+    names: Sequence[str],
+    format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    from app.db import sqlalchemy_config
+
+    async with sqlalchemy_config.get_session() as session:
+        yield encode_header(names, format)
+        result = await session.stream(stmt)
+        async for batch in result.partitions():
+            yield encode_rows(names, batch, format)
+
+
+def stream_export(
+    columns: Sequence[InstrumentedAttribute[Any]],
+    filters: Sequence[ColumnElement[bool]],
+    format: ExportFormat,
+    filename: str,
+) -> Stream:
+    """``Stream`` response with the rows matching ``filters``, as an attachment."""
+    names = [column.key for column in columns]
+    stmt = export_stmt(columns, filters)
+    if settings.database_async:
+        iterator: Iterator[bytes] | AsyncIterator[bytes] = _iter_export_async(stmt, names, format)
+    else:
+        iterator = _iter_export(stmt, names, format)
+    return Stream(
+        iterator,
+        media_type=_MEDIA_TYPES[format],
+        headers={"content-disposition": f'attachment; filename="{filename}.{format}"'},
+    )
@@ -0,0 +1,177 @@
+"""Bulk import of books from CSV or NDJSON feeds.
+
+Rows are read as a stream, validated a batch at a time with the same rules as
+``POST /books`` and merged into ``books`` by ISBN through
+``upsert_batch`` (COPY into a staging table + ``INSERT ... ON CONFLICT``).
+Invalid rows are skipped and listed in the report instead of aborting the load.
+"""
+
+import csv
+import io
+import json
+from collections.abc import Iterator, Sequence
+from itertools import batched
+from typing import IO, Any, Literal
+
+from app.config import settings
+from app.models import BookImportReject, BookImportReport
+from app.repositories import resolve
+from app.repositories.book import AnyBookRepository
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# (línea, registro leído, error de lectura)
+RawRecord = tuple[int, dict[str, Any] | None, str | None]
+
+_REQUIRED_TEXT = ("title", "author", "isbn", "language")
+_OPTIONAL_TEXT = ("description", "publisher")
+
+
+def iter_records(stream: IO[bytes], format: ImportFormat) -> Iterator[RawRecord]:
+    """Read the feed row by row without loading it in memory."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    if format == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None, "JSON inválido"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Se esperaba un objeto JSON por línea"
+            continue
+        yield line_number, record, None
+
+
+def _text(value: Any) -> str | None:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _integer(value: Any) -> int | None:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _validate_record(record: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+    """Normalize one record and collect every rule it breaks."""
+    row = {column: _text(record.get(column)) for column in (*_REQUIRED_TEXT, *_OPTIONAL_TEXT)}
+    errors = [f"{column} es obligatorio" for column in _REQUIRED_TEXT if row[column] is None]
+
+    for column in ("pages", "published_year"):
+        row[column] = _integer(record.get(column))
+        if row[column] is None:
+            errors.append(f"{column} debe ser un entero")
+
+    # Mismas reglas que BookController.create_book
+    year = row["published_year"]
+    if year is not None and not (1000 <= year <= 2024):
+        errors.append("El año de publicación debe estar entre 1000 y 2024")
+
+    stock = record.get("stock")
+    row["stock"] = 1 if _text(stock) is None else _integer(stock)
+    if row["stock"] is None or row["stock"] <= 0:
+        errors.append("El stock debe ser mayor a 0")
+
+    language = row["language"]
+    if language is not None and (len(language) != 2 or not language.isalpha()):
+        errors.append("El language debe ser un código ISO 639-1 de 2 letras")
+
+    return row, errors
+
+
+def validate_batch(
+    records: Sequence[RawRecord],
+) -> tuple[list[dict[str, Any]], list[BookImportReject], int]:
+    """
+    Validate a batch: valid rows (one per ISBN, the last one wins), rejects
+    and how many rows were replaced by a later row with the same ISBN.
+    """
+    rejects = []
+    by_isbn: dict[str, dict[str, Any]] = {}
+    for line, record, read_error in records:
+        if read_error is not None:
+            rejects.append(BookImportReject(line=line, isbn=None, errors=[read_error]))
+            continue
+
+        row, errors = _validate_record(record)
+        if errors:
+            rejects.append(BookImportReject(line=line, isbn=row["isbn"], errors=errors))
+            continue
+
+        row["line"] = line
+        by_isbn.pop(row["isbn"], None)
+        by_isbn[row["isbn"]] = row
+
+    duplicates = len(records) - len(rejects) - len(by_isbn)
+
+    # title también es único en books: dentro del lote gana la primera fila
+    rows = []
+    isbn_by_title: dict[str, str] = {}
+    for row in by_isbn.values():
+        if isbn_by_title.setdefault(row["title"], row["isbn"]) != row["isbn"]:
+            rejects.append(
+                BookImportReject(
+                    line=row["line"],
+                    isbn=row["isbn"],
+                    errors=["El título se repite en el archivo con otro isbn"],
+                )
+            )
+            continue
+        rows.append(row)
+
+    return rows, rejects, duplicates
+
+
+def _add_rejects(report: BookImportReport, rejects: list[BookImportReject]) -> None:
+    report.rejected += len(rejects)
+    room = settings.book_import_max_rejects - len(report.rejects)
+    report.rejects.extend(rejects[: max(room, 0)])
+    if len(rejects) > room:
+        report.rejects_truncated = True
+
+
+async def import_books(
+    books_repo: AnyBookRepository,
+    stream: IO[bytes],
+    format: ImportFormat,
+) -> BookImportReport:
+    """Import a CSV/NDJSON feed in batches of ``settings.book_import_batch_size``."""
+    report = BookImportReport()
+    for batch in batched(iter_records(stream, format), settings.book_import_batch_size):
+        rows, rejects, duplicates = validate_batch(batch)
+        report.received += len(batch)
+        report.duplicates += duplicates
+
+        if rows:
+            result = await resolve(books_repo.upsert_batch(rows))
+            report.inserted += result.inserted
+            report.updated += result.updated
+            rejects.extend(
+                BookImportReject(
+                    line=line,
+                    isbn=isbn,
+                    errors=["El título ya pertenece a otro libro (otro isbn)"],
+                )
+                for line, isbn in result.title_conflicts
+            )
+
+        rejects.sort(key=lambda reject: reject.line)
+        _add_rejects(report, rejects)
+
+    return report
@@ -1,14 +1,35 @@
 """Database models for the library management system."""
 
-from dataclasses import dataclass
-from datetime import date, datetime
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
 from decimal import Decimal
 from enum import Enum
 
-from advanced_alchemy.base import BigIntAuditBase
-from sqlalchemy import Boolean, Column, Date, Enum as SAEnum, ForeignKey, Numeric, String, Table, Text
+from advanced_alchemy.base import BigIntAuditBase, BigIntBase
+from advanced_alchemy.types import DateTimeUTC
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Computed,
+    DDL,
+    Date,
+    Enum as SAEnum,
+    Float,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+    Table,
+    Text,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.search import BOOK_SEARCH_VECTOR_SQL
+
 
 class LoanStatus(str, Enum):
     ACTIVE = "ACTIVE"
@@ -21,6 +42,8 @@ book_categories = Table(
     BigIntAuditBase.metadata,
     Column("book_id", ForeignKey("books.id"), primary_key=True),
     Column("category_id", ForeignKey("categories.id"), primary_key=True),
+    # La PK (book_id, category_id) no sirve para listar los libros de una categoría
+    Index("ix_book_categories_category_id_book_id", "category_id", "book_id"),
 )
 
 
@@ -28,6 +51,20 @@ class User(BigIntAuditBase):
     """User model with audit fields."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_fullname_trgm",
+            "fullname",
+            postgresql_using="gin",
+            postgresql_ops={"fullname": "gin_trgm_ops"},
+        ),
+    )
 
     username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     fullname: Mapped[str] = mapped_column(String, nullable=False)
@@ -45,6 +82,32 @@ class Book(BigIntAuditBase):
     """Book model with audit fields."""
 
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_books_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_books_author_trgm",
+            "author",
+            postgresql_using="gin",
+            postgresql_ops={"author": "gin_trgm_ops"},
+        ),
+        # "más reseñados" y "mejor evaluados" como recorridos de índice
+        Index("ix_books_review_count", "review_count", "id"),
+        Index(
+            "ix_books_avg_rating",
+            text("avg_rating DESC NULLS LAST"),
+            text("review_count DESC"),
+        ),
+        # Libros disponibles (stock > 0) sin recorrer los agotados
+        Index("ix_books_available_id", "id", postgresql_where=text("stock > 0")),
+        # /books/changes: keyset (updated_at, id)
+        Index("ix_books_updated_at_id", "updated_at", "id"),
+    )
 
     title: Mapped[str] = mapped_column(unique=True)
     author: Mapped[str]
@@ -57,6 +120,19 @@ class Book(BigIntAuditBase):
     language: Mapped[str] = mapped_column()
     publisher: Mapped[str | None] = mapped_column(nullable=True)
 
+    # Agregados de reseñas mantenidos por ReviewRepository (y reconciliados por app.scheduler)
+    review_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    rating_sum: Mapped[int] = mapped_column(default=0, server_default="0")
+    avg_rating: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    # tsvector generado por PostgreSQL para /books/search (no se carga por defecto)
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(BOOK_SEARCH_VECTOR_SQL, persisted=True),
+        deferred=True,
+        nullable=True,
+    )
+
     loans: Mapped[list["Loan"]] = relationship(back_populates="book")
     reviews: Mapped[list["Review"]] = relationship(back_populates="book")
     
@@ -72,6 +148,7 @@ class Category(BigIntAuditBase):
     """Category model with audit fields."""
 
     __tablename__ = "categories"
+    __table_args__ = (Index("ix_categories_updated_at_id", "updated_at", "id"),)
 
     # BigIntAuditBase ya define id, created_at, updated_at, etc.
     name: Mapped[str] = mapped_column(String(100), unique=True)
@@ -88,6 +165,21 @@ class Loan(BigIntAuditBase):
     """Loan model with audit fields."""
 
     __tablename__ = "loans"
+    __table_args__ = (
+        # Barrido de vencidos y préstamos activos
+        Index("ix_loans_active_due_date", "due_date", postgresql_where=text("status = 'ACTIVE'")),
+        # /loans/overdue: keyset (due_date, id) sobre los no devueltos
+        Index(
+            "ix_loans_open_due_date_id",
+            "due_date",
+            "id",
+            postgresql_where=text("status IN ('ACTIVE', 'OVERDUE')"),
+        ),
+        # Historial por usuario, más reciente primero
+        Index("ix_loans_user_id_loan_dt", "user_id", text("loan_dt DESC"), text("id DESC")),
+        Index("ix_loans_book_id", "book_id"),
+        Index("ix_loans_updated_at_id", "updated_at", "id"),
+    )
 
     loan_dt: Mapped[date] = mapped_column(Date, nullable=False, default=datetime.today)
     return_dt: Mapped[date | None] = mapped_column(Date, nullable=True)
@@ -114,6 +206,10 @@ class Review(BigIntAuditBase):
     """Review model for book ratings and comments."""
 
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_book_id", "book_id"),
+        Index("ix_reviews_user_id", "user_id"),
+    )
 
     rating: Mapped[int] = mapped_column(nullable=False)
     comment: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -126,6 +222,47 @@ class Review(BigIntAuditBase):
     book: Mapped[Book] = relationship(back_populates="reviews")
 
 
+class Tombstone(BigIntBase):
+    """Id of a deleted row, kept for the delta sync feeds (``/changes``)."""
+
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_table_name_deleted_at_id", "table_name", "deleted_at", "id"),
+    )
+
+    table_name: Mapped[str] = mapped_column(String(50))
+    row_id: Mapped[int] = mapped_column(BigInteger)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTimeUTC(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+    )
+
+
+# Tablas con feed /changes: un trigger AFTER DELETE deja la tombstone de cada fila borrada en la
+# misma transacción, también en los borrados por cascada (ON DELETE CASCADE) o con delete() masivo
+TOMBSTONE_TABLES = ("books", "categories", "loans")
+
+TOMBSTONE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO tombstones (table_name, row_id, deleted_at)
+    SELECT TG_TABLE_NAME, id, clock_timestamp() FROM deleted_rows;
+    RETURN NULL;
+END
+$$
+"""
+
+TOMBSTONE_TRIGGER_SQL = """
+CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table}
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION record_tombstone()
+"""
+
+# Con metadata.create_all (sin alembic) también se crean los triggers
+for _ddl in (TOMBSTONE_FUNCTION_SQL, *(TOMBSTONE_TRIGGER_SQL.format(table=table) for table in TOMBSTONE_TABLES)):
+    event.listen(Tombstone.metadata, "after_create", DDL(_ddl).execute_if(dialect="postgresql"))
+
+
 @dataclass
 class PasswordUpdate:
     """Password update request."""
@@ -134,6 +271,31 @@ class PasswordUpdate:
     new_password: str
 
 
+@dataclass
+class BookIds:
+    """List of book IDs for bulk category membership changes."""
+
+    book_ids: list[int]
+
+
+@dataclass
+class CategoryMembershipResult:
+    """Outcome of a bulk category membership change."""
+
+    category_id: int
+    requested: int
+    changed: int
+
+
+@dataclass
+class BookStatsBucket:
+    """Book statistics for one language or publisher."""
+
+    key: str | None
+    total_books: int
+    average_pages: float
+
+
 @dataclass
 class BookStats:
     """Book statistics data."""
@@ -142,3 +304,37 @@ class BookStats:
     average_pages: float
     oldest_publication_year: int | None
     newest_publication_year: int | None
+    by_language: list[BookStatsBucket] = field(default_factory=list)
+    by_publisher: list[BookStatsBucket] = field(default_factory=list)
+
+
+@dataclass
+class BookUpsertResult:
+    """Outcome of merging one import batch into books."""
+
+    inserted: int
+    updated: int
+    # (línea, isbn) de filas cuyo título ya pertenece a otro libro
+    title_conflicts: list[tuple[int, str]] = field(default_factory=list)
+
+
+@dataclass
+class BookImportReject:
+    """A row of a bulk import that was not loaded."""
+
+    line: int
+    isbn: str | None
+    errors: list[str]
+
+
+@dataclass
+class BookImportReport:
+    """Summary of a bulk book import."""
+
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    rejects: list[BookImportReject] = field(default_factory=list)
+    rejects_truncated: bool = False
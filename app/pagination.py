@@ -0,0 +1,146 @@
+"""Cursor (keyset) pagination helpers for list endpoints."""
+
+import base64
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Annotated, Any, Generic, TypeVar
+
+from litestar.params import Parameter
+from sqlalchemy import ColumnElement, Select, func, select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    """The cursor sent by the client could not be decoded."""
+
+
+@dataclass
+class CursorPage(Generic[T]):
+    """A page of results plus the cursor to request the next one."""
+
+    items: list[T]
+    next_cursor: str | None
+    total: int | None = None
+
+
+@dataclass
+class ProjectedPage(CursorPage[dict[str, Any]]):
+    """A page of plain dicts built from a sparse projection (``?fields=``)."""
+
+
+@dataclass
+class PageParams:
+    """Pagination parameters parsed from the query string."""
+
+    cursor: str | None
+    limit: int
+    with_total: bool
+
+
+async def provide_page_params(
+    cursor: str | None = None,
+    limit: Annotated[int | None, Parameter(ge=1, le=settings.page_size_max)] = None,
+    with_total: bool = False,
+) -> PageParams:
+    """Read ``cursor``, ``limit`` and ``with_total`` from the query string."""
+    return PageParams(
+        cursor=cursor,
+        limit=limit or settings.page_size_default,
+        with_total=with_total,
+    )
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the keyset values of the last row as an opaque token."""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[InstrumentedAttribute[Any]]) -> list[Any]:
+    """Decode a cursor back to typed values for ``columns``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursorError(cursor)
+
+        typed = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                typed.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                typed.append(date.fromisoformat(value))
+            else:
+                typed.append(python_type(value))
+        return typed
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(cursor) from e
+
+
+def build_page(
+    rows: Sequence[T],
+    columns: Sequence[InstrumentedAttribute[Any]],
+    params: PageParams,
+    total: int | None = None,
+) -> CursorPage[T]:
+    """Trim the extra row fetched to detect a next page and build the cursor."""
+    items = list(rows[: params.limit])
+    next_cursor = None
+    if len(rows) > params.limit:
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return CursorPage(items=items, next_cursor=next_cursor, total=total)
+
+
+def keyset_condition(
+    columns: Sequence[InstrumentedAttribute[Any]],
+    cursor: str,
+    descending: bool = False,
+) -> ColumnElement[bool]:
+    """Rows strictly after the cursor, using a row-value comparison (index friendly)."""
+    values = decode_cursor(cursor, columns)
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def ranked_page_stmts(
+    model: type[Any],
+    rank: ColumnElement[float],
+    conditions: Sequence[ColumnElement[bool]],
+    page: PageParams,
+) -> tuple[Select[Any], Select[Any]]:
+    """Page of ``(model, rank)`` rows by descending relevance, plus its count.
+
+    The cursor is ``(rank, id)`` of the last row, so ``rank`` must be typed
+    (e.g. ``type_=REAL``) to decode it.
+    """
+    count_stmt = select(func.count(model.id)).where(*conditions)
+    if page.cursor:
+        conditions = [*conditions, keyset_condition((rank, model.id), page.cursor, descending=True)]
+    stmt = (
+        select(model, rank.label("rank"))
+        .where(*conditions)
+        .order_by(rank.desc(), model.id.desc())
+        .limit(page.limit + 1)
+    )
+    return stmt, count_stmt
+
+
+def build_ranked_page(rows: Sequence[Any], params: PageParams, total: int | None = None) -> CursorPage[Any]:
+    """``build_page`` for the ``(model, rank)`` rows of ``ranked_page_stmts``."""
+    page_rows = rows[: params.limit]
+    next_cursor = None
+    if len(rows) > params.limit:
+        entity, rank = page_rows[-1]
+        next_cursor = encode_cursor([rank, entity.id])
+    return CursorPage(items=[entity for entity, _ in page_rows], next_cursor=next_cursor, total=total)
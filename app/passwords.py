@@ -0,0 +1,115 @@
+"""Password hashing offloaded to a worker pool.
+
+Argon2 burns tens of milliseconds of CPU per call; running it inside an async
+handler freezes every other request on the worker. ``password_pool`` runs
+hashing and verification in a process pool (or a thread pool, argon2 releases
+the GIL) and bounds how many jobs are in flight at once.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from pwdlib import PasswordHash
+
+from app.config import settings
+
+password_hasher = PasswordHash.recommended()
+
+
+def _hash(password: str) -> str:
+    return password_hasher.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> tuple[bool, str | None]:
+    return password_hasher.verify_and_update(password, hashed)
+
+
+@dataclass
+class PasswordPoolStats:
+    """Queue metrics of the hashing pool."""
+
+    executor: str
+    workers: int
+    in_flight: int
+    waiting: int
+    max_waiting: int
+    completed: int
+
+
+class PasswordHashingPool:
+    """Run password hashing/verification in an executor with bounded concurrency."""
+
+    def __init__(self, executor: str, workers: int) -> None:
+        self.executor_kind = executor
+        self.workers = workers
+        self._executor: Executor | None = None
+        self._semaphore = asyncio.Semaphore(workers)
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._completed = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "thread":
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash",
+                )
+            else:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._semaphore.locked():
+            self._max_waiting = max(self._max_waiting, self._waiting + 1)
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash ``password`` with the current Argon2 parameters."""
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """Verify ``password``; also return a new hash if the parameters changed."""
+        return await self._run(_verify_and_update, password, hashed)
+
+    def stats(self) -> PasswordPoolStats:
+        """Snapshot of the pool queue metrics."""
+        return PasswordPoolStats(
+            executor=self.executor_kind,
+            workers=self.workers,
+            in_flight=self._in_flight,
+            waiting=self._waiting,
+            max_waiting=self._max_waiting,
+            completed=self._completed,
+        )
+
+    def shutdown(self) -> None:
+        """Stop the executor (registered as an app shutdown hook)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordHashingPool(
+    executor=settings.password_hashing_executor,
+    workers=settings.password_hashing_workers,
+)
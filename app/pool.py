@@ -0,0 +1,113 @@
+"""Database connection pool with checkout metrics.
+
+``InstrumentedQueuePool`` (and its asyncio twin) time every checkout into the
+``PoolMetrics`` of its engine, so ``GET /metrics/`` shows, per engine (primary
+and each replica), how long requests wait for a connection, how often
+the pool serves a checkout from overflow (past ``DB_POOL_SIZE``) and how many
+checkouts time out: what is needed to size the pool for the number of
+workers and to see requests queueing on the database.
+"""
+
+import bisect
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+from app.config import settings
+
+# Límites (ms) de los buckets del histograma de espera; el último es +Inf
+_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+@dataclass
+class PoolStats:
+    """Connection pool state and checkout counters of this worker."""
+
+    size: int
+    max_overflow: int
+    checked_out: int
+    checked_in: int
+    checkouts: int
+    # Checkouts servidos con conexiones más allá de size (overflow)
+    overflow_checkouts: int
+    timeouts: int
+    # Checkouts por tiempo de espera: "<=1", "<=5", ... "+Inf" (no acumulado)
+    wait_ms_histogram: dict[str, int]
+    wait_ms_max: float
+    wait_ms_avg: float | None
+
+
+class PoolMetrics:
+    """Checkout counters of one engine's pool in this worker (kept when ``dispose`` recreates it)."""
+
+    def __init__(self) -> None:
+        # En modo síncrono hay checkouts desde threads (exportaciones, scheduler)
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._overflow_checkouts = 0
+        self._timeouts = 0
+        self._buckets = [0] * (len(_WAIT_BUCKETS_MS) + 1)
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+
+    def record_checkout(self, wait_ms: float, overflow: bool) -> None:
+        with self._lock:
+            self._checkouts += 1
+            self._overflow_checkouts += overflow
+            self._buckets[bisect.bisect_left(_WAIT_BUCKETS_MS, wait_ms)] += 1
+            self._wait_ms_total += wait_ms
+            self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def stats(self, pool: QueuePool) -> PoolStats:
+        """Snapshot of the counters plus the live state of ``pool``."""
+        with self._lock:
+            labels = [f"<={limit}" for limit in _WAIT_BUCKETS_MS] + ["+Inf"]
+            return PoolStats(
+                size=pool.size(),
+                max_overflow=settings.db_max_overflow,
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                checkouts=self._checkouts,
+                overflow_checkouts=self._overflow_checkouts,
+                timeouts=self._timeouts,
+                wait_ms_histogram=dict(zip(labels, self._buckets)),
+                wait_ms_max=round(self._wait_ms_max, 3),
+                wait_ms_avg=(
+                    round(self._wait_ms_total / self._checkouts, 3) if self._checkouts else None
+                ),
+            )
+
+
+class InstrumentedQueuePool(QueuePool):
+    """``QueuePool`` that records the wait of every checkout in ``metrics``."""
+
+    metrics: PoolMetrics
+
+    @classmethod
+    def with_metrics(cls, metrics: PoolMetrics) -> type["InstrumentedQueuePool"]:
+        """Pool class bound to ``metrics`` (``dispose`` recreates the pool with the same class)."""
+        return type(cls.__name__, (cls,), {"metrics": metrics})
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(
+            (time.perf_counter() - started) * 1000,
+            overflow=self.checkedout() > self.size(),
+        )
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """``InstrumentedQueuePool`` for the asyncio engine."""
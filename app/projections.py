@@ -0,0 +1,249 @@
+"""Sparse fieldsets (``?fields=`` / ``?include=``) for list endpoints.
+
+A projection selects only the requested columns, so no ORM entity is
+hydrated: rows come back as plain dicts in a ``ProjectedPage``, which the
+read DTOs pass through untouched. ``include`` embeds a slim version of a
+relationship, joined for many-to-one and fetched in one extra query for
+collections.
+
+With ``settings.fast_list_serialization`` the list endpoints build the page
+as ``msgspec.Struct`` rows straight from ``Result.mappings()`` and encode it
+in the repository (``encode_page``): the read DTO only passes the encoded
+bytes through. A request without ``fields``/``include`` then gets every
+column plus the slim ``default_includes``.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Any
+
+import msgspec
+from sqlalchemy import ColumnElement, RowMapping, Select, Table, func, inspect, select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.pagination import PageParams, ProjectedPage, encode_cursor, keyset_condition
+
+
+# Decimal como número, igual que el encoder de Litestar
+_encoder = msgspec.json.Encoder(decimal_format="number")
+
+
+class InvalidFieldsError(ValueError):
+    """``fields`` or ``include`` name something the endpoint does not expose."""
+
+
+def model_fields(model: type[Any], exclude: Sequence[str] = ()) -> tuple[str, ...]:
+    """Column attributes of ``model`` minus ``exclude`` (what the read DTO emits)."""
+    return tuple(key for key in inspect(model).column_attrs.keys() if key not in exclude)
+
+
+@dataclass(frozen=True)
+class ToOne:
+    """Many-to-one relationship embedded through a LEFT JOIN."""
+
+    target: type[Any]
+    foreign_key: InstrumentedAttribute[Any]
+    fields: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ToMany:
+    """Collection embedded with one ``IN (parent ids)`` query per page."""
+
+    target: type[Any]
+    parent_key: ColumnElement[Any]
+    fields: tuple[str, ...]
+    # Tabla de asociación (many-to-many) y condición de JOIN con target
+    secondary: tuple[Table, ColumnElement[bool]] | None = None
+
+
+@dataclass(frozen=True)
+class SparseFields:
+    """Fields and relationships requested by the client."""
+
+    fields: tuple[str, ...]
+    includes: tuple[str, ...]
+
+
+class ProjectedPageDTOMixin:
+    """Let read DTOs return a ``ProjectedPage`` (plain dicts) or an encoded page as is."""
+
+    def data_to_encodable_type(self, data: Any) -> Any:
+        if isinstance(data, (ProjectedPage, msgspec.Raw)):
+            return data
+        return super().data_to_encodable_type(data)  # type: ignore[misc]
+
+
+@cache
+def _row_struct(name: str, fields: tuple[str, ...]) -> type[msgspec.Struct]:
+    """``msgspec.Struct`` with ``fields`` (in order), one per projected shape."""
+    return msgspec.defstruct(name, [(key, Any) for key in fields])
+
+
+def _split(value: str | None) -> list[str]:
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Columns and relationships a list endpoint can project."""
+
+    model: type[Any]
+    fields: tuple[str, ...]
+    relations: dict[str, ToOne | ToMany] = field(default_factory=dict)
+    # Relaciones que el camino rápido incluye cuando no se piden fields/include
+    default_includes: tuple[str, ...] = ()
+
+    def parse(self, fields: str | None, include: str | None) -> SparseFields | None:
+        """Validate the query params; ``None`` when the full DTO should be used."""
+        if fields is None and include is None:
+            return None
+
+        requested = _split(fields) or list(self.fields)
+        includes = _split(include)
+        unknown = [name for name in requested if name not in self.fields]
+        unknown += [name for name in includes if name not in self.relations]
+        if unknown:
+            raise InvalidFieldsError(", ".join(unknown))
+
+        # id siempre va: es la clave del cursor y de las relaciones
+        return SparseFields(
+            fields=tuple(dict.fromkeys(["id", *requested])),
+            includes=tuple(dict.fromkeys(includes)),
+        )
+
+    def everything(self) -> SparseFields:
+        """Every field plus ``default_includes`` (the fast path without ``fields``/``include``)."""
+        return SparseFields(
+            fields=tuple(dict.fromkeys(["id", *self.fields])),
+            includes=self.default_includes,
+        )
+
+    def page_stmt(
+        self,
+        sparse: SparseFields,
+        filters: Sequence[ColumnElement[bool]],
+        page: PageParams,
+    ) -> Select[Any]:
+        """Requested columns (plus joined many-to-one fields) of one page, by id."""
+        model_id = self.model.id
+        columns = [getattr(self.model, name) for name in sparse.fields]
+        stmt = select(*columns)
+        for name in sparse.includes:
+            relation = self.relations[name]
+            if isinstance(relation, ToOne):
+                target = relation.target
+                stmt = stmt.add_columns(
+                    *(getattr(target, key).label(f"{name}__{key}") for key in relation.fields)
+                ).outerjoin(target, target.id == relation.foreign_key)
+
+        conditions = list(filters)
+        if page.cursor:
+            conditions.append(keyset_condition((model_id,), page.cursor))
+        return stmt.where(*conditions).order_by(model_id).limit(page.limit + 1)
+
+    def count_stmt(self, filters: Sequence[ColumnElement[bool]]) -> Select[Any]:
+        """Total rows matching ``filters``."""
+        return select(func.count(self.model.id)).where(*filters)
+
+    def to_items(self, sparse: SparseFields, rows: Sequence[Any]) -> list[dict[str, Any]]:
+        """Plain dicts, with joined fields nested under the relationship name."""
+        items = []
+        for row in rows:
+            item = {name: row._mapping[name] for name in sparse.fields}
+            for name in sparse.includes:
+                relation = self.relations[name]
+                if isinstance(relation, ToOne):
+                    nested = {key: row._mapping[f"{name}__{key}"] for key in relation.fields}
+                    item[name] = nested if nested.get("id") is not None else None
+            items.append(item)
+        return items
+
+    def to_structs(self, sparse: SparseFields, rows: Sequence[RowMapping]) -> list[msgspec.Struct]:
+        """``to_items`` as ``msgspec.Struct`` rows; collections start empty until ``attach_structs``."""
+        name = self.model.__name__
+        row_type = _row_struct(name, (*sparse.fields, *sparse.includes))
+        to_one = {
+            include: _row_struct(f"{name}_{include}", relation.fields)
+            for include in sparse.includes
+            if isinstance(relation := self.relations[include], ToOne)
+        }
+        items = []
+        for row in rows:
+            values = [row[key] for key in sparse.fields]
+            for include in sparse.includes:
+                if include not in to_one:
+                    values.append([])
+                elif row[f"{include}__id"] is None:
+                    values.append(None)
+                else:
+                    keys = self.relations[include].fields
+                    values.append(to_one[include](*(row[f"{include}__{key}"] for key in keys)))
+            items.append(row_type(*values))
+        return items
+
+    def collection_stmts(
+        self,
+        sparse: SparseFields,
+        ids: Sequence[Any],
+    ) -> list[tuple[str, Select[Any]]]:
+        """One ``WHERE parent IN (ids)`` query per included collection."""
+        stmts = []
+        for name in sparse.includes:
+            relation = self.relations[name]
+            if not isinstance(relation, ToMany):
+                continue
+            target = relation.target
+            stmt = select(
+                relation.parent_key.label("parent_id"),
+                *(getattr(target, key) for key in relation.fields),
+            ).select_from(target)
+            if relation.secondary is not None:
+                stmt = stmt.join(*relation.secondary)
+            stmts.append(
+                (name, stmt.where(relation.parent_key.in_(ids)).order_by(target.id))
+            )
+        return stmts
+
+    def attach(self, items: list[dict[str, Any]], name: str, rows: Sequence[Any]) -> None:
+        """Group collection rows under their parent item."""
+        fields = self.relations[name].fields
+        by_parent: dict[Any, list[dict[str, Any]]] = {item["id"]: [] for item in items}
+        for row in rows:
+            by_parent[row.parent_id].append({key: row._mapping[key] for key in fields})
+        for item in items:
+            item[name] = by_parent[item["id"]]
+
+    def attach_structs(
+        self,
+        items: list[msgspec.Struct],
+        name: str,
+        rows: Sequence[RowMapping],
+    ) -> None:
+        """``attach`` for the rows of ``to_structs``."""
+        fields = self.relations[name].fields
+        row_type = _row_struct(f"{self.model.__name__}_{name}", fields)
+        by_parent: dict[Any, list[msgspec.Struct]] = {item.id: [] for item in items}  # type: ignore[attr-defined]
+        for row in rows:
+            by_parent[row["parent_id"]].append(row_type(*(row[key] for key in fields)))
+        for item in items:
+            setattr(item, name, by_parent[item.id])  # type: ignore[attr-defined]
+
+
+def encode_page(page: ProjectedPage) -> msgspec.Raw:
+    """JSON of a page of ``to_structs`` rows, embedded as is in the response."""
+    return msgspec.Raw(_encoder.encode(page))
+
+
+def build_projected_page(
+    items: Sequence[dict[str, Any] | RowMapping],
+    params: PageParams,
+    total: int | None = None,
+) -> ProjectedPage:
+    """``build_page`` for projected rows (``items`` holds the extra row, if any)."""
+    next_cursor = None
+    if len(items) > params.limit:
+        items = items[: params.limit]
+        next_cursor = encode_cursor([items[-1]["id"]])
+    return ProjectedPage(items=items, next_cursor=next_cursor, total=total)
@@ -1 +1,261 @@
 """Repository layer for database operations."""
+
+from collections.abc import Awaitable, Callable, Coroutine, Sequence
+from functools import wraps
+from inspect import isawaitable
+from typing import Annotated, Any, TypeVar
+
+import msgspec
+from advanced_alchemy.filters import LimitOffset
+from litestar.params import Dependency
+from sqlalchemy import ColumnElement, Select, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from app.changes import (
+    ChangeParams,
+    ChangeSet,
+    build_change_set,
+    changed_rows_stmt,
+    deletions_until,
+    tombstones_stmt,
+)
+from app.conditional import Related, Validator, validator_stmt
+from app.pagination import CursorPage, PageParams, ProjectedPage, build_page, keyset_condition
+from app.projections import Projection, SparseFields, build_projected_page, encode_page
+
+T = TypeVar("T")
+
+AnySession = Annotated[Session | AsyncSession, Dependency(skip_validation=True)]
+"""Session injected by the SQLAlchemy plugin (sync or async, see ``settings.database_async``)."""
+
+
+async def resolve(result: T | Awaitable[T]) -> T:
+    """Await a repository result when running on the async engine.
+
+    Sync repositories return values directly and async repositories return
+    coroutines, so controllers can use ``await resolve(repo.method(...))``
+    regardless of ``settings.database_async``.
+    """
+    if isawaitable(result):
+        return await result
+    return result
+
+
+def _page_validator_stmt(
+    model: type[Any],
+    filters: Sequence[ColumnElement[bool]],
+    page: PageParams,
+    keyset: Sequence[InstrumentedAttribute[Any]] | None,
+    descending: bool,
+    related: Sequence[Related],
+) -> Select[Any]:
+    """``validator_stmt`` over exactly the rows ``list_page`` reads for ``page``."""
+    columns = keyset or (model.id,)
+    conditions = list(filters)
+    if page.cursor:
+        conditions.append(keyset_condition(columns, page.cursor, descending))
+    return validator_stmt(
+        model,
+        conditions,
+        related,
+        order_by=[column.desc() if descending else column.asc() for column in columns],
+        limit=page.limit + 1,
+        total_filters=filters if page.with_total else None,
+    )
+
+
+def sync_delegate(
+    method: Callable[..., T],
+    *,
+    commit: bool = False,
+) -> Callable[..., Coroutine[Any, Any, T]]:
+    """Async repository method that runs the sync implementation ``method``.
+
+    The async repository's ``sync_repository`` is bound to the session behind
+    the ``AsyncSession`` (``AsyncSession.run_sync``), so both flavors share one
+    implementation and issue the same statements. Write methods pass
+    ``commit``: the sync call only flushes, the async repository commits when
+    ``auto_commit`` is set and then loads the ``refresh_relationships`` still
+    unloaded on the returned instance (the DTO cannot lazy load them).
+    """
+
+    @wraps(method)
+    async def delegate(self, *args: Any, **kwargs: Any) -> T:
+        def call(session: Session) -> T:
+            repository = self.sync_repository(session=session, auto_commit=False)
+            return method(repository, *args, **kwargs)
+
+        result = await self.session.run_sync(call)
+        if commit:
+            if getattr(self, "auto_commit", False):
+                await self.session.commit()
+            if isinstance(result, self.model_type):
+                await _load_unloaded(self.session, result, getattr(self, "refresh_relationships", ()))
+        return result
+
+    return delegate
+
+
+async def _load_unloaded(session: AsyncSession, instance: Any, names: Sequence[str]) -> None:
+    state = inspect(instance)
+    unloaded = [name for name in names if name in state.unloaded]
+    if unloaded and state.persistent:
+        await session.refresh(instance, attribute_names=unloaded)
+
+
+class AsyncRelationshipRefreshMixin:
+    """Reload relationships after writes in async repositories.
+
+    ``AsyncSession`` cannot lazy load while the DTO serializes the response, so
+    the relationships emitted by the read DTO are refreshed explicitly after
+    ``add``/``update``/``get_and_update`` (``refresh_relationships``).
+    """
+
+    refresh_relationships: tuple[str, ...] = ()
+
+    async def _refresh(self, instance, auto_refresh, attribute_names=None, with_for_update=None):
+        await super()._refresh(  # type: ignore[misc]
+            instance,
+            auto_refresh=auto_refresh,
+            attribute_names=attribute_names,
+            with_for_update=with_for_update,
+        )
+        if auto_refresh is None:
+            auto_refresh = self.auto_refresh  # type: ignore[attr-defined]
+        if auto_refresh and attribute_names is None and self.refresh_relationships:
+            await self.session.refresh(instance, attribute_names=self.refresh_relationships)  # type: ignore[attr-defined]
+
+
+class CursorPaginationMixin:
+    """Keyset pagination (``list_page``) for sync repositories.
+
+    Rows are ordered by ``keyset`` (the primary key by default) and the next
+    page starts strictly after the last row returned, so deep pages do not
+    pay for an OFFSET scan. ``get_validator``/``get_page_validator`` feed
+    conditional GETs; ``validator_related`` lists what the read DTO embeds.
+    """
+
+    validator_related: tuple[Related, ...] = ()
+
+    def list_page(
+        self,
+        *filters: ColumnElement[bool],
+        page: PageParams,
+        keyset: Sequence[InstrumentedAttribute[Any]] | None = None,
+        descending: bool = False,
+        statement: Select[Any] | None = None,
+    ) -> CursorPage[Any]:
+        """Return one page of rows matching ``filters``."""
+        columns = keyset or (self.model_type.id,)  # type: ignore[attr-defined]
+        conditions = list(filters)
+        if page.cursor:
+            conditions.append(keyset_condition(columns, page.cursor, descending))
+
+        rows = self.list(  # type: ignore[attr-defined]
+            *conditions,
+            LimitOffset(limit=page.limit + 1, offset=0),
+            order_by=[column.desc() if descending else column.asc() for column in columns],
+            statement=statement,
+        )
+        total = self.count(*filters, statement=statement) if page.with_total else None  # type: ignore[attr-defined]
+        return build_page(rows, columns, page, total)
+
+    def get_validator(self, *filters: ColumnElement[bool]) -> Validator:
+        """Counts and last ``updated_at`` of the rows matching ``filters`` (one query)."""
+        model = self.model_type  # type: ignore[attr-defined]
+        stmt = validator_stmt(model, filters, self.validator_related)
+        session = self.session  # type: ignore[attr-defined]
+        return Validator.from_row(session.execute(stmt).one())
+
+    def get_page_validator(
+        self,
+        *filters: ColumnElement[bool],
+        page: PageParams,
+        keyset: Sequence[InstrumentedAttribute[Any]] | None = None,
+        descending: bool = False,
+    ) -> Validator:
+        """``get_validator`` of the page ``list_page`` returns for the same arguments."""
+        model = self.model_type  # type: ignore[attr-defined]
+        stmt = _page_validator_stmt(
+            model, filters, page, keyset, descending, self.validator_related
+        )
+        session = self.session  # type: ignore[attr-defined]
+        return Validator.from_row(session.execute(stmt).one())
+
+    def list_projected(
+        self,
+        *filters: ColumnElement[bool],
+        page: PageParams,
+        projection: Projection,
+        sparse: SparseFields,
+    ) -> ProjectedPage:
+        """Like ``list_page`` but selecting only the ``sparse`` columns (no entities)."""
+        session = self.session  # type: ignore[attr-defined]
+        rows = session.execute(projection.page_stmt(sparse, filters, page)).all()
+        total = session.scalar(projection.count_stmt(filters)) if page.with_total else None
+        result = build_projected_page(projection.to_items(sparse, rows), page, total)
+
+        if result.items:
+            ids = [item["id"] for item in result.items]
+            for name, stmt in projection.collection_stmts(sparse, ids):
+                projection.attach(result.items, name, session.execute(stmt).all())
+        return result
+
+    def list_encoded(
+        self,
+        *filters: ColumnElement[bool],
+        page: PageParams,
+        projection: Projection,
+        sparse: SparseFields,
+    ) -> msgspec.Raw:
+        """``list_projected`` built as ``msgspec.Struct`` rows and encoded to JSON (fast path)."""
+        session = self.session  # type: ignore[attr-defined]
+        rows = session.execute(projection.page_stmt(sparse, filters, page)).mappings().all()
+        total = session.scalar(projection.count_stmt(filters)) if page.with_total else None
+        result = build_projected_page(rows, page, total)
+        result.items = projection.to_structs(sparse, result.items)  # type: ignore[assignment]
+
+        if result.items:
+            ids = [item.id for item in result.items]  # type: ignore[attr-defined]
+            for name, stmt in projection.collection_stmts(sparse, ids):
+                projection.attach_structs(
+                    result.items, name, session.execute(stmt).mappings().all()  # type: ignore[arg-type]
+                )
+        return encode_page(result)
+
+
+class AsyncCursorPaginationMixin:
+    """Keyset pagination (``list_page``) for async repositories.
+
+    Runs the ``CursorPaginationMixin`` methods through ``sync_delegate``.
+    """
+
+    list_page = sync_delegate(CursorPaginationMixin.list_page)
+    get_validator = sync_delegate(CursorPaginationMixin.get_validator)
+    get_page_validator = sync_delegate(CursorPaginationMixin.get_page_validator)
+    list_projected = sync_delegate(CursorPaginationMixin.list_projected)
+    list_encoded = sync_delegate(CursorPaginationMixin.list_encoded)
+
+
+class ChangeFeedMixin:
+    """Delta sync (``list_changes``) for sync repositories.
+
+    Deletions come from the tombstones that the table's ``AFTER DELETE``
+    trigger records (see ``app.models.TOMBSTONE_TRIGGER_SQL``).
+    """
+
+    def list_changes(self, params: ChangeParams) -> ChangeSet[Any]:
+        """Rows changed and ids deleted after ``params.watermark``, plus the next watermark."""
+        model = self.model_type  # type: ignore[attr-defined]
+        session = self.session  # type: ignore[attr-defined]
+        rows = session.scalars(changed_rows_stmt(model, params)).all()
+        until = deletions_until(rows, params)
+        tombstones = session.execute(tombstones_stmt(model.__tablename__, params, until)).all()
+        return build_change_set(rows, tombstones, params, until)
+
+
+class AsyncChangeFeedMixin:
+    """Delta sync (``list_changes``) for async repositories (see ``sync_delegate``)."""
+
+    list_changes = sync_delegate(ChangeFeedMixin.list_changes)
@@ -1,45 +1,345 @@
 """Repository for Book database operations."""
 
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timezone
+from typing import Annotated, Any, Literal
 
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository, SQLAlchemySyncRepository
+from litestar.params import Dependency
+from sqlalchemy import (
+    REAL,
+    Column,
+    ColumnElement,
+    Delete,
+    Float,
+    Insert,
+    Integer,
+    MetaData,
+    Select,
+    String,
+    Table,
+    Update,
+    delete,
+    cast,
+    exists,
+    func,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.models import Book, Category, Review
+from app.conditional import Related
+from app.models import (
+    Book,
+    BookStats,
+    BookStatsBucket,
+    BookUpsertResult,
+    Category,
+    Loan,
+    Review,
+    book_categories,
+)
+from app.pagination import CursorPage, PageParams, build_ranked_page, ranked_page_stmts
+from app.search import build_tsquery, trigram_match, word_similarity_threshold
+from app.repositories import (
+    AnySession,
+    AsyncChangeFeedMixin,
+    AsyncCursorPaginationMixin,
+    AsyncRelationshipRefreshMixin,
+    ChangeFeedMixin,
+    CursorPaginationMixin,
+    sync_delegate,
+)
 
 
-class BookRepository(SQLAlchemySyncRepository[Book]):
+BookSort = Literal["id", "title", "published_year", "-published_year"]
+
+# orden -> (columnas del keyset, descendente)
+_BOOK_SORTS = {
+    "id": ((Book.id,), False),
+    "title": ((Book.title, Book.id), False),
+    "published_year": ((Book.published_year, Book.id), False),
+    "-published_year": ((Book.published_year, Book.id), True),
+}
+
+
+def _category_filters(
+    category_id: int,
+    available: bool,
+    language: str | None,
+    year_from: int | None,
+    year_to: int | None,
+) -> list[ColumnElement[bool]]:
+    """Pertenencia a la categoría como EXISTS (índice category_id, book_id) y filtros opcionales."""
+    filters = [
+        exists().where(
+            book_categories.c.category_id == category_id,
+            book_categories.c.book_id == Book.id,
+        )
+    ]
+    if available:
+        filters.append(Book.stock > 0)
+    if language is not None:
+        filters.append(Book.language == language)
+    if year_from is not None:
+        filters.append(Book.published_year >= year_from)
+    if year_to is not None:
+        filters.append(Book.published_year <= year_to)
+    return filters
+
+
+def _reconcile_review_stats_stmt() -> Update:
+    """UPDATE de los libros cuyos agregados no coinciden con reviews (RETURNING id)."""
+    count = select(func.count(Review.id)).where(Review.book_id == Book.id).scalar_subquery()
+    total = (
+        select(func.coalesce(func.sum(Review.rating), 0))
+        .where(Review.book_id == Book.id)
+        .scalar_subquery()
+    )
+    average = (
+        select(cast(func.avg(Review.rating), Float))
+        .where(Review.book_id == Book.id)
+        .scalar_subquery()
+    )
+    return (
+        update(Book)
+        .where(or_(Book.review_count != count, Book.rating_sum != total))
+        .values(
+            review_count=count,
+            rating_sum=total,
+            avg_rating=average,
+            updated_at=datetime.now(timezone.utc),
+        )
+        .returning(Book.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _stats_stmt() -> Select:
+    """count/avg/min/max del catálogo en una sola consulta."""
+    return select(
+        func.count(Book.id),
+        func.avg(Book.pages),
+        func.min(Book.published_year),
+        func.max(Book.published_year),
+    )
+
+
+def _stats_breakdown_stmt(column, limit: int) -> Select:
+    """Cantidad de libros y promedio de páginas agrupados por ``column``."""
+    total = func.count(Book.id)
+    return (
+        select(column, total, func.avg(Book.pages))
+        .group_by(column)
+        .order_by(total.desc(), column)
+        .limit(limit)
+    )
+
+
+def _full_text_search_stmts(
+    query: str,
+    language: str | None,
+    page: PageParams,
+) -> tuple[Select, Select]:
+    """Consulta paginada ordenada por ts_rank y su conteo (usa el índice GIN)."""
+    tsquery = build_tsquery(query, language)
+    rank = func.ts_rank(Book.search_vector, tsquery, type_=REAL)
+    conditions = [Book.search_vector.op("@@")(tsquery)]
+    if language is not None:
+        conditions.append(Book.language == language)
+
+    return ranked_page_stmts(Book, rank, conditions, page)
+
+
+def _fuzzy_search_stmts(query: str, fields: Sequence[str], page: PageParams) -> tuple[Select, Select]:
+    """Consulta paginada por similitud de trigramas (índices gin_trgm_ops) y su conteo."""
+    condition, rank = trigram_match(query, [getattr(Book, field) for field in fields])
+    return ranked_page_stmts(Book, rank, [condition], page)
+
+
+def _change_stock_stmt(book_id: int, delta: int) -> Update:
+    """UPDATE books SET stock = stock + delta ... RETURNING stock, sin dejar stock negativo."""
+    conditions = [Book.id == book_id]
+    if delta < 0:
+        conditions.append(Book.stock >= -delta)
+    return (
+        update(Book)
+        .where(*conditions)
+        .values(stock=Book.stock + delta, updated_at=datetime.now(timezone.utc))
+        .returning(Book.stock)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _build_stats(summary, by_language, by_publisher) -> BookStats:
+    """BookStats a partir de las filas de _stats_stmt y _stats_breakdown_stmt."""
+    total_books, average_pages, oldest_year, newest_year = summary
+    return BookStats(
+        total_books=total_books,
+        average_pages=float(average_pages or 0),
+        oldest_publication_year=oldest_year,
+        newest_publication_year=newest_year,
+        by_language=[
+            BookStatsBucket(key=key, total_books=total, average_pages=float(avg or 0))
+            for key, total, avg in by_language
+        ],
+        by_publisher=[
+            BookStatsBucket(key=key, total_books=total, average_pages=float(avg or 0))
+            for key, total, avg in by_publisher
+        ],
+    )
+
+
+# Relaciones que emite BookReadDTO: se cargan en bloque (sin N+1; en async no hay lazy loading)
+_READ_LOADERS = [
+    selectinload(Book.loans),
+    selectinload(Book.reviews),
+    selectinload(Book.categories),
+]
+
+# Lo mismo para los validadores (ETag): contar y fechar también lo embebido
+_VALIDATOR_RELATED = (
+    Related(key=Loan.book_id, source=Book.id, updated_at=Loan.updated_at),
+    Related(key=Review.book_id, source=Book.id, updated_at=Review.updated_at),
+    Related(
+        key=book_categories.c.book_id,
+        source=Book.id,
+        updated_at=Category.updated_at,
+        join=(Category, Category.id == book_categories.c.category_id),
+    ),
+)
+
+BOOK_IMPORT_COLUMNS = (
+    "title",
+    "author",
+    "isbn",
+    "pages",
+    "published_year",
+    "stock",
+    "description",
+    "language",
+    "publisher",
+)
+"""Columns of books loaded by the bulk import (the upsert key is ``isbn``)."""
+
+# Tabla temporal por lote: se crea y elimina dentro de la misma transacción
+_book_import_staging = Table(
+    "book_import_staging",
+    MetaData(),
+    Column("line", Integer, nullable=False),
+    Column("title", String),
+    Column("author", String),
+    Column("isbn", String),
+    Column("pages", Integer),
+    Column("published_year", Integer),
+    Column("stock", Integer),
+    Column("description", String),
+    Column("language", String),
+    Column("publisher", String),
+    prefixes=["TEMPORARY"],
+)
+
+_COPY_STAGING_SQL = (
+    f"COPY {_book_import_staging.name} (line, {', '.join(BOOK_IMPORT_COLUMNS)}) FROM STDIN"
+)
+
+
+def _staging_rows(rows: Sequence[dict[str, Any]]) -> Iterator[tuple[Any, ...]]:
+    for row in rows:
+        yield (row["line"], *(row[column] for column in BOOK_IMPORT_COLUMNS))
+
+
+def _drop_title_conflicts_stmt() -> Delete:
+    """Sacar del lote las filas cuyo título ya usa un libro con otro isbn."""
+    staging = _book_import_staging
+    return (
+        delete(staging)
+        .where(exists().where(Book.title == staging.c.title, Book.isbn != staging.c.isbn))
+        .returning(staging.c.line, staging.c.isbn)
+    )
+
+
+def _existing_isbn_count_stmt() -> Select:
+    """Filas del lote que actualizan un libro existente."""
+    staging = _book_import_staging
+    return select(func.count()).select_from(staging).join(Book, Book.isbn == staging.c.isbn)
+
+
+def _merge_staging_stmt() -> Insert:
+    """INSERT ... SELECT desde la tabla temporal con ON CONFLICT (isbn) DO UPDATE."""
+    staging = _book_import_staging
+    now = datetime.now(timezone.utc)
+    source = select(
+        *(staging.c[column] for column in BOOK_IMPORT_COLUMNS),
+        literal(now, Book.created_at.type),
+        literal(now, Book.updated_at.type),
+    )
+    stmt = postgresql.insert(Book).from_select([*BOOK_IMPORT_COLUMNS, "created_at", "updated_at"], source)
+    return stmt.on_conflict_do_update(
+        index_elements=[Book.isbn],
+        set_={
+            column: stmt.excluded[column]
+            for column in (*BOOK_IMPORT_COLUMNS, "updated_at")
+            if column != "isbn"
+        },
+    )
+
+
+class BookRepository(CursorPaginationMixin, ChangeFeedMixin, SQLAlchemySyncRepository[Book]):
     """Repository for book database operations."""
 
     model_type = Book
+    loader_options = _READ_LOADERS
+    validator_related = _VALIDATOR_RELATED
 
     def get_available_books(self) -> Sequence[Book]:
         """Retornar libros con stock > 0."""
-        stmt = select(Book).where(Book.stock > 0)
-        return self.session.scalars(stmt).all()
+        return self.list(Book.stock > 0)
 
-    def find_by_category(self, category_id: int) -> Sequence[Book]:
-        """Buscar libros que pertenecen a una categoría dada."""
-        stmt = (
-            select(Book)
-            .join(Book.categories)
-            .where(Category.id == category_id)
+    def find_by_category(
+        self,
+        category_id: int,
+        page: PageParams,
+        available: bool = False,
+        language: str | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        sort: BookSort = "id",
+    ) -> CursorPage[Book]:
+        """Libros de una categoría (paginado por cursor) con filtros y orden."""
+        keyset, descending = _BOOK_SORTS[sort]
+        return self.list_page(
+            *_category_filters(category_id, available, language, year_from, year_to),
+            page=page,
+            keyset=keyset,
+            descending=descending,
         )
-        return self.session.scalars(stmt).all()
 
     def get_most_reviewed_books(self, limit: int = 10) -> Sequence[Book]:
-        """Libros ordenados por cantidad de reseñas (descendente)."""
-        review_count = func.count(Review.id).label("review_count")
+        """Libros ordenados por cantidad de reseñas (descendente), usando review_count."""
+        stmt = select(Book).order_by(Book.review_count.desc(), Book.id.desc()).limit(limit)
+        return self.list(statement=stmt)
 
+    def get_best_rated_books(self, limit: int = 10, min_reviews: int = 1) -> Sequence[Book]:
+        """Libros con mejor rating promedio (desempata por cantidad de reseñas)."""
         stmt = (
             select(Book)
-            .outerjoin(Review, Review.book_id == Book.id)
-            .group_by(Book.id)
-            .order_by(review_count.desc())
+            .where(Book.review_count >= min_reviews)
+            .order_by(Book.avg_rating.desc().nulls_last(), Book.review_count.desc())
             .limit(limit)
         )
-        return self.session.scalars(stmt).all()
+        return self.list(statement=stmt)
+
+    def reconcile_review_stats(self) -> int:
+        """Recalcular review_count/rating_sum/avg_rating desde reviews; retorna los libros corregidos."""
+        fixed = len((self.session.execute(_reconcile_review_stats_stmt())).all())
+        if getattr(self, "auto_commit", False):
+            self.session.commit()
+        return fixed
 
     def update_stock(self, book_id: int, quantity: int) -> Book:
         """Actualizar el stock de un libro, validando que no quede negativo."""
@@ -60,13 +360,152 @@ class BookRepository(SQLAlchemySyncRepository[Book]):
 
         return book
 
+    def reserve_copy(self, book_id: int) -> int | None:
+        """
+        Descontar un ejemplar si hay stock, en un solo UPDATE condicional.
+        Retorna el stock restante, o None si el libro no existe o no tiene stock.
+        No hace commit: se confirma junto con el préstamo.
+        """
+        return self.session.scalar(_change_stock_stmt(book_id, -1))
+
+    def release_copy(self, book_id: int) -> int | None:
+        """Devolver un ejemplar al stock (incremento atómico); retorna el stock resultante."""
+        return self.session.scalar(_change_stock_stmt(book_id, 1))
+
     def search_by_author(self, author_name: str) -> Sequence[Book]:
         """Buscar libros por autor (búsqueda parcial, case-insensitive)."""
         pattern = f"%{author_name}%"
-        stmt = select(Book).where(Book.author.ilike(pattern))
-        return self.session.scalars(stmt).all()
+        return self.list(Book.author.ilike(pattern))
+
+    def full_text_search(
+        self,
+        query: str,
+        page: PageParams,
+        language: str | None = None,
+    ) -> CursorPage[Book]:
+        """Búsqueda full-text sobre título/autor/descripción/editorial ordenada por relevancia."""
+        stmt, count_stmt = _full_text_search_stmts(query, language, page)
+        rows = self.session.execute(stmt.options(*self.loader_options)).all()
+        total = self.session.scalar(count_stmt) if page.with_total else None
+        return build_ranked_page(rows, page, total)
+
+    def fuzzy_search(
+        self,
+        query: str,
+        page: PageParams,
+        threshold: float,
+        fields: Sequence[str] = ("title", "author"),
+    ) -> CursorPage[Book]:
+        """Búsqueda difusa (tolerante a errores de tipeo) por título y/o autor."""
+        self.session.execute(word_similarity_threshold(threshold))
+        stmt, count_stmt = _fuzzy_search_stmts(query, fields, page)
+        rows = self.session.execute(stmt.options(*self.loader_options)).all()
+        total = self.session.scalar(count_stmt) if page.with_total else None
+        return build_ranked_page(rows, page, total)
+
+    def get_stats(self, breakdown_limit: int = 20) -> BookStats:
+        """Estadísticas del catálogo calculadas en SQL (sin cargar los libros)."""
+        summary = self.session.execute(_stats_stmt()).one()
+        language_stmt = _stats_breakdown_stmt(Book.language, breakdown_limit)
+        publisher_stmt = _stats_breakdown_stmt(Book.publisher, breakdown_limit)
+        by_language = self.session.execute(language_stmt).all()
+        by_publisher = self.session.execute(publisher_stmt).all()
+        return _build_stats(summary, by_language, by_publisher)
+
+    def upsert_batch(self, rows: Sequence[dict[str, Any]]) -> BookUpsertResult:
+        """
+        Insertar o actualizar (por isbn) un lote de filas ya validadas.
+        Carga el lote con COPY en una tabla temporal y lo mezcla con un solo INSERT ... ON CONFLICT.
+        """
+        connection = self.session.connection()
+        _book_import_staging.create(connection)
+        with connection.connection.driver_connection.cursor() as cursor:
+            with cursor.copy(_COPY_STAGING_SQL) as copy:
+                for row in _staging_rows(rows):
+                    copy.write_row(row)
+
+        title_conflicts = [tuple(row) for row in connection.execute(_drop_title_conflicts_stmt())]
+        updated = connection.scalar(_existing_isbn_count_stmt())
+        connection.execute(_merge_staging_stmt())
+        _book_import_staging.drop(connection)
+
+        if getattr(self, "auto_commit", False):
+            self.session.commit()
+
+        return BookUpsertResult(
+            inserted=len(rows) - len(title_conflicts) - updated,
+            updated=updated,
+            title_conflicts=title_conflicts,
+        )
+
+
+class AsyncBookRepository(
+    AsyncRelationshipRefreshMixin,
+    AsyncCursorPaginationMixin,
+    AsyncChangeFeedMixin,
+    SQLAlchemyAsyncRepository[Book],
+):
+    """Async repository for book database operations (runs ``BookRepository``)."""
+
+    model_type = Book
+    sync_repository = BookRepository
+    loader_options = _READ_LOADERS
+    refresh_relationships = ("loans", "reviews", "categories")
+
+    get_available_books = sync_delegate(BookRepository.get_available_books)
+    find_by_category = sync_delegate(BookRepository.find_by_category)
+    get_most_reviewed_books = sync_delegate(BookRepository.get_most_reviewed_books)
+    get_best_rated_books = sync_delegate(BookRepository.get_best_rated_books)
+    reconcile_review_stats = sync_delegate(BookRepository.reconcile_review_stats, commit=True)
+    update_stock = sync_delegate(BookRepository.update_stock, commit=True)
+    reserve_copy = sync_delegate(BookRepository.reserve_copy)
+    release_copy = sync_delegate(BookRepository.release_copy)
+    search_by_author = sync_delegate(BookRepository.search_by_author)
+    full_text_search = sync_delegate(BookRepository.full_text_search)
+    fuzzy_search = sync_delegate(BookRepository.fuzzy_search)
+    get_stats = sync_delegate(BookRepository.get_stats)
+
+    # COPY usa la API async del driver: es el único método que no delega en BookRepository
+    async def upsert_batch(self, rows: Sequence[dict[str, Any]]) -> BookUpsertResult:
+        """
+        Insertar o actualizar (por isbn) un lote de filas ya validadas.
+        Carga el lote con COPY en una tabla temporal y lo mezcla con un solo INSERT ... ON CONFLICT.
+        """
+        connection = await self.session.connection()
+        await connection.run_sync(_book_import_staging.create)
+        raw_connection = await connection.get_raw_connection()
+        async with raw_connection.driver_connection.cursor() as cursor:
+            async with cursor.copy(_COPY_STAGING_SQL) as copy:
+                for row in _staging_rows(rows):
+                    await copy.write_row(row)
+
+        conflicts = await connection.execute(_drop_title_conflicts_stmt())
+        title_conflicts = [tuple(row) for row in conflicts]
+        updated = await connection.scalar(_existing_isbn_count_stmt())
+        await connection.execute(_merge_staging_stmt())
+        await connection.run_sync(_book_import_staging.drop)
+
+        if getattr(self, "auto_commit", False):
+            await self.session.commit()
+
+        return BookUpsertResult(
+            inserted=len(rows) - len(title_conflicts) - updated,
+            updated=updated,
+            title_conflicts=title_conflicts,
+        )
+
+
+AnyBookRepository = Annotated[
+    BookRepository | AsyncBookRepository,
+    Dependency(skip_validation=True),
+]
+"""Book repository for the configured engine mode (sync or async)."""
 
 
-async def provide_book_repo(db_session: Session) -> BookRepository:
+async def provide_book_repo(
+    db_session: AnySession,
+) -> BookRepository | AsyncBookRepository:
     """Provide book repository instance with auto-commit."""
+    if isinstance(db_session, AsyncSession):
+        return AsyncBookRepository(session=db_session, auto_commit=True)
     return BookRepository(session=db_session, auto_commit=True)
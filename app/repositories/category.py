@@ -1,17 +1,93 @@
 """Repository for Category database operations."""
 
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy.orm import Session
+from collections.abc import Sequence
+from typing import Annotated
 
-from app.models import Category
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository, SQLAlchemySyncRepository
+from litestar.params import Dependency
+from sqlalchemy import Delete, Insert, delete, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models import Book, Category, book_categories
+from app.repositories import (
+    AnySession,
+    AsyncChangeFeedMixin,
+    AsyncCursorPaginationMixin,
+    ChangeFeedMixin,
+    CursorPaginationMixin,
+    sync_delegate,
+)
 
-class CategoryRepository(SQLAlchemySyncRepository[Category]):
+
+def _add_books_stmt(category_id: int, book_ids: Sequence[int]) -> Insert:
+    """INSERT INTO book_categories SELECT ... ON CONFLICT DO NOTHING RETURNING book_id."""
+    source = select(Book.id, literal(category_id)).where(Book.id.in_(book_ids))
+    return (
+        postgresql.insert(book_categories)
+        .from_select(["book_id", "category_id"], source)
+        .on_conflict_do_nothing()
+        .returning(book_categories.c.book_id)
+    )
+
+
+def _remove_books_stmt(category_id: int, book_ids: Sequence[int]) -> Delete:
+    return delete(book_categories).where(
+        book_categories.c.category_id == category_id,
+        book_categories.c.book_id.in_(book_ids),
+    )
+
+
+class CategoryRepository(
+    CursorPaginationMixin,
+    ChangeFeedMixin,
+    SQLAlchemySyncRepository[Category],
+):
     """Repository for category database operations."""
 
     model_type = Category
 
+    def add_books(self, category_id: int, book_ids: Sequence[int]) -> int:
+        """Asociar libros a la categoría en un solo INSERT (ignora los ya asociados e ids inexistentes)."""
+        stmt = _add_books_stmt(category_id, book_ids)
+        added = len(self.session.execute(stmt).all())
+        if getattr(self, "auto_commit", False):
+            self.session.commit()
+        return added
+
+    def remove_books(self, category_id: int, book_ids: Sequence[int]) -> int:
+        """Quitar libros de la categoría en un solo DELETE; retorna cuántos se quitaron."""
+        removed = self.session.execute(_remove_books_stmt(category_id, book_ids)).rowcount
+        if getattr(self, "auto_commit", False):
+            self.session.commit()
+        return removed
+
+
+class AsyncCategoryRepository(
+    AsyncCursorPaginationMixin,
+    AsyncChangeFeedMixin,
+    SQLAlchemyAsyncRepository[Category],
+):
+    """Async repository for category database operations (runs ``CategoryRepository``)."""
+
+    model_type = Category
+    sync_repository = CategoryRepository
+
+    add_books = sync_delegate(CategoryRepository.add_books, commit=True)
+    remove_books = sync_delegate(CategoryRepository.remove_books, commit=True)
+
+
+AnyCategoryRepository = Annotated[
+    CategoryRepository | AsyncCategoryRepository,
+    Dependency(skip_validation=True),
+]
+"""Category repository for the configured engine mode (sync or async)."""
+
 
-async def provide_category_repo(db_session: Session) -> CategoryRepository:
+async def provide_category_repo(
+    db_session: AnySession,
+) -> CategoryRepository | AsyncCategoryRepository:
     """Provide category repository instance with auto-commit."""
+    if isinstance(db_session, AsyncSession):
+        return AsyncCategoryRepository(session=db_session, auto_commit=True)
     return CategoryRepository(session=db_session, auto_commit=True)
@@ -1,55 +1,125 @@
 """Repository for Loan database operations."""
 
 from collections.abc import Sequence
-from datetime import date
+from datetime import date, datetime, timezone
 from decimal import Decimal
+from typing import Annotated, Any
 
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository, SQLAlchemySyncRepository
+from litestar.params import Dependency
+from sqlalchemy import ColumnElement, Update, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models import Loan, LoanStatus
+from app.conditional import Related, Validator
+from app.models import Book, Loan, LoanStatus, User
+from app.pagination import CursorPage, PageParams
+from app.repositories import (
+    AnySession,
+    AsyncChangeFeedMixin,
+    AsyncCursorPaginationMixin,
+    AsyncRelationshipRefreshMixin,
+    ChangeFeedMixin,
+    CursorPaginationMixin,
+    sync_delegate,
+)
+from app.repositories.book import BookRepository
 
 
-class LoanRepository(SQLAlchemySyncRepository[Loan]):
+# LoanReadDTO emite user y book (muchos-a-uno): un JOIN en la misma consulta, sin N+1
+_READ_LOADERS = [joinedload(Loan.user), joinedload(Loan.book)]
+_VALIDATOR_RELATED = (
+    Related(key=User.id, source=Loan.user_id, updated_at=User.updated_at),
+    Related(key=Book.id, source=Loan.book_id, updated_at=Book.updated_at),
+)
+
+
+def _overdue_filters() -> list[ColumnElement[bool]]:
+    """Vencidos: due_date pasada y aún no devueltos (ya barridos o pendientes del barrido)."""
+    return [
+        Loan.status.in_([LoanStatus.ACTIVE, LoanStatus.OVERDUE]),
+        Loan.due_date < date.today(),
+    ]
+
+
+def _mark_overdue_stmt() -> Update:
+    """UPDATE ... RETURNING id de los préstamos ACTIVE con due_date pasada."""
+    return (
+        update(Loan)
+        .where(Loan.status == LoanStatus.ACTIVE, Loan.due_date < date.today())
+        .values(status=LoanStatus.OVERDUE, updated_at=datetime.now(timezone.utc))
+        .returning(Loan.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _fine(due_date: date | None, today: date) -> Decimal:
+    """Multa de $500 por día de retraso respecto de due_date."""
+    if due_date is None:
+        return Decimal("0.00")
+    days_late = (today - due_date).days
+    return Decimal(days_late) * Decimal("500.00") if days_late > 0 else Decimal("0.00")
+
+
+def _return_stmt(loan_id: int, today: date, fine: Decimal, now: datetime) -> Update:
+    """UPDATE ... RETURNING book_id solo si el préstamo no estaba devuelto: dos devoluciones
+    simultáneas no liberan dos ejemplares."""
+    return (
+        update(Loan)
+        .where(Loan.id == loan_id, Loan.status != LoanStatus.RETURNED)
+        .values(status=LoanStatus.RETURNED, return_dt=today, fine_amount=fine, updated_at=now)
+        .returning(Loan.book_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _reopen_stmt(loan_id: int, status: LoanStatus, now: datetime) -> Update:
+    """UPDATE ... RETURNING book_id solo si el préstamo estaba devuelto (lo vuelve a abrir)."""
+    return (
+        update(Loan)
+        .where(Loan.id == loan_id, Loan.status == LoanStatus.RETURNED)
+        .values(status=status, return_dt=None, fine_amount=None, updated_at=now)
+        .returning(Loan.book_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _set_committed(loan: Loan, **values: Any) -> None:
+    """Reflejar en la instancia lo que escribió un UPDATE (sin marcarla como modificada)."""
+    for key, value in values.items():
+        set_committed_value(loan, key, value)
+
+
+# Bloquea solo la fila del préstamo mientras se borra y se devuelve su ejemplar
+_LOCK_LOAN_STMT = select(Loan).with_for_update(of=Loan)
+_OPEN_STATUSES = (LoanStatus.ACTIVE, LoanStatus.OVERDUE)
+
+
+class LoanRepository(CursorPaginationMixin, ChangeFeedMixin, SQLAlchemySyncRepository[Loan]):
     """Repository for loan database operations."""
 
     model_type = Loan
+    loader_options = _READ_LOADERS
+    validator_related = _VALIDATOR_RELATED
 
     def get_active_loans(self) -> Sequence[Loan]:
         """Préstamos con status == ACTIVE."""
-        stmt = select(Loan).where(Loan.status == LoanStatus.ACTIVE)
-        return self.session.scalars(stmt).all()
+        return self.list(Loan.status == LoanStatus.ACTIVE)
 
-    def get_overdue_loans(self) -> Sequence[Loan]:
+    def get_overdue_loans(self, page: PageParams) -> CursorPage[Loan]:
         """
-        Préstamos vencidos: due_date pasada y status == ACTIVE.
-        Además, actualiza su status a OVERDUE.
+        Préstamos vencidos (paginado por cursor, el más atrasado primero).
+        Solo lectura: el cambio de status a OVERDUE lo hace el barrido periódico.
         """
-        today = date.today()
+        return self.list_page(*_overdue_filters(), page=page, keyset=(Loan.due_date, Loan.id))
 
-        stmt = (
-            select(Loan)
-            .where(
-                Loan.status == LoanStatus.ACTIVE,
-                Loan.due_date.is_not(None),
-                Loan.due_date < today,
-            )
-        )
-
-        overdue_loans = self.session.scalars(stmt).all()
-
-        for loan in overdue_loans:
-            loan.status = LoanStatus.OVERDUE
-
-        if overdue_loans:
-            self.session.add_all(overdue_loans)
-            if getattr(self, "auto_commit", False):
-                self.session.commit()
-            else:
-                self.session.flush()
-
-        return overdue_loans
+    def mark_overdue_loans(self) -> Sequence[int]:
+        """Pasar a OVERDUE los préstamos ACTIVE vencidos en un solo UPDATE; devuelve sus ids."""
+        ids = self.session.scalars(_mark_overdue_stmt()).all()
+        if getattr(self, "auto_commit", False):
+            self.session.commit()
+        return ids
 
     def calculate_fine(self, loan_id: int) -> Decimal:
         """
@@ -71,36 +141,62 @@ class LoanRepository(SQLAlchemySyncRepository[Loan]):
 
         return Decimal(days_late) * Decimal("500.00")
 
-    def return_book(self, loan_id: int) -> Loan:
+    def return_book(self, loan_id: int) -> Loan | None:
         """
         Procesar devolución:
         - status -> RETURNED
         - return_dt -> fecha actual
         - fine_amount -> calcular y guardar si corresponde
         - incrementar stock del libro asociado
+        Retorna None si el préstamo ya estaba devuelto (no se toca el stock).
         """
-        loan = self.session.get(Loan, loan_id)
+        loan = self.session.get(Loan, loan_id, options=self.loader_options)
         if loan is None:
             raise ValueError(f"Loan with id {loan_id} not found.")
 
         today = date.today()
-        loan.return_dt = today
+        now = datetime.now(timezone.utc)
+        fine = _fine(loan.due_date, today)
+
+        # El UPDATE condicional decide quién devuelve: solo se libera el ejemplar si cambió la fila
+        book_id = self.session.scalar(_return_stmt(loan_id, today, fine, now))
+        if book_id is None:
+            return None
+        _set_committed(loan, status=LoanStatus.RETURNED, return_dt=today, fine_amount=fine, updated_at=now)
 
-        # Calcular multa en base a la due_date
-        fine = Decimal("0.00")
-        if loan.due_date is not None:
-            days_late = (today - loan.due_date).days
-            if days_late > 0:
-                fine = Decimal(days_late) * Decimal("500.00")
+        # Incrementar stock del libro con un UPDATE atómico (sin leer-modificar-escribir)
+        stock = BookRepository(session=self.session).release_copy(book_id)
+        if stock is not None and loan.book is not None:
+            set_committed_value(loan.book, "stock", stock)
+
+        if getattr(self, "auto_commit", False):
+            self.session.commit()
+        else:
+            self.session.flush()
 
-        loan.fine_amount = fine
-        loan.status = LoanStatus.RETURNED
+        return loan
 
-        # Incrementar stock del libro
-        if loan.book is not None:
-            loan.book.stock = (loan.book.stock or 0) + 1
+    def reopen_loan(self, loan_id: int, status: LoanStatus) -> Loan | None:
+        """
+        Volver a abrir (ACTIVE/OVERDUE) un préstamo devuelto, reservando otra vez un ejemplar.
+        Retorna None si el libro no tiene stock (el préstamo sigue devuelto).
+        """
+        loan = self.get(loan_id)
+        books = BookRepository(session=self.session)
+        stock = books.reserve_copy(loan.book_id)
+        if stock is None:
+            return None
+
+        now = datetime.now(timezone.utc)
+        if self.session.scalar(_reopen_stmt(loan_id, status, now)) is None:
+            # Otra request ya lo reabrió (y reservó su ejemplar): se devuelve el reservado aquí
+            books.release_copy(loan.book_id)
+            self.session.refresh(loan)
+        else:
+            _set_committed(loan, status=status, return_dt=None, fine_amount=None, updated_at=now)
+            if loan.book is not None:
+                set_committed_value(loan.book, "stock", stock)
 
-        self.session.add(loan)
         if getattr(self, "auto_commit", False):
             self.session.commit()
         else:
@@ -108,16 +204,67 @@ class LoanRepository(SQLAlchemySyncRepository[Loan]):
 
         return loan
 
-    def get_user_loan_history(self, user_id: int) -> Sequence[Loan]:
-        """Historial completo de préstamos de un usuario ordenado por fecha."""
-        stmt = (
-            select(Loan)
-            .where(Loan.user_id == user_id)
-            .order_by(Loan.loan_dt.desc())
+    def delete_loan(self, loan_id: int) -> Loan:
+        """Borrar el préstamo; si seguía abierto (ACTIVE/OVERDUE), su ejemplar vuelve al stock."""
+        loan = self.get(loan_id, statement=_LOCK_LOAN_STMT)
+        if loan.status in _OPEN_STATUSES:
+            BookRepository(session=self.session).release_copy(loan.book_id)
+        return self.delete(loan_id)
+
+    def get_user_loan_history(self, user_id: int, page: PageParams) -> CursorPage[Loan]:
+        """Historial de préstamos de un usuario ordenado por fecha (paginado por cursor)."""
+        return self.list_page(
+            Loan.user_id == user_id,
+            page=page,
+            keyset=(Loan.loan_dt, Loan.id),
+            descending=True,
+        )
+
+    def get_user_loan_history_validator(self, user_id: int, page: PageParams) -> Validator:
+        """Validador (ETag) de la misma página que get_user_loan_history."""
+        return self.get_page_validator(
+            Loan.user_id == user_id,
+            page=page,
+            keyset=(Loan.loan_dt, Loan.id),
+            descending=True,
         )
-        return self.session.scalars(stmt).all()
 
 
-async def provide_loan_repo(db_session: Session) -> LoanRepository:
+class AsyncLoanRepository(
+    AsyncRelationshipRefreshMixin,
+    AsyncCursorPaginationMixin,
+    AsyncChangeFeedMixin,
+    SQLAlchemyAsyncRepository[Loan],
+):
+    """Async repository for loan database operations (runs ``LoanRepository``)."""
+
+    model_type = Loan
+    sync_repository = LoanRepository
+    loader_options = _READ_LOADERS
+    refresh_relationships = ("user", "book")
+
+    get_active_loans = sync_delegate(LoanRepository.get_active_loans)
+    get_overdue_loans = sync_delegate(LoanRepository.get_overdue_loans)
+    mark_overdue_loans = sync_delegate(LoanRepository.mark_overdue_loans, commit=True)
+    calculate_fine = sync_delegate(LoanRepository.calculate_fine)
+    return_book = sync_delegate(LoanRepository.return_book, commit=True)
+    reopen_loan = sync_delegate(LoanRepository.reopen_loan, commit=True)
+    delete_loan = sync_delegate(LoanRepository.delete_loan, commit=True)
+    get_user_loan_history = sync_delegate(LoanRepository.get_user_loan_history)
+    get_user_loan_history_validator = sync_delegate(LoanRepository.get_user_loan_history_validator)
+
+
+AnyLoanRepository = Annotated[
+    LoanRepository | AsyncLoanRepository,
+    Dependency(skip_validation=True),
+]
+"""Loan repository for the configured engine mode (sync or async)."""
+
+
+async def provide_loan_repo(
+    db_session: AnySession,
+) -> LoanRepository | AsyncLoanRepository:
     """Provide loan repository instance with auto-commit."""
+    if isinstance(db_session, AsyncSession):
+        return AsyncLoanRepository(session=db_session, auto_commit=True)
     return LoanRepository(session=db_session, auto_commit=True)
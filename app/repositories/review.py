@@ -1,17 +1,127 @@
 """Repository for Review database operations."""
 
-from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Annotated, Any
 
-from app.models import Review
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository, SQLAlchemySyncRepository
+from litestar.params import Dependency
+from sqlalchemy import Float, Update, cast, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
+from app.conditional import Related
+from app.models import Book, Review, User
+from app.repositories import (
+    AnySession,
+    AsyncCursorPaginationMixin,
+    AsyncRelationshipRefreshMixin,
+    CursorPaginationMixin,
+    sync_delegate,
+)
 
-class ReviewRepository(SQLAlchemySyncRepository[Review]):
+
+# ReviewReadDTO emite user y book (muchos-a-uno): un JOIN en la misma consulta, sin N+1
+_READ_LOADERS = [joinedload(Review.user), joinedload(Review.book)]
+# Bloquea solo la fila de reviews: PostgreSQL no acepta FOR UPDATE sobre el lado nullable
+# de los LEFT JOIN que agregan los loaders de user y book
+_LOCK_REVIEW_STMT = select(Review).with_for_update(of=Review)
+_VALIDATOR_RELATED = (
+    Related(key=User.id, source=Review.user_id, updated_at=User.updated_at),
+    Related(key=Book.id, source=Review.book_id, updated_at=Book.updated_at),
+)
+
+
+def _review_stats_stmt(book_id: int, count_delta: int, rating_delta: int) -> Update:
+    """Ajuste atómico de review_count/rating_sum/avg_rating de un libro."""
+    count = Book.review_count + count_delta
+    total = Book.rating_sum + rating_delta
+    return (
+        update(Book)
+        .where(Book.id == book_id)
+        .values(
+            review_count=count,
+            rating_sum=total,
+            avg_rating=cast(total, Float) / func.nullif(count, 0),
+            updated_at=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _review_change_stmts(
+    old_book_id: int,
+    old_rating: int,
+    new_book_id: int,
+    new_rating: int,
+) -> list[Update]:
+    if old_book_id == new_book_id:
+        if old_rating == new_rating:
+            return []
+        return [_review_stats_stmt(new_book_id, 0, new_rating - old_rating)]
+    return [
+        _review_stats_stmt(old_book_id, -1, -old_rating),
+        _review_stats_stmt(new_book_id, 1, new_rating),
+    ]
+
+
+class ReviewRepository(CursorPaginationMixin, SQLAlchemySyncRepository[Review]):
     """Repository for review database operations."""
 
     model_type = Review
+    loader_options = _READ_LOADERS
+    validator_related = _VALIDATOR_RELATED
+
+    def add_review(self, review: Review) -> Review:
+        """Crear la reseña y sumarla a los agregados del libro en la misma transacción."""
+        self.session.execute(_review_stats_stmt(review.book_id, 1, review.rating))
+        return self.add(review)
+
+    def update_review(self, review_id: int, data: dict[str, Any]) -> Review:
+        """Actualizar la reseña ajustando los agregados del libro (o de ambos, si cambia de libro)."""
+        review = self.get(review_id, statement=_LOCK_REVIEW_STMT)
+        old_book_id, old_rating = review.book_id, review.rating
+        for key, value in data.items():
+            setattr(review, key, value)
+
+        for stmt in _review_change_stmts(old_book_id, old_rating, review.book_id, review.rating):
+            self.session.execute(stmt)
+        return self.update(review)
+
+    def delete_review(self, review_id: int) -> Review:
+        """Borrar la reseña y descontarla de los agregados del libro."""
+        review = self.get(review_id, statement=_LOCK_REVIEW_STMT)
+        self.session.execute(_review_stats_stmt(review.book_id, -1, -review.rating))
+        return self.delete(review_id)
+
+
+class AsyncReviewRepository(
+    AsyncRelationshipRefreshMixin,
+    AsyncCursorPaginationMixin,
+    SQLAlchemyAsyncRepository[Review],
+):
+    """Async repository for review database operations (runs ``ReviewRepository``)."""
+
+    model_type = Review
+    sync_repository = ReviewRepository
+    loader_options = _READ_LOADERS
+    refresh_relationships = ("user", "book")
+
+    add_review = sync_delegate(ReviewRepository.add_review, commit=True)
+    update_review = sync_delegate(ReviewRepository.update_review, commit=True)
+    delete_review = sync_delegate(ReviewRepository.delete_review, commit=True)
+
+
+AnyReviewRepository = Annotated[
+    ReviewRepository | AsyncReviewRepository,
+    Dependency(skip_validation=True),
+]
+"""Review repository for the configured engine mode (sync or async)."""
 
 
-async def provide_review_repo(db_session: Session) -> ReviewRepository:
+async def provide_review_repo(
+    db_session: AnySession,
+) -> ReviewRepository | AsyncReviewRepository:
     """Provide review repository instance with auto-commit."""
+    if isinstance(db_session, AsyncSession):
+        return AsyncReviewRepository(session=db_session, auto_commit=True)
     return ReviewRepository(session=db_session, auto_commit=True)
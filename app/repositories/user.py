@@ -1,28 +1,72 @@
 """Repository for User database operations."""
 
-from advanced_alchemy.repository import SQLAlchemySyncRepository
+from typing import Annotated
+
+from advanced_alchemy.repository import SQLAlchemyAsyncRepository, SQLAlchemySyncRepository
 from litestar.dto import DTOData
-from pwdlib import PasswordHash
-from sqlalchemy.orm import Session
+from litestar.params import Dependency
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import User
+from app.pagination import CursorPage, PageParams, build_ranked_page, ranked_page_stmts
+from app.repositories import (
+    AnySession,
+    AsyncCursorPaginationMixin,
+    CursorPaginationMixin,
+    sync_delegate,
+)
+from app.search import trigram_match, word_similarity_threshold
+
 
-password_hasher = PasswordHash.recommended()
+def _fuzzy_search_stmts(query: str, page: PageParams) -> tuple[Select, Select]:
+    """Page of users similar to ``query`` (username or fullname) and its count."""
+    condition, rank = trigram_match(query, [User.username, User.fullname])
+    return ranked_page_stmts(User, rank, [condition], page)
 
 
-class UserRepository(SQLAlchemySyncRepository[User]):
+class UserRepository(CursorPaginationMixin, SQLAlchemySyncRepository[User]):
     """Repository for user database operations."""
 
     model_type = User
 
-    def add_with_hashed_password(self, data: DTOData[User]):
-        """Add user with hashed password."""
+    def add_with_hashed_password(self, data: DTOData[User], hashed_password: str):
+        """Add user storing ``hashed_password`` instead of the plain one."""
         data_dict = data.as_builtins()
-        data_dict["password"] = password_hasher.hash(data_dict["password"])
+        data_dict["password"] = hashed_password
 
         return self.add(User(**data_dict))
 
+    def fuzzy_search(self, query: str, page: PageParams, threshold: float) -> CursorPage[User]:
+        """Users whose username or full name resemble ``query`` (pg_trgm)."""
+        self.session.execute(word_similarity_threshold(threshold))
+        stmt, count_stmt = _fuzzy_search_stmts(query, page)
+        rows = self.session.execute(stmt).all()
+        total = self.session.scalar(count_stmt) if page.with_total else None
+        return build_ranked_page(rows, page, total)
+
+
+class AsyncUserRepository(AsyncCursorPaginationMixin, SQLAlchemyAsyncRepository[User]):
+    """Async repository for user database operations (runs ``UserRepository``)."""
+
+    model_type = User
+    sync_repository = UserRepository
+
+    add_with_hashed_password = sync_delegate(UserRepository.add_with_hashed_password, commit=True)
+    fuzzy_search = sync_delegate(UserRepository.fuzzy_search)
+
+
+AnyUserRepository = Annotated[
+    UserRepository | AsyncUserRepository,
+    Dependency(skip_validation=True),
+]
+"""User repository for the configured engine mode (sync or async)."""
+
 
-async def provide_user_repo(db_session: Session) -> UserRepository:
+async def provide_user_repo(
+    db_session: AnySession,
+) -> UserRepository | AsyncUserRepository:
     """Provide user repository instance with auto-commit."""
+    if isinstance(db_session, AsyncSession):
+        return AsyncUserRepository(session=db_session, auto_commit=True)
     return UserRepository(session=db_session, auto_commit=True)
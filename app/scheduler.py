@@ -0,0 +1,274 @@
+"""Periodic background jobs run inside the app.
+
+Every worker process starts the scheduler, but only the leader runs the jobs:
+the worker holding a session-level PostgreSQL advisory lock on a dedicated
+connection. The others skip their ticks and try to take the lock on each one,
+so a new leader is elected when the old one exits or loses its connection.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import zlib
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Connection, NullPool, create_engine, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache import response_cache
+from app.changes import prune_tombstones_stmt
+from app.config import settings
+from app.repositories import resolve
+from app.repositories.book import AsyncBookRepository, BookRepository
+from app.repositories.loan import AsyncLoanRepository, LoanRepository
+
+logger = logging.getLogger(__name__)
+
+JobFn = Callable[[Session | AsyncSession], int | Awaitable[int]]
+
+
+@dataclass
+class JobStats:
+    """Run counters of a periodic job in this worker."""
+
+    name: str
+    interval: float
+    runs: int
+    skipped: int
+    failures: int
+    last_run_at: datetime | None
+    last_result: int | None
+    last_duration_ms: float | None
+
+
+class LeaderLock:
+    """Session-level advisory lock held by the worker that runs the periodic jobs.
+
+    It lives on its own connection (outside the app's pool, in autocommit so
+    ``idle_in_transaction_session_timeout`` does not end it); PostgreSQL
+    releases it when that connection closes. Without PostgreSQL every worker
+    is the leader.
+    """
+
+    def __init__(self, name: str, url: str) -> None:
+        # Clave estable por nombre para pg_try_advisory_lock
+        self.key = zlib.crc32(name.encode())
+        self.url = url
+        self._connection: Connection | None = None
+        self._mutex = threading.Lock()
+
+    def _acquire_sync(self) -> bool:
+        from app.db import _connect_args
+
+        with self._mutex:
+            if self._connection is not None:
+                try:
+                    self._connection.execute(select(1))
+                    return True
+                except DBAPIError:
+                    # Conexión caída: el lock ya se liberó; se compite de nuevo por él
+                    logger.warning("Scheduler lost its leader connection", exc_info=True)
+                    self._release_sync()
+
+            engine = create_engine(self.url, poolclass=NullPool, connect_args=_connect_args(self.url))
+            connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            if connection.scalar(select(func.pg_try_advisory_lock(self.key))):
+                self._connection = connection
+                logger.info("This worker is now the scheduler leader")
+                return True
+            connection.close()
+            engine.dispose()
+            return False
+
+    def _release_sync(self) -> None:
+        if self._connection is not None:
+            engine = self._connection.engine
+            try:
+                self._connection.close()
+            except DBAPIError:
+                pass
+            engine.dispose()
+            self._connection = None
+
+    async def acquire(self) -> bool:
+        """Whether this worker is (or has just become) the leader."""
+        if make_url(self.url).get_backend_name() != "postgresql":
+            return True
+        try:
+            return await asyncio.to_thread(self._acquire_sync)
+        except DBAPIError:
+            logger.warning("Could not take the scheduler leader lock", exc_info=True)
+            return False
+
+    async def release(self) -> None:
+        """Close the leader connection, which frees the lock for another worker."""
+        await asyncio.to_thread(self._release_sync)
+
+
+class PeriodicJob:
+    """A function run every ``interval`` seconds by the leader worker.
+
+    When it changes rows (result > 0) it invalidates the response cache tags in
+    ``invalidates``, like the write routes' ``opt["invalidates"]``.
+    """
+
+    def __init__(self, name: str, interval: float, fn: JobFn, invalidates: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.invalidates = invalidates
+        self._runs = 0
+        self._skipped = 0
+        self._failures = 0
+        self._last_run_at: datetime | None = None
+        self._last_result: int | None = None
+        self._last_duration_ms: float | None = None
+
+    def _run_sync(self) -> int:
+        from app.db import sqlalchemy_config
+
+        with sqlalchemy_config.get_session() as session:
+            result = self.fn(session)
+            session.commit()
+            return result
+
+    async def _run_async(self) -> int:
+        from app.db import sqlalchemy_config
+
+        async with sqlalchemy_config.get_session() as session:
+            result = await resolve(self.fn(session))
+            await session.commit()
+            return result
+
+    def skip(self) -> None:
+        """Count a tick left to the leader worker."""
+        self._skipped += 1
+
+    async def run_once(self) -> int | None:
+        """Run the job now; ``None`` if it failed."""
+        started = time.perf_counter()
+        try:
+            if settings.database_async:
+                result = await self._run_async()
+            else:
+                result = await asyncio.to_thread(self._run_sync)
+        except Exception:
+            self._failures += 1
+            logger.exception("Periodic job %s failed", self.name)
+            return None
+
+        if result and self.invalidates:
+            await response_cache.invalidate(*self.invalidates)
+
+        self._runs += 1
+        self._last_run_at = datetime.now(timezone.utc)
+        self._last_result = result
+        self._last_duration_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    def stats(self) -> JobStats:
+        """Snapshot of the job counters."""
+        return JobStats(
+            name=self.name,
+            interval=self.interval,
+            runs=self._runs,
+            skipped=self._skipped,
+            failures=self._failures,
+            last_run_at=self._last_run_at,
+            last_result=self._last_result,
+            last_duration_ms=self._last_duration_ms,
+        )
+
+
+class Scheduler:
+    """Run the registered jobs in background tasks of the app's event loop."""
+
+    def __init__(self, jobs: list[PeriodicJob], leader: LeaderLock) -> None:
+        self.jobs = [job for job in jobs if job.interval > 0]
+        self.leader = leader
+        self._tasks: list[asyncio.Task] = []
+
+    async def _loop(self, job: PeriodicJob) -> None:
+        while True:
+            if await self.leader.acquire():
+                await job.run_once()
+            else:
+                job.skip()
+            await asyncio.sleep(job.interval)
+
+    async def start(self) -> None:
+        """Start one task per job (registered as an app startup hook)."""
+        self._tasks = [
+            asyncio.create_task(self._loop(job), name=f"job:{job.name}") for job in self.jobs
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the job tasks and give up leadership (registered as an app shutdown hook)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.leader.release()
+
+    def stats(self) -> list[JobStats]:
+        """Counters of every job."""
+        return [job.stats() for job in self.jobs]
+
+
+def sweep_overdue_loans(session: Session | AsyncSession) -> int | Awaitable[int]:
+    """Mark past-due ACTIVE loans as OVERDUE; return how many changed."""
+    if isinstance(session, AsyncSession):
+        return _sweep_overdue_loans_async(session)
+    return len(LoanRepository(session=session).mark_overdue_loans())
+
+
+async def _sweep_overdue_loans_async(session: AsyncSession) -> int:
+    return len(await AsyncLoanRepository(session=session).mark_overdue_loans())
+
+
+def reconcile_review_stats(session: Session | AsyncSession) -> int | Awaitable[int]:
+    """Rebuild the review counters of books that drifted from ``reviews``; return how many."""
+    if isinstance(session, AsyncSession):
+        return AsyncBookRepository(session=session).reconcile_review_stats()
+    return BookRepository(session=session).reconcile_review_stats()
+
+
+def prune_tombstones(session: Session | AsyncSession) -> int | Awaitable[int]:
+    """Delete tombstones older than ``settings.tombstone_retention_days``; return how many."""
+    before = datetime.now(timezone.utc) - timedelta(days=settings.tombstone_retention_days)
+    if isinstance(session, AsyncSession):
+        return _prune_tombstones_async(session, before)
+    return session.execute(prune_tombstones_stmt(before)).rowcount
+
+
+async def _prune_tombstones_async(session: AsyncSession, before: datetime) -> int:
+    return (await session.execute(prune_tombstones_stmt(before))).rowcount
+
+
+scheduler = Scheduler(
+    jobs=[
+        # Las respuestas cacheadas de libros incluyen sus préstamos y reseñas
+        PeriodicJob(
+            "overdue_loans", settings.overdue_sweep_interval, sweep_overdue_loans, invalidates=("books",)
+        ),
+        PeriodicJob(
+            "review_stats",
+            settings.review_stats_reconcile_interval,
+            reconcile_review_stats,
+            invalidates=("books",),
+        ),
+        # Sin retención (0) las tombstones se conservan siempre
+        PeriodicJob(
+            "tombstones",
+            settings.tombstone_prune_interval if settings.tombstone_retention_days else 0,
+            prune_tombstones,
+        ),
+    ],
+    leader=LeaderLock("scheduler", settings.database_url),
+)
@@ -0,0 +1,96 @@
+"""PostgreSQL full-text (tsvector) and fuzzy (pg_trgm) search helpers."""
+
+from collections.abc import Sequence
+from functools import reduce
+
+from sqlalchemy import REAL, ColumnElement, Select, String, cast, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from app.config import settings
+
+# Código ISO 639-1 -> configuración de text search incluida en PostgreSQL
+TEXT_SEARCH_CONFIGS = {
+    "ar": "arabic",
+    "da": "danish",
+    "de": "german",
+    "el": "greek",
+    "en": "english",
+    "es": "spanish",
+    "fi": "finnish",
+    "fr": "french",
+    "hu": "hungarian",
+    "id": "indonesian",
+    "it": "italian",
+    "lt": "lithuanian",
+    "nl": "dutch",
+    "no": "norwegian",
+    "pt": "portuguese",
+    "ro": "romanian",
+    "ru": "russian",
+    "sv": "swedish",
+    "tr": "turkish",
+}
+
+
+def text_search_config(language: str | None) -> str:
+    """Text search configuration for an ISO 639-1 code (``simple`` if unknown)."""
+    return TEXT_SEARCH_CONFIGS.get((language or "").lower(), "simple")
+
+
+def _language_config_sql() -> str:
+    cases = " ".join(
+        f"WHEN '{code}' THEN '{config}'::regconfig" for code, config in TEXT_SEARCH_CONFIGS.items()
+    )
+    return f"CASE lower(language) {cases} ELSE 'simple'::regconfig END"
+
+
+BOOK_SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector({_language_config_sql()}, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(author, '')), 'B') || "
+    f"setweight(to_tsvector({_language_config_sql()}, coalesce(description, '')), 'C') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(publisher, '')), 'D')"
+)
+"""Expression of the generated ``books.search_vector`` column.
+
+Title and description are stemmed with the configuration of the book's
+language; author and publisher use ``simple`` (names are not stemmed).
+"""
+
+
+def build_tsquery(query: str, language: str | None = None) -> ColumnElement:
+    """``websearch_to_tsquery`` for ``query``.
+
+    With a language the query is stemmed with that configuration; without one
+    it matches in any of ``settings.search_languages`` or as plain words.
+    """
+    if language is not None:
+        configs = [text_search_config(language)]
+    else:
+        configs = ["simple", *(text_search_config(code) for code in settings.search_languages)]
+
+    tsqueries = [
+        func.websearch_to_tsquery(cast(config, REGCONFIG), query)
+        for config in dict.fromkeys(configs)
+    ]
+    # "||" entre tsquery es un OR
+    return reduce(lambda left, right: left.op("||")(right), tsqueries)
+
+
+def trigram_match(
+    query: str,
+    columns: Sequence[ColumnElement[str]],
+) -> tuple[ColumnElement[bool], ColumnElement[float]]:
+    """Fuzzy substring match of ``query`` against ``columns`` with pg_trgm.
+
+    Returns the condition (``query <% column``, served by the ``gin_trgm_ops``
+    indexes) and the best ``word_similarity`` to rank by.
+    """
+    term = literal(query, String)
+    condition = or_(*(term.op("<%")(column) for column in columns))
+    rank = func.greatest(*(func.word_similarity(term, column) for column in columns), type_=REAL)
+    return condition, rank
+
+
+def word_similarity_threshold(threshold: float) -> Select:
+    """``SET LOCAL pg_trgm.word_similarity_threshold``, used by the ``<%`` operator."""
+    return select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True))
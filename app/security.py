@@ -3,20 +3,40 @@
 from litestar.connection import ASGIConnection
 from litestar.security.jwt import OAuth2PasswordBearerAuth, Token
 
+from app.cache import auth_user_cache
 from app.config import settings
 from app.models import User
-from app.repositories.user import UserRepository
+from app.repositories.user import AsyncUserRepository, UserRepository
 
 
 async def retrieve_user_handler(token: Token, _: ASGIConnection) -> User | None:
     """Retrieve user based on JWT token."""
+    user = auth_user_cache.get(token.sub)
+    if user is None:
+        user = await _load_user(token.sub)
+        if user is not None:
+            auth_user_cache.set(token.sub, user)
+
+    return user
+
+
+async def _load_user(username: str) -> User | None:
     from app.db import sqlalchemy_config
 
+    if settings.database_async:
+        async with sqlalchemy_config.get_session() as session:
+            async_users_repo = AsyncUserRepository(session=session)
+
+            try:
+                return await async_users_repo.get_one(username=username)
+            except Exception:
+                return None
+
     with sqlalchemy_config.get_session() as session:
         users_repo = UserRepository(session=session)
 
         try:
-            return users_repo.get_one(username=token.sub)
+            return users_repo.get_one(username=username)
         except Exception:
             return None
 
@@ -0,0 +1,71 @@
+"""Medir el costo por fila de armar y serializar los listados, con y sin FAST_LIST_SERIALIZATION.
+
+Cada endpoint se pide con páginas de LIMIT filas (10000 por defecto) REPEAT veces
+con el camino del DTO (entidades ORM) y otras tantas con el camino rápido
+(msgspec.Struct desde las filas). Se descuenta el tiempo de las consultas SQL,
+así queda lo que cuesta en Python cada fila: hidratación, DTO y codificación.
+
+Uso: python benchmark_serialization.py   (con datos cargados; LIMIT=... REPEAT=... opcionales)
+"""
+
+import os
+import statistics
+import time
+
+LIMIT = int(os.environ.get("LIMIT", "10000"))
+REPEAT = int(os.environ.get("REPEAT", "5"))
+
+# Páginas de LIMIT filas, sin caché de respuestas ni barridos que escriban en la base
+os.environ["PAGE_SIZE_MAX"] = str(max(LIMIT, 500))
+os.environ.setdefault("BOOKS_CACHE_TTL", "0")
+os.environ.setdefault("OVERDUE_SWEEP_INTERVAL", "0")
+os.environ.setdefault("REVIEW_STATS_RECONCILE_INTERVAL", "0")
+
+from litestar.testing import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+from app.config import settings
+
+ENDPOINTS = ("/books/", "/loans/", "/reviews/", "/users/")
+
+sql_seconds = 0.0
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query(conn, *_) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def end_query(conn, *_) -> None:
+    global sql_seconds
+    sql_seconds += time.perf_counter() - conn.info.pop("query_started")
+
+
+def measure(client: TestClient, path: str, fast: bool) -> tuple[int, float, float]:
+    """(filas, ms por request, µs por fila sin SQL): medianas de REPEAT requests."""
+    global sql_seconds
+    settings.fast_list_serialization = fast
+    client.get(path, params={"limit": LIMIT}).raise_for_status()  # calentamiento
+    totals, per_row, rows = [], [], 0
+    for _ in range(REPEAT):
+        sql_seconds = 0.0
+        started = time.perf_counter()
+        response = client.get(path, params={"limit": LIMIT})
+        elapsed = time.perf_counter() - started
+        response.raise_for_status()
+        rows = len(response.json()["items"])
+        totals.append(elapsed * 1000)
+        per_row.append((elapsed - sql_seconds) * 1e6 / max(rows, 1))
+    return rows, statistics.median(totals), statistics.median(per_row)
+
+
+with TestClient(app) as client:
+    print(f"{'endpoint':<12}{'filas':>7}{'ms DTO':>10}{'ms rápido':>11}{'µs/fila DTO':>14}{'µs/fila rápido':>16}{'x':>7}")
+    for path in ENDPOINTS:
+        rows, dto_ms, dto_row = measure(client, path, fast=False)
+        _, fast_ms, fast_row = measure(client, path, fast=True)
+        speedup = dto_row / fast_row if fast_row else float("inf")
+        print(f"{path:<12}{rows:>7}{dto_ms:>10.1f}{fast_ms:>11.1f}{dto_row:>14.2f}{fast_row:>16.2f}{speedup:>7.1f}")
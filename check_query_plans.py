@@ -0,0 +1,162 @@
+"""Mostrar los planes (EXPLAIN) de las consultas de los repositorios con y sin los índices.
+
+Cada consulta de QUERIES se ejecuta una vez con los repositorios síncronos
+para capturar el SQL que emiten; luego se muestra el EXPLAIN de cada sentencia
+"después" (con los índices de la migración 6e3b1f5a9c27) y "antes" (los mismos
+índices borrados dentro de un SAVEPOINT que se revierte). Todo corre en una
+transacción que termina en ROLLBACK, así que la base no cambia, pero el DROP INDEX
+toma un lock exclusivo sobre las tablas mientras dura: usar en desarrollo o
+staging, no en producción.
+
+Uso: python check_query_plans.py [--analyze]   (PostgreSQL con datos cargados)
+"""
+
+import argparse
+import re
+import sys
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import Connection, create_engine, event, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import User
+from app.pagination import PageParams
+from app.repositories.book import BookRepository
+from app.repositories.loan import LoanRepository
+from app.repositories.review import ReviewRepository
+
+# Índices creados por la migración 6e3b1f5a9c27
+PERFORMANCE_INDEXES = (
+    "ix_loans_active_due_date",
+    "ix_loans_open_due_date_id",
+    "ix_loans_user_id_loan_dt",
+    "ix_loans_book_id",
+    "ix_reviews_book_id",
+    "ix_reviews_user_id",
+    "ix_books_available_id",
+)
+
+PAGE = PageParams(cursor=None, limit=settings.page_size_default, with_total=False)
+
+
+def _first_user_id(session: Session) -> int:
+    return session.scalar(select(User.id).order_by(User.id).limit(1)) or 0
+
+
+# nombre -> llamada al repositorio (las escrituras se revierten al final)
+QUERIES: dict[str, Callable[[Session], Any]] = {
+    "loans.get_active_loans": lambda s: LoanRepository(session=s).get_active_loans(),
+    "loans.get_overdue_loans": lambda s: LoanRepository(session=s).get_overdue_loans(PAGE),
+    "loans.get_user_loan_history": lambda s: LoanRepository(session=s).get_user_loan_history(
+        _first_user_id(s), PAGE
+    ),
+    "books.get_available_books": lambda s: BookRepository(session=s).get_available_books(),
+    # selectinload de loans/reviews/categories: WHERE book_id IN (...)
+    "books.list_page": lambda s: BookRepository(session=s).list_page(page=PAGE),
+    "reviews.list_page": lambda s: ReviewRepository(session=s).list_page(page=PAGE),
+    "loans.mark_overdue_loans": lambda s: LoanRepository(session=s).mark_overdue_loans(),
+}
+
+SCAN_NODE = re.compile(
+    r"((?:Parallel )?(?:Seq Scan|Index Only Scan|Index Scan|Bitmap Index Scan)[^(]*)"
+)
+
+
+def capture(
+    conn: Connection,
+    session: Session,
+    call: Callable[[Session], Any],
+) -> list[tuple[str, Any]]:
+    """Sentencias SELECT/UPDATE/DELETE (y sus parámetros) que emite ``call``."""
+    statements: list[tuple[str, Any]] = []
+
+    def before_cursor_execute(_conn, _cursor, statement, parameters, _context, executemany):
+        keyword = statement.lstrip().split(None, 1)[0].upper()
+        if not executemany and keyword in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            statements.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", before_cursor_execute)
+    try:
+        call(session)
+        session.flush()
+    finally:
+        event.remove(conn, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def explain(conn: Connection, statements: list[tuple[str, Any]], analyze: bool) -> list[list[str]]:
+    """Plan de cada sentencia, línea por línea."""
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    plans = []
+    for statement, parameters in statements:
+        # ANALYZE ejecuta la sentencia: un SAVEPOINT deshace las escrituras
+        savepoint = conn.begin_nested()
+        rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+        savepoint.rollback()
+        plans.append([row[0] for row in rows])
+    return plans
+
+
+def scans(plans: list[list[str]]) -> list[str]:
+    """Nodos de acceso a tablas (Seq Scan / Index Scan ...) de los planes."""
+    return [
+        match.group(1).strip()
+        for plan in plans
+        for line in plan
+        for match in SCAN_NODE.finditer(line)
+    ]
+
+
+def print_plans(label: str, plans: list[list[str]]) -> None:
+    print(f"  {label}:")
+    for number, plan in enumerate(plans, start=1):
+        for line in plan:
+            print(f"    [{number}] {line}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--analyze", action="store_true", help="EXPLAIN ANALYZE (ejecuta las consultas)"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url)
+    if engine.dialect.name != "postgresql":
+        print("check_query_plans.py requiere PostgreSQL", file=sys.stderr)
+        return 1
+
+    summary = []
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        session = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            for name, call in QUERIES.items():
+                statements = capture(conn, session, call)
+                after = explain(conn, statements, args.analyze)
+
+                savepoint = conn.begin_nested()
+                for index in PERFORMANCE_INDEXES:
+                    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+                before = explain(conn, statements, args.analyze)
+                savepoint.rollback()
+
+                print(f"== {name} ({len(statements)} consultas)")
+                print_plans("antes", before)
+                print_plans("después", after)
+                summary.append((name, scans(before), scans(after)))
+        finally:
+            session.close()
+            transaction.rollback()
+
+    print()
+    print(f"{'consulta':<30}{'antes':<50}después")
+    for name, before, after in summary:
+        print(f"{name:<30}{', '.join(before)[:48]:<50}{', '.join(after)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
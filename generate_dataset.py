@@ -0,0 +1,503 @@
+"""Generar un dataset sintético grande y determinista para benchmarks (PostgreSQL).
+
+initial_data.sql es chico; para ver cómo se comportan las consultas y los
+índices a escala hacen falta datos con la forma de producción:
+
+- Popularidad de los libros con distribución Zipf (--zipf): pocos libros
+  concentran la mayoría de los préstamos y reseñas.
+- Usuarios con actividad desigual (log-normal): cada uno tiene su historial de
+  préstamos en orden cronológico y sus reseñas.
+- Préstamos devueltos (a tiempo o con multa), activos y vencidos (--open-ratio,
+  --overdue-ratio), repartidos en los últimos --history-days días.
+- Calificaciones alrededor de una "calidad" propia de cada libro.
+- De 1 a 3 categorías por libro, también con popularidad desigual.
+
+Las filas se cargan con COPY en lotes de --batch-size, en --workers procesos
+con su propia conexión. Cada lote usa su propio generador aleatorio derivado
+de --seed, así que con la misma semilla y los mismos parámetros (incluido
+--as-of, la fecha "hoy" del dataset) el resultado es idéntico sin importar la
+cantidad de workers. Al final se dejan abiertos a lo más tantos préstamos por
+libro como ejemplares tiene (los de más se marcan devueltos en su due_date),
+se descuentan del stock, se recalculan los agregados de reseñas de books, se
+ajustan las secuencias de ids y se ejecuta ANALYZE.
+
+Conviene cargarlo en una base recién migrada (alembic upgrade head); con
+--truncate se vacían antes las tablas de la biblioteca.
+
+Uso: python generate_dataset.py --seed 42 --truncate   (1M libros, 100k usuarios, 20M préstamos, 5M reseñas)
+     python generate_dataset.py --books 10000 --users 1000 --loans 200000 --reviews 50000 --truncate
+"""
+
+import argparse
+import itertools
+import random
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+import psycopg
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.models import LoanStatus
+from app.passwords import password_hasher
+
+# Contraseña de todos los usuarios generados (un solo hash: Argon2 por usuario tardaría horas)
+PASSWORD = "password"
+LOAN_DAYS = 14
+FINE_PER_DAY = Decimal("500.00")
+
+FIRST_NAMES = (
+    "Ana", "Benjamín", "Camila", "Diego", "Elena", "Felipe", "Gabriela", "Hugo", "Isabel",
+    "Javier", "Karla", "Lucas", "María", "Nicolás", "Olivia", "Pablo", "Rocío", "Sebastián",
+    "Tomás", "Valentina", "Ximena", "Yolanda", "Andrés", "Catalina", "Joaquín", "Sofía",
+)
+LAST_NAMES = (
+    "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez",
+    "Sepúlveda", "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres", "Araya",
+    "Flores", "Espinoza", "Valenzuela", "Castillo", "Tapia", "Reyes", "Gutiérrez", "Castro",
+)
+TITLE_WORDS = (
+    "sombra", "jardín", "río", "memoria", "ciudad", "silencio", "viento", "mar", "noche",
+    "camino", "espejo", "fuego", "invierno", "casa", "isla", "tiempo", "guerra", "luz",
+    "bosque", "puerta", "sueño", "desierto", "montaña", "carta", "reloj", "laberinto",
+)
+GENRES = (
+    "Ficción", "Ciencia ficción", "Fantasía", "Misterio", "Romance", "Historia", "Biografía",
+    "Poesía", "Ensayo", "Infantil", "Juvenil", "Terror", "Aventura", "Filosofía", "Ciencia",
+    "Tecnología", "Economía", "Arte", "Viajes", "Cocina", "Autoayuda", "Política", "Música",
+    "Teatro", "Cómic", "Deportes", "Religión", "Psicología", "Educación", "Derecho",
+)
+PUBLISHERS = tuple(f"Editorial {name.capitalize()}" for name in (*LAST_NAMES, *TITLE_WORDS))
+CITIES = ("Santiago", "Valparaíso", "Concepción", "La Serena", "Temuco", "Antofagasta", "Talca")
+LANGUAGES = ("es", "en", "fr", "de", "it", "pt")
+LANGUAGE_WEIGHTS = (55, 30, 5, 4, 3, 3)
+COMMENTS = (
+    "Muy recomendable.", "No me convenció el final.", "Se lee de una sentada.",
+    "Los personajes están muy bien construidos.", "Algo lento al principio.",
+    "Una joya.", "Esperaba más.", "Lo volvería a leer.",
+)
+
+BOOK_COLUMNS = (
+    "id", "title", "author", "isbn", "pages", "published_year", "stock", "description",
+    "language", "publisher", "review_count", "rating_sum", "created_at", "updated_at",
+)
+USER_COLUMNS = (
+    "id", "username", "fullname", "password", "email", "phone", "address", "is_active",
+    "created_at", "updated_at",
+)
+CATEGORY_COLUMNS = ("id", "name", "description", "created_at", "updated_at")
+BOOK_CATEGORY_COLUMNS = ("book_id", "category_id")
+LOAN_COLUMNS = (
+    "id", "user_id", "book_id", "loan_dt", "due_date", "return_dt", "status", "fine_amount",
+    "created_at", "updated_at",
+)
+REVIEW_COLUMNS = (
+    "id", "user_id", "book_id", "rating", "comment", "review_date", "created_at", "updated_at",
+)
+TABLES = ("reviews", "loans", "book_categories", "books", "categories", "users", "tombstones")
+
+# Agregados de reseñas de cada libro en una sola pasada (sin tocar updated_at)
+_REVIEW_STATS_SQL = """
+    UPDATE books
+    SET review_count = stats.reviews, rating_sum = stats.total,
+        avg_rating = stats.total::float / stats.reviews
+    FROM (
+        SELECT book_id, count(*) AS reviews, sum(rating) AS total FROM reviews GROUP BY book_id
+    ) AS stats
+    WHERE books.id = stats.book_id
+"""
+# Los préstamos se generan por lotes de usuarios, sin saber cuántos abiertos tiene cada libro:
+# se conservan abiertos los más antiguos hasta los ejemplares del libro (books.stock, que al
+# cargar tiene el total) y el resto queda devuelto en su due_date (o hoy), sin multa
+_CAP_OPEN_LOANS_SQL = """
+    UPDATE loans
+    SET status = 'RETURNED', return_dt = least(loans.due_date, %(as_of)s), fine_amount = 0,
+        updated_at = greatest(loans.created_at, least(loans.due_date, %(as_of)s)::timestamptz)
+    FROM (
+        SELECT loans.id, books.stock AS copies,
+               row_number() OVER (PARTITION BY loans.book_id ORDER BY loans.loan_dt, loans.id) AS copy
+        FROM loans JOIN books ON books.id = loans.book_id
+        WHERE loans.status IN ('ACTIVE', 'OVERDUE')
+    ) AS ranked
+    WHERE loans.id = ranked.id AND ranked.copy > ranked.copies
+"""
+# Stock disponible = ejemplares - préstamos abiertos (sin tocar updated_at)
+_STOCK_SQL = """
+    UPDATE books
+    SET stock = books.stock - open_loans.loans
+    FROM (
+        SELECT book_id, count(*) AS loans FROM loans WHERE status IN ('ACTIVE', 'OVERDUE') GROUP BY book_id
+    ) AS open_loans
+    WHERE books.id = open_loans.book_id
+"""
+_SETVAL_SQL = """
+    SELECT setval(sequence, (SELECT coalesce(max(id), 0) + 1 FROM {table}), false)
+    FROM (SELECT pg_get_serial_sequence('{table}', 'id') AS sequence) AS serial
+    WHERE sequence IS NOT NULL
+"""
+
+
+@dataclass(frozen=True)
+class Plan:
+    """Parámetros del dataset: con el mismo Plan se generan las mismas filas."""
+
+    seed: int
+    as_of: date
+    books: int
+    users: int
+    categories: int
+    loans: int
+    reviews: int
+    batch_size: int
+    zipf: float
+    open_ratio: float
+    overdue_ratio: float
+    history_days: int
+    password_hash: str
+
+
+@dataclass(frozen=True)
+class Shared:
+    """Distribuciones que comparten todos los lotes (se calculan una vez)."""
+
+    # Ids de libro ordenados por popularidad y pesos Zipf acumulados de esos rangos
+    books_by_rank: list[int]
+    book_cum_weights: list[float]
+    # Calidad media (1 a 5) de cada libro, indexada por id
+    book_quality: list[float]
+    category_cum_weights: list[float]
+
+
+_plan: Plan
+_shared: Shared
+
+
+def _rng(plan: Plan, *parts: Any) -> random.Random:
+    """Generador propio de cada tabla/lote: no depende del orden en que corran los workers."""
+    return random.Random("/".join(map(str, (plan.seed, *parts))))
+
+
+def _zipf_cum_weights(size: int, exponent: float) -> list[float]:
+    return list(itertools.accumulate(1 / rank**exponent for rank in range(1, size + 1)))
+
+
+def build_shared(plan: Plan) -> Shared:
+    books_by_rank = list(range(1, plan.books + 1))
+    _rng(plan, "popularity").shuffle(books_by_rank)
+    quality_rng = _rng(plan, "quality")
+    return Shared(
+        books_by_rank=books_by_rank,
+        book_cum_weights=_zipf_cum_weights(plan.books, plan.zipf),
+        book_quality=[0.0] + [min(4.8, max(1.8, quality_rng.gauss(3.7, 0.6))) for _ in range(plan.books)],
+        category_cum_weights=_zipf_cum_weights(plan.categories, 0.8),
+    )
+
+
+def _init_worker(plan: Plan, shared: Shared) -> None:
+    global _plan, _shared
+    _plan, _shared = plan, shared
+
+
+def apportion(total: int, weights: Sequence[float]) -> list[int]:
+    """Repartir ``total`` según ``weights`` (restos mayores): la suma es exactamente ``total``."""
+    scale = total / sum(weights)
+    shares = [weight * scale for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: counts[i] - shares[i])
+    for i in by_remainder[: total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def user_batches(counts: Sequence[int], batch_size: int) -> list[tuple[int, list[int], int]]:
+    """Lotes de usuarios consecutivos con ~``batch_size`` filas: (primer usuario, filas por usuario, primer id)."""
+    batches = []
+    first_user, first_id, pending = 1, 1, []
+    for user_id, count in enumerate(counts, start=1):
+        pending.append(count)
+        if sum(pending) >= batch_size or user_id == len(counts):
+            batches.append((first_user, pending, first_id))
+            first_user, first_id, pending = user_id + 1, first_id + sum(pending), []
+    return batches
+
+
+def _timestamp(rng: random.Random, day: date) -> datetime:
+    midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return midnight + timedelta(seconds=rng.randrange(8 * 3600, 22 * 3600))
+
+
+def _isbn13(book_id: int) -> str:
+    digits = f"978{book_id:09d}"
+    check = -sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10
+    return f"{digits}{check}"
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def user_rows(plan: Plan, start: int, stop: int) -> list[tuple[Any, ...]]:
+    rng = _rng(plan, "users", start)
+    rows = []
+    for user_id in range(start, stop):
+        created_at = _timestamp(rng, plan.as_of - timedelta(days=rng.randrange(plan.history_days)))
+        rows.append((
+            user_id,
+            f"user{user_id:07d}",
+            _name(rng),
+            plan.password_hash,
+            f"user{user_id}@example.com",
+            f"+56 9 {rng.randrange(10**7, 10**8)}" if rng.random() < 0.7 else None,
+            f"{rng.choice(LAST_NAMES)} {rng.randrange(1, 9999)}, {rng.choice(CITIES)}" if rng.random() < 0.5 else None,
+            rng.random() < 0.97,
+            created_at,
+            created_at,
+        ))
+    return rows
+
+
+def category_rows(plan: Plan) -> list[tuple[Any, ...]]:
+    rng = _rng(plan, "categories")
+    rows = []
+    for category_id in range(1, plan.categories + 1):
+        genre = GENRES[(category_id - 1) % len(GENRES)]
+        cycle = (category_id - 1) // len(GENRES)
+        created_at = _timestamp(rng, plan.as_of - timedelta(days=plan.history_days))
+        rows.append((
+            category_id,
+            genre if cycle == 0 else f"{genre} {cycle + 1}",
+            f"Libros de {genre.lower()}",
+            created_at,
+            created_at,
+        ))
+    return rows
+
+
+def book_rows(plan: Plan, start: int, stop: int) -> tuple[list[tuple[Any, ...]], list[tuple[int, int]]]:
+    """Libros ``[start, stop)`` y sus categorías."""
+    rng = _rng(plan, "books", start)
+    categories = range(1, plan.categories + 1)
+    books, memberships = [], []
+    for book_id in range(start, stop):
+        words = rng.sample(TITLE_WORDS, 2)
+        created_at = _timestamp(rng, plan.as_of - timedelta(days=rng.randrange(plan.history_days)))
+        books.append((
+            book_id,
+            # El id al final mantiene el título único
+            f"{words[0].capitalize()} y {words[1]} {book_id}",
+            _name(rng),
+            _isbn13(book_id),
+            min(2000, max(40, int(rng.lognormvariate(5.5, 0.45)))),
+            max(1450, plan.as_of.year - int(rng.expovariate(1 / 15))),
+            # Ejemplares; al final se les descuentan los préstamos abiertos (_STOCK_SQL)
+            rng.choices((1, 2, 3, 4, 5), weights=(40, 25, 15, 10, 10))[0],
+            f"Una historia sobre {words[0]} y {words[1]}." if rng.random() < 0.6 else None,
+            rng.choices(LANGUAGES, weights=LANGUAGE_WEIGHTS)[0],
+            rng.choice(PUBLISHERS) if rng.random() < 0.9 else None,
+            0,
+            0,
+            created_at,
+            created_at,
+        ))
+        count = rng.choices((1, 2, 3), weights=(50, 35, 15))[0]
+        chosen = rng.choices(categories, cum_weights=_shared.category_cum_weights, k=count)
+        memberships.extend((book_id, category_id) for category_id in dict.fromkeys(chosen))
+    return books, memberships
+
+
+def _popular_books(rng: random.Random, count: int) -> list[int]:
+    return rng.choices(_shared.books_by_rank, cum_weights=_shared.book_cum_weights, k=count)
+
+
+def _loan(rng: random.Random, plan: Plan, loan_id: int, user_id: int, book_id: int) -> tuple[Any, ...]:
+    as_of = plan.as_of
+    if rng.random() < plan.open_ratio:
+        if rng.random() < plan.overdue_ratio:
+            loan_dt = as_of - timedelta(days=rng.randrange(LOAN_DAYS + 1, LOAN_DAYS + 120))
+            status = LoanStatus.OVERDUE
+        else:
+            loan_dt = as_of - timedelta(days=rng.randrange(LOAN_DAYS))
+            status = LoanStatus.ACTIVE
+        return_dt, fine = None, None
+    else:
+        loan_dt = as_of - timedelta(days=rng.randrange(LOAN_DAYS + 1, plan.history_days))
+        # La mayoría devuelve a tiempo; el resto con hasta un mes de atraso
+        days = rng.randrange(1, LOAN_DAYS + 1) if rng.random() < 0.88 else rng.randrange(LOAN_DAYS + 1, 45)
+        return_dt = min(loan_dt + timedelta(days=days), as_of)
+        status = LoanStatus.RETURNED
+        fine = FINE_PER_DAY * max(0, days - LOAN_DAYS)
+    due_date = loan_dt + timedelta(days=LOAN_DAYS)
+    created_at = _timestamp(rng, loan_dt)
+    if return_dt is not None:
+        updated_at = max(created_at, _timestamp(rng, return_dt))
+    elif status is LoanStatus.OVERDUE:
+        # El barrido de vencidos lo marcó al día siguiente del vencimiento
+        updated_at = _timestamp(rng, due_date + timedelta(days=1))
+    else:
+        updated_at = created_at
+    return (loan_id, user_id, book_id, loan_dt, due_date, return_dt, status.value, fine, created_at, updated_at)
+
+
+def loan_rows(plan: Plan, first_user: int, counts: Sequence[int], first_id: int) -> list[tuple[Any, ...]]:
+    """Historiales de préstamos (cronológicos) de los usuarios del lote."""
+    rng = _rng(plan, "loans", first_user)
+    rows: list[tuple[Any, ...]] = []
+    for user_id, count in enumerate(counts, start=first_user):
+        loans = [_loan(rng, plan, 0, user_id, book_id) for book_id in _popular_books(rng, count)]
+        loans.sort(key=lambda loan: (loan[3], loan[8]))
+        next_id = first_id + len(rows)
+        rows.extend((next_id + i, *loan[1:]) for i, loan in enumerate(loans))
+    return rows
+
+
+def review_rows(plan: Plan, first_user: int, counts: Sequence[int], first_id: int) -> list[tuple[Any, ...]]:
+    """Reseñas de los usuarios del lote, con la nota alrededor de la calidad del libro."""
+    rng = _rng(plan, "reviews", first_user)
+    rows = []
+    for user_id, count in enumerate(counts, start=first_user):
+        for book_id in _popular_books(rng, count):
+            review_date = plan.as_of - timedelta(days=rng.randrange(plan.history_days))
+            created_at = _timestamp(rng, review_date)
+            rows.append((
+                first_id + len(rows),
+                user_id,
+                book_id,
+                min(5, max(1, round(rng.gauss(_shared.book_quality[book_id], 0.9)))),
+                rng.choice(COMMENTS) if rng.random() < 0.3 else None,
+                review_date,
+                created_at,
+                created_at,
+            ))
+    return rows
+
+
+def _conninfo() -> str:
+    """URL de libpq a partir de DATABASE_URL (sin el driver de SQLAlchemy)."""
+    url = make_url(settings.database_url)
+    if url.get_backend_name() != "postgresql":
+        raise SystemExit("generate_dataset.py carga con COPY: DATABASE_URL debe ser de PostgreSQL")
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def _copy(connection: psycopg.Connection, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def load_batch(table: str, *args: Any) -> tuple[str, int]:
+    """Generar y cargar un lote en su propia transacción; devuelve (tabla, filas)."""
+    with psycopg.connect(_conninfo()) as connection:
+        connection.execute("SET synchronous_commit = off")
+        if table == "users":
+            rows = user_rows(_plan, *args)
+            _copy(connection, "users", USER_COLUMNS, rows)
+        elif table == "books":
+            rows, memberships = book_rows(_plan, *args)
+            _copy(connection, "books", BOOK_COLUMNS, rows)
+            _copy(connection, "book_categories", BOOK_CATEGORY_COLUMNS, memberships)
+        elif table == "loans":
+            rows = loan_rows(_plan, *args)
+            _copy(connection, "loans", LOAN_COLUMNS, rows)
+        else:
+            rows = review_rows(_plan, *args)
+            _copy(connection, "reviews", REVIEW_COLUMNS, rows)
+    return table, len(rows)
+
+
+def _ranges(total: int, size: int) -> list[tuple[int, int]]:
+    return [(start, min(start + size, total + 1)) for start in range(1, total + 1, size)]
+
+
+def run_phase(executor: ProcessPoolExecutor, tasks: list[tuple[Any, ...]]) -> None:
+    started = time.perf_counter()
+    loaded: dict[str, int] = {}
+    for future in as_completed([executor.submit(load_batch, *task) for task in tasks]):
+        table, rows = future.result()
+        loaded[table] = loaded.get(table, 0) + rows
+        elapsed = time.perf_counter() - started
+        progress = ", ".join(f"{name} {count:,}" for name, count in loaded.items())
+        print(f"\r  {progress} ({sum(loaded.values()) / elapsed:,.0f} filas/s)", end="", flush=True)
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(), help="fecha 'hoy' del dataset (ISO)")
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=60)
+    parser.add_argument("--loans", type=int, default=20_000_000)
+    parser.add_argument("--reviews", type=int, default=5_000_000)
+    parser.add_argument("--batch-size", type=int, default=100_000, help="filas por COPY")
+    parser.add_argument("--workers", type=int, default=4, help="procesos (y conexiones) de carga")
+    parser.add_argument("--zipf", type=float, default=1.1, help="exponente de la popularidad de los libros")
+    parser.add_argument("--open-ratio", type=float, default=0.03, help="fracción de préstamos sin devolver (a lo más, los ejemplares de cada libro)")
+    parser.add_argument("--overdue-ratio", type=float, default=0.3, help="fracción de los no devueltos que está vencida")
+    parser.add_argument("--history-days", type=int, default=5 * 365, help="antigüedad máxima de préstamos y reseñas")
+    parser.add_argument("--truncate", action="store_true", help="vaciar antes las tablas de la biblioteca")
+    args = parser.parse_args()
+
+    plan = Plan(
+        seed=args.seed,
+        as_of=args.as_of,
+        books=args.books,
+        users=args.users,
+        categories=args.categories,
+        loans=args.loans,
+        reviews=args.reviews,
+        batch_size=args.batch_size,
+        zipf=args.zipf,
+        open_ratio=args.open_ratio,
+        overdue_ratio=args.overdue_ratio,
+        history_days=max(args.history_days, 2 * LOAN_DAYS),
+        password_hash=password_hasher.hash(PASSWORD),
+    )
+    conninfo = _conninfo()
+    with psycopg.connect(conninfo) as connection:
+        if args.truncate:
+            connection.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY")
+        elif connection.execute("SELECT EXISTS (SELECT 1 FROM books) OR EXISTS (SELECT 1 FROM users)").fetchone()[0]:
+            raise SystemExit("La base ya tiene libros o usuarios: usa --truncate para reemplazarlos")
+        _copy(connection, "categories", CATEGORY_COLUMNS, category_rows(plan))
+
+    shared = build_shared(plan)
+    activity_rng = _rng(plan, "activity")
+    activity = [activity_rng.lognormvariate(0, 1) for _ in range(plan.users)]
+    loan_batches = user_batches(apportion(plan.loans, activity), plan.batch_size)
+    review_batches = user_batches(apportion(plan.reviews, activity), plan.batch_size)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(plan, shared)) as executor:
+        print("Usuarios y libros")
+        run_phase(
+            executor,
+            [("users", *bounds) for bounds in _ranges(plan.users, plan.batch_size)]
+            + [("books", *bounds) for bounds in _ranges(plan.books, plan.batch_size)],
+        )
+        print("Préstamos y reseñas")
+        run_phase(
+            executor,
+            [("loans", *batch) for batch in loan_batches] + [("reviews", *batch) for batch in review_batches],
+        )
+
+    print("Stock, agregados de reseñas, secuencias y ANALYZE")
+    with psycopg.connect(conninfo, autocommit=True) as connection:
+        connection.execute(_CAP_OPEN_LOANS_SQL, {"as_of": plan.as_of})
+        connection.execute(_STOCK_SQL)
+        connection.execute(_REVIEW_STATS_SQL)
+        for table in ("users", "books", "categories", "loans", "reviews"):
+            connection.execute(_SETVAL_SQL.format(table=table))
+        connection.execute("ANALYZE")
+    print(f"Listo en {time.perf_counter() - started:,.0f} s")
+
+
+if __name__ == "__main__":
+    main()
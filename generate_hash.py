@@ -1,5 +1,5 @@
 
-from app.repositories.user import password_hasher
+from app.passwords import password_hasher
 
 plain_password = "admin123"
 
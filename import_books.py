@@ -0,0 +1,39 @@
+"""Importar libros en lote desde un archivo CSV o NDJSON.
+
+Uso: python import_books.py libros.csv [--format csv|ndjson]
+"""
+
+import argparse
+import asyncio
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from app.config import settings
+from app.db import sqlalchemy_config
+from app.importer import import_books
+from app.models import BookImportReport
+from app.repositories.book import AsyncBookRepository, BookRepository
+
+
+async def run(path: Path, format: str) -> BookImportReport:
+    with path.open("rb") as stream:
+        if settings.database_async:
+            async with sqlalchemy_config.get_session() as session:
+                books_repo = AsyncBookRepository(session=session, auto_commit=True)
+                return await import_books(books_repo, stream, format)
+
+        with sqlalchemy_config.get_session() as session:
+            books_repo = BookRepository(session=session, auto_commit=True)
+            return await import_books(books_repo, stream, format)
+
+
+parser = argparse.ArgumentParser(description="Importar libros desde CSV o NDJSON")
+parser.add_argument("path", type=Path)
+parser.add_argument("--format", choices=["csv", "ndjson"])
+args = parser.parse_args()
+
+# Sin --format se deduce de la extensión (.ndjson / .jsonl)
+format = args.format or ("ndjson" if args.path.suffix in (".ndjson", ".jsonl") else "csv")
+report = asyncio.run(run(args.path, format))
+print(json.dumps(asdict(report), ensure_ascii=False, indent=2))
@@ -59,6 +59,8 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Sin el pool ni los DB_STATEMENT_TIMEOUT_MS de la app: una migración usa una sola
+    # conexión y puede tardar más (p. ej. CREATE INDEX CONCURRENTLY)
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
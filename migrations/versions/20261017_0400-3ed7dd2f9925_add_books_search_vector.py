@@ -0,0 +1,69 @@
+"""Add full-text search_vector column and GIN index to books
+
+Revision ID: 3ed7dd2f9925
+Revises: a84de7dd6c28
+Create Date: 2026-10-17 04:00:12.518330
+
+"""
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3ed7dd2f9925'
+down_revision: Union[str, Sequence[str], None] = 'a84de7dd6c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Copia congelada de app.search.BOOK_SEARCH_VECTOR_SQL
+LANGUAGE_CONFIG = (
+    "CASE lower(language) "
+    "WHEN 'ar' THEN 'arabic'::regconfig WHEN 'da' THEN 'danish'::regconfig "
+    "WHEN 'de' THEN 'german'::regconfig WHEN 'el' THEN 'greek'::regconfig "
+    "WHEN 'en' THEN 'english'::regconfig WHEN 'es' THEN 'spanish'::regconfig "
+    "WHEN 'fi' THEN 'finnish'::regconfig WHEN 'fr' THEN 'french'::regconfig "
+    "WHEN 'hu' THEN 'hungarian'::regconfig WHEN 'id' THEN 'indonesian'::regconfig "
+    "WHEN 'it' THEN 'italian'::regconfig WHEN 'lt' THEN 'lithuanian'::regconfig "
+    "WHEN 'nl' THEN 'dutch'::regconfig WHEN 'no' THEN 'norwegian'::regconfig "
+    "WHEN 'pt' THEN 'portuguese'::regconfig WHEN 'ro' THEN 'romanian'::regconfig "
+    "WHEN 'ru' THEN 'russian'::regconfig WHEN 'sv' THEN 'swedish'::regconfig "
+    "WHEN 'tr' THEN 'turkish'::regconfig "
+    "ELSE 'simple'::regconfig END"
+)
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector({LANGUAGE_CONFIG}, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(author, '')), 'B') || "
+    f"setweight(to_tsvector({LANGUAGE_CONFIG}, coalesce(description, '')), 'C') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(publisher, '')), 'D')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'books',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        op.f('ix_books_search_vector'),
+        'books',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_books_search_vector'), table_name='books', postgresql_using='gin')
+    op.drop_column('books', 'search_vector')
@@ -0,0 +1,47 @@
+"""Add pg_trgm extension and trigram GIN indexes for fuzzy search
+
+Revision ID: 5c1e8f0b7a42
+Revises: 3ed7dd2f9925
+Create Date: 2026-10-17 05:00:41.207733
+
+"""
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8f0b7a42'
+down_revision: Union[str, Sequence[str], None] = '3ed7dd2f9925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGRAM_INDEXES = [
+    ('ix_books_title_trgm', 'books', 'title'),
+    ('ix_books_author_trgm', 'books', 'author'),
+    ('ix_users_username_trgm', 'users', 'username'),
+    ('ix_users_fullname_trgm', 'users', 'fullname'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(
+            op.f(name),
+            table,
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(op.f(name), table_name=table, postgresql_using='gin')
@@ -0,0 +1,34 @@
+"""Add (category_id, book_id) index to book_categories
+
+Revision ID: 9b2f4d6e8a13
+Revises: 5c1e8f0b7a42
+Create Date: 2026-10-17 06:00:27.614090
+
+"""
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f4d6e8a13'
+down_revision: Union[str, Sequence[str], None] = '5c1e8f0b7a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f('ix_book_categories_category_id_book_id'),
+        'book_categories',
+        ['category_id', 'book_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_book_categories_category_id_book_id'), table_name='book_categories')
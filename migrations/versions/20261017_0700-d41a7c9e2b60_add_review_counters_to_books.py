@@ -0,0 +1,59 @@
+"""Add review counters and rating aggregates to books
+
+Revision ID: d41a7c9e2b60
+Revises: 9b2f4d6e8a13
+Create Date: 2026-10-17 07:00:11.482305
+
+"""
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c9e2b60'
+down_revision: Union[str, Sequence[str], None] = '9b2f4d6e8a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('review_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('avg_rating', sa.Float(), nullable=True))
+    op.execute(
+        """
+        UPDATE books
+        SET review_count = stats.review_count,
+            rating_sum = stats.rating_sum,
+            avg_rating = stats.avg_rating
+        FROM (
+            SELECT book_id,
+                   count(*) AS review_count,
+                   sum(rating) AS rating_sum,
+                   avg(rating)::float AS avg_rating
+            FROM reviews
+            GROUP BY book_id
+        ) AS stats
+        WHERE books.id = stats.book_id
+        """
+    )
+    op.create_index('ix_books_review_count', 'books', ['review_count', 'id'], unique=False)
+    op.create_index(
+        'ix_books_avg_rating',
+        'books',
+        [sa.text('avg_rating DESC NULLS LAST'), sa.text('review_count DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_avg_rating', table_name='books')
+    op.drop_index('ix_books_review_count', table_name='books')
+    op.drop_column('books', 'avg_rating')
+    op.drop_column('books', 'rating_sum')
+    op.drop_column('books', 'review_count')
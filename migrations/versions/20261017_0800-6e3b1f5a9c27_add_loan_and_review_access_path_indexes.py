@@ -0,0 +1,65 @@
+"""Add loan, review and available-book access path indexes
+
+Revision ID: 6e3b1f5a9c27
+Revises: d41a7c9e2b60
+Create Date: 2026-10-17 08:00:42.905117
+
+The indexes are built with CREATE INDEX CONCURRENTLY, which cannot run inside a
+transaction, so each one goes through an autocommit block. A build that fails
+half-way leaves an INVALID index: drop it and run the migration again
+(IF NOT EXISTS would otherwise skip it).
+"""
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e3b1f5a9c27'
+down_revision: Union[str, Sequence[str], None] = 'd41a7c9e2b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# nombre -> (tabla, columnas/expresiones, condición del índice parcial)
+INDEXES = {
+    'ix_loans_active_due_date': ('loans', ['due_date'], "status = 'ACTIVE'"),
+    'ix_loans_open_due_date_id': ('loans', ['due_date', 'id'], "status IN ('ACTIVE', 'OVERDUE')"),
+    'ix_loans_user_id_loan_dt': (
+        'loans',
+        ['user_id', sa.text('loan_dt DESC'), sa.text('id DESC')],
+        None,
+    ),
+    'ix_loans_book_id': ('loans', ['book_id'], None),
+    'ix_reviews_book_id': ('reviews', ['book_id'], None),
+    'ix_reviews_user_id': ('reviews', ['user_id'], None),
+    'ix_books_available_id': ('books', ['id'], 'stock > 0'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, (table, columns, where) in INDEXES.items():
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, (table, _, _) in reversed(INDEXES.items()):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,93 @@
+"""Add tombstones and updated_at indexes for the delta sync feeds
+
+Revision ID: 2c8d5e7f1a46
+Revises: 6e3b1f5a9c27
+Create Date: 2026-10-17 09:00:18.630271
+
+"""
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c8d5e7f1a46'
+down_revision: Union[str, Sequence[str], None] = '6e3b1f5a9c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# nombre -> tabla de los índices (updated_at, id) de /changes
+INDEXES = {
+    'ix_books_updated_at_id': 'books',
+    'ix_categories_updated_at_id': 'categories',
+    'ix_loans_updated_at_id': 'loans',
+}
+
+# Tablas con /changes: la tombstone la escribe un trigger, así cubre cascadas y delete() masivos
+TOMBSTONE_TABLES = ('books', 'categories', 'loans')
+
+TOMBSTONE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO tombstones (table_name, row_id, deleted_at)
+    SELECT TG_TABLE_NAME, id, clock_timestamp() FROM deleted_rows;
+    RETURN NULL;
+END
+$$
+"""
+
+TOMBSTONE_TRIGGER_SQL = """
+CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table}
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION record_tombstone()
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tombstones',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_tombstones'))
+    )
+    op.create_index(
+        'ix_tombstones_table_name_deleted_at_id',
+        'tombstones',
+        ['table_name', 'deleted_at', 'id'],
+        unique=False,
+    )
+    op.execute(TOMBSTONE_FUNCTION_SQL)
+    for table in TOMBSTONE_TABLES:
+        op.execute(TOMBSTONE_TRIGGER_SQL.format(table=table))
+    # Tablas con datos: CONCURRENTLY no bloquea las escrituras mientras se construyen
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES.items():
+            op.create_index(
+                name,
+                table,
+                ['updated_at', 'id'],
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES.items()):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
+    for table in reversed(TOMBSTONE_TABLES):
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_tombstone ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS record_tombstone()')
+    op.drop_index('ix_tombstones_table_name_deleted_at_id', table_name='tombstones')
+    op.drop_table('tombstones')
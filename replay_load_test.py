@@ -0,0 +1,242 @@
+"""Prueba de carga: reproducir un corpus JSONL de requests contra la app y medir latencias.
+
+Cada línea del corpus es una request:
+
+    {"method": "GET", "path": "/books/", "params": {"limit": 50}}
+    {"method": "POST", "path": "/categories/", "json": {"name": "x"}, "status": 201, "route": "crear categoría"}
+
+(``method`` por defecto GET; ``params``, ``json``, ``headers``, ``status``, el
+status esperado, y ``route``, el nombre con que se agrupa, son opcionales; sin
+``route`` se agrupa por método y ruta con los números reemplazados por ``{id}``).
+
+El corpus se recorre en orden, en ciclos, hasta completar --requests, con
+--concurrency requests simultáneas y, si se indica --rate, a ese ritmo
+(requests por segundo, programadas de antemano: una request demorada no retrasa
+las siguientes). Sin --base-url corre en el mismo proceso con el cliente ASGI
+de Litestar; con --base-url contra un servidor ya levantado.
+
+Informa p50/p95/p99, throughput y tasa de errores por ruta y los guarda en
+JSON (--output). Con --compare marca las rutas cuyo p95 empeoró más de
+--threshold por ciento, o cuya tasa de errores subió, respecto de otra corrida,
+y termina con código 1.
+
+Uso: python replay_load_test.py load_test_corpus.jsonl --requests 2000 --concurrency 20 \\
+         --output results.json [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+# Números de la ruta que se agrupan como un mismo endpoint
+_ID_SEGMENT = re.compile(r"/\d+")
+
+
+@dataclass
+class Sample:
+    """Resultado de una request."""
+
+    route: str
+    latency_ms: float
+    status: int | None
+    error: bool
+
+
+def load_corpus(path: Path) -> list[dict[str, Any]]:
+    """Requests del corpus (se ignoran las líneas vacías)."""
+    corpus = []
+    for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if "path" not in entry:
+            raise SystemExit(f"{path}:{number}: falta 'path' (¿es un corpus de requests HTTP?)")
+        entry.setdefault("method", "GET")
+        entry.setdefault("route", f"{entry['method'].upper()} {_ID_SEGMENT.sub('/{id}', entry['path'])}")
+        corpus.append(entry)
+    if not corpus:
+        raise SystemExit(f"{path}: el corpus está vacío")
+    return corpus
+
+
+async def send(client: httpx.AsyncClient, entry: dict[str, Any]) -> Sample:
+    started = time.perf_counter()
+    try:
+        response = await client.request(
+            entry["method"],
+            entry["path"],
+            params=entry.get("params"),
+            json=entry.get("json"),
+            headers=entry.get("headers"),
+        )
+        await response.aread()
+    except httpx.HTTPError:
+        return Sample(entry["route"], (time.perf_counter() - started) * 1000, None, True)
+    latency_ms = (time.perf_counter() - started) * 1000
+    expected = entry.get("status")
+    error = response.status_code != expected if expected else response.status_code >= 400
+    return Sample(entry["route"], latency_ms, response.status_code, error)
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    corpus: list[dict[str, Any]],
+    total: int,
+    concurrency: int,
+    rate: float,
+) -> tuple[list[Sample], float]:
+    """(muestras, segundos) de ``total`` requests tomadas del corpus en ciclos."""
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(total):
+        queue.put_nowait(index)
+    samples: list[Sample] = []
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        while not queue.empty():
+            index = queue.get_nowait()
+            if rate:
+                # Carga abierta: cada request tiene su instante, aunque las anteriores se demoren
+                delay = started + index / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            samples.append(await send(client, corpus[index % len(corpus)]))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Percentil por rango más cercano de ``values`` ya ordenados."""
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict[str, Any]:
+    """Latencias (ms), throughput (req/s) y tasa de errores, por ruta y en total."""
+
+    def stats(group: list[Sample]) -> dict[str, Any]:
+        latencies = sorted(sample.latency_ms for sample in group)
+        errors = sum(sample.error for sample in group)
+        return {
+            "requests": len(group),
+            "errors": errors,
+            "error_rate": round(errors / len(group), 4),
+            "throughput_rps": round(len(group) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "max_ms": round(latencies[-1], 3),
+        }
+
+    by_route: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_route[sample.route].append(sample)
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "total": stats(samples),
+        "routes": {route: stats(group) for route, group in sorted(by_route.items())},
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Rutas que empeoraron respecto de ``baseline`` (p95 más de ``threshold`` % o más errores)."""
+    regressions = []
+    for route, stats in current["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None:
+            continue
+        if stats["p95_ms"] > before["p95_ms"] * (1 + threshold / 100):
+            regressions.append(f"{route}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+        if stats["error_rate"] > before["error_rate"]:
+            regressions.append(f"{route}: errores {before['error_rate']:.2%} -> {stats['error_rate']:.2%}")
+    return regressions
+
+
+def print_report(result: dict[str, Any]) -> None:
+    print(f"{'ruta':<36}{'reqs':>7}{'err %':>8}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for route, stats in [*result["routes"].items(), ("TOTAL", result["total"])]:
+        print(
+            f"{route:<36}{stats['requests']:>7}{stats['error_rate']:>8.2%}{stats['throughput_rps']:>9.1f}"
+            f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+        )
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    corpus = load_corpus(args.corpus)
+    total = args.requests or len(corpus)
+    started_at = datetime.now(timezone.utc).isoformat()
+    if args.base_url:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+            samples, elapsed = await replay(client, corpus, total, args.concurrency, args.rate)
+    else:
+        from litestar.testing import AsyncTestClient
+
+        from app import app
+
+        async with AsyncTestClient(app, timeout=args.timeout) as client:
+            samples, elapsed = await replay(client, corpus, total, args.concurrency, args.rate)
+
+    return {
+        "started_at": started_at,
+        "commit": git_commit(),
+        "config": {
+            "corpus": str(args.corpus),
+            "target": args.base_url or "in-process",
+            "requests": total,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+        },
+        **summarize(samples, elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", type=Path, help="corpus JSONL de requests")
+    parser.add_argument("--requests", type=int, default=0, help="requests a enviar (por defecto, el corpus una vez)")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests simultáneas")
+    parser.add_argument("--rate", type=float, default=0, help="requests por segundo (0 = sin límite)")
+    parser.add_argument("--base-url", help="servidor a probar (por defecto, la app en el mismo proceso)")
+    parser.add_argument("--timeout", type=float, default=30, help="segundos por request")
+    parser.add_argument("--output", type=Path, help="archivo JSON con los resultados")
+    parser.add_argument("--compare", type=Path, help="resultados JSON de otra corrida")
+    parser.add_argument("--threshold", type=float, default=10, help="empeoramiento de p95 tolerado (%%)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    if args.compare:
+        regressions = compare(result, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Fixtures: una base PostgreSQL de prueba (TEST_DATABASE_URL) migrada con alembic y con datos.
+
+La base se vacía al empezar y al terminar: no usar una con datos reales.
+"""
+
+import os
+from collections.abc import Iterator
+from datetime import date, timedelta
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# settings se lee al importar app: la app de los tests apunta a la base de prueba, sin barridos
+# que escriban en ella ni caché de respuestas que se salte las consultas
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+for name in (
+    "OVERDUE_SWEEP_INTERVAL",
+    "REVIEW_STATS_RECONCILE_INTERVAL",
+    "TOMBSTONE_PRUNE_INTERVAL",
+    "BOOKS_CACHE_TTL",
+    "CATEGORIES_CACHE_TTL",
+    "BOOK_STATS_CACHE_TTL",
+):
+    os.environ[name] = "0"
+
+BOOKS = 30
+USERS = 5
+CATEGORIES = 4
+
+
+@pytest.fixture(scope="session")
+def database() -> Iterator[str]:
+    """Esquema de ``alembic upgrade head`` en la base de prueba."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL no está definida (base PostgreSQL de prueba)")
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config("alembic.ini")
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+    yield TEST_DATABASE_URL
+    command.downgrade(config, "base")
+
+
+@pytest.fixture(scope="session")
+def seeded(database: str) -> None:
+    """Libros con categorías, préstamos (algunos vencidos) y reseñas de varios usuarios."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from app.models import Book, Category, Loan, LoanStatus, Review, User
+
+    engine = create_engine(database)
+    today = date.today()
+    with Session(engine) as session:
+        users = [
+            User(username=f"user{i}", fullname=f"Usuario {i}", password="x", email=f"user{i}@test.cl")
+            for i in range(USERS)
+        ]
+        categories = [Category(name=f"Categoría {i}") for i in range(CATEGORIES)]
+        books = [
+            Book(
+                title=f"Libro {i} del otoño",
+                author=f"Autor {i % 7}",
+                isbn=f"978000000{i:04d}",
+                pages=100 + i,
+                published_year=1990 + i,
+                stock=5,
+                language="es",
+                publisher=f"Editorial {i % 3}",
+                categories=[categories[i % CATEGORIES], categories[(i + 1) % CATEGORIES]],
+            )
+            for i in range(BOOKS)
+        ]
+        session.add_all([*users, *categories, *books])
+        for i, book in enumerate(books):
+            for j in range(3):
+                loan_dt = today - timedelta(days=5 + 10 * j)
+                session.add(
+                    Loan(
+                        user=users[(i + j) % USERS],
+                        book=book,
+                        loan_dt=loan_dt,
+                        due_date=loan_dt + timedelta(days=14),
+                        status=LoanStatus.ACTIVE if j < 2 else LoanStatus.OVERDUE,
+                    )
+                )
+            for j in range(2):
+                session.add(Review(user=users[(i + j) % USERS], book=book, rating=1 + (i + j) % 5))
+        session.commit()
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client(seeded: None):
+    """TestClient de la app sobre la base con datos."""
+    from litestar.testing import TestClient
+
+    from app import app
+
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,52 @@
+"""Los listados no hacen N+1: las consultas SQL por request no crecen con el tamaño de la página."""
+
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+# endpoint -> máximo de consultas por request
+QUERY_BUDGETS = {
+    "/books/": 5,  # validador (ETag) + libros + loans, reviews y categories (selectinload)
+    "/books/search?title=o": 4,
+    "/loans/": 2,  # validador (ETag) + préstamos con JOIN a user y book
+    "/loans/overdue": 1,
+    "/reviews/": 2,  # validador (ETag) + reseñas con JOIN a user y book
+    "/users/": 1,
+    "/categories/": 2,
+}
+
+
+@pytest.fixture
+def query_count():
+    """Contador de las consultas SQL ejecutadas mientras dura el test."""
+    count = [0]
+
+    def count_query(*_) -> None:
+        count[0] += 1
+
+    event.listen(Engine, "before_cursor_execute", count_query)
+    yield count
+    event.remove(Engine, "before_cursor_execute", count_query)
+
+
+def measure(client, query_count, path: str, limit: int) -> tuple[int, int]:
+    """(consultas, filas) de una request al endpoint."""
+    url = urlsplit(path)
+    query_count[0] = 0
+    response = client.get(url.path, params={**dict(parse_qsl(url.query)), "limit": limit})
+    assert response.status_code == 200, response.text
+    return query_count[0], len(response.json()["items"])
+
+
+@pytest.mark.parametrize(("path", "budget"), QUERY_BUDGETS.items())
+def test_list_query_budget(client, query_count, path: str, budget: int) -> None:
+    single, _ = measure(client, query_count, path, 1)
+    full, rows = measure(client, query_count, path, settings.page_size_max)
+
+    assert rows > 1, f"{path}: los datos de prueba no llenan más de una fila"
+    assert single == full, f"{path}: {single} consultas con limit=1 y {full} con limit={settings.page_size_max} (N+1)"
+    assert full <= budget, f"{path}: {full} consultas, el presupuesto es {budget}"